@@ -6,54 +6,125 @@ GitHub: https://github.com/SinghSuryaDeep
 """
 
 import asyncio
-from beeai_framework.agents.react import ReActAgent
-from beeai_framework.adapters.watsonx import WatsonxChatModel
-from beeai_framework.memory.token_memory import TokenMemory
-from beeai_framework.tools.code import LocalPythonStorage, PythonTool
+import logging
 import re
 import json
+import threading
 from datetime import datetime, timedelta
+from typing import Union
 import os
 from dotenv import load_dotenv
+from common.credentials import current_token
+from common.limits import MAX_ITERATIONS, MAX_MEMORY_TOKENS
+from sandbox_pool import get_sandbox_pool
 load_dotenv()
 url=os.getenv("WATSONX_URL")
 project_id=os.getenv("WATSONX_PROJECT_ID")
 apikey=os.getenv("WATSONX_APIKEY")
 model_id=os.getenv("WATSONX_MODEL")
 
+logger = logging.getLogger(__name__)
 
-def create_admin_agent():
-    llm = WatsonxChatModel(
-        api_key=apikey,
-        project_id=project_id,
-        model=model_id,
-        url=url,
-        # Add these parameters to improve output consistency
-        temperature=0.1,  # Lower temperature for more consistent output
-        max_tokens=1000,
-        top_p=0.9
-    )
+# beeai_framework is imported and the chat model built lazily so the server
+# can answer discovery and health checks while warm_up() runs in the background
+_llm_lock = threading.Lock()
+_llm = None
+_llm_token = None
+
+def get_llm():
+    """The watsonx chat model, rebuilt whenever the shared IAM token has been refreshed"""
+    global _llm, _llm_token
+    token = current_token()
+    with _llm_lock:
+        if _llm is None or token != _llm_token:
+            from beeai_framework.adapters.watsonx import WatsonxChatModel
+            # A bearer token is passed through to the watsonx provider, which
+            # then skips its own API key exchange
+            auth = {"token": token} if token else {}
+            _llm = WatsonxChatModel(
+                api_key=apikey,
+                project_id=project_id,
+                model=model_id,
+                url=url,
+                # Add these parameters to improve output consistency
+                temperature=0.1,  # Lower temperature for more consistent output
+                max_tokens=1000,
+                top_p=0.9,
+                **auth
+            )
+            _llm_token = token
+    return _llm
+
+def _reset_after_fork() -> None:
+    # Connection pools must not be shared with the parent of a pre-fork worker
+    global _llm_lock, _llm, _llm_token
+    _llm_lock = threading.Lock()
+    _llm = None
+    _llm_token = None
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+def warm_up(phase) -> None:
+    """Import beeai_framework and build the chat model; ``phase`` times each step"""
+    with phase("import beeai_framework"):
+        import beeai_framework.agents.react
+        import beeai_framework.memory.token_memory
+        import beeai_framework.tools.code
+    with phase("fetch IAM token"):
+        current_token()
+    with phase("build watsonx chat model"):
+        get_llm()
+    with phase("warm code interpreter sessions"):
+        get_sandbox_pool().warm()
+
+def create_admin_agent(python_tool=None):
+    """Build a ReAct agent; pass a leased sandbox session's ``python_tool`` to reuse it"""
+    from beeai_framework.agents.react import ReActAgent
+    from beeai_framework.memory.token_memory import TokenMemory
+
+    llm = get_llm()
     
-    memory = TokenMemory(llm=llm)
-    storage = LocalPythonStorage(
-        local_working_dir=os.getenv("CODE_INTERPRETER_SOURCE", "./tmp/source"),
-        interpreter_working_dir=os.getenv("CODE_INTERPRETER_TMPDIR", "./tmp/target"),
-    )
-    python_tool = PythonTool(
-        code_interpreter_url=os.getenv("CODE_INTERPRETER_URL", "http://127.0.0.1:50081"),
-        storage=storage,
-    )
+    # Oldest messages are dropped once the memory reaches its token cap
+    memory = TokenMemory(llm=llm, max_tokens=MAX_MEMORY_TOKENS)
+    if python_tool is None:
+        from beeai_framework.tools.code import LocalPythonStorage, PythonTool
+        storage = LocalPythonStorage(
+            local_working_dir=os.getenv("CODE_INTERPRETER_SOURCE", "./tmp/source"),
+            interpreter_working_dir=os.getenv("CODE_INTERPRETER_TMPDIR", "./tmp/target"),
+        )
+        python_tool = PythonTool(
+            code_interpreter_url=os.getenv("CODE_INTERPRETER_URL", "http://127.0.0.1:50081"),
+            storage=storage,
+        )
     
     agent = ReActAgent(llm=llm, memory=memory, tools=[python_tool])
     return agent
 
-async def schedule_followup(report: str) -> dict:
-    agent = create_admin_agent()
-    
-    
+def parse_report(report: Union[str, dict]) -> dict:
+    """Accept the report either as a structured object or as its JSON string"""
+    if isinstance(report, dict):
+        return report
+    return json.loads(report)
+
+async def schedule_followup(report: Union[str, dict]) -> dict:
+    try:
+        # Blocking wait is fine: each request runs its own loop on its own thread
+        session = get_sandbox_pool().acquire()
+    except TimeoutError as e:
+        logger.warning("%s; scheduling without the agent", e)
+        return schedule_followup_direct(report)
+    try:
+        return await _schedule_followup_with_agent(report, create_admin_agent(session.python_tool))
+    finally:
+        get_sandbox_pool().release(session)
+
+async def _schedule_followup_with_agent(report: Union[str, dict], agent) -> dict:
+    from beeai_framework.agents.types import AgentExecutionConfig
+
     # Parse the report to extract key information
     try:
-        report_data = json.loads(report)
+        report_data = parse_report(report)
         condition = report_data.get("Condition", "Unknown")
         risk_level = report_data.get("RiskLevel", "Unknown")
         recommendations = report_data.get("Recommendations", [])
@@ -85,7 +156,10 @@ Please think step by step and use the Python tool to:
 Focus on providing a clear, actionable result."""
 
     try:
-        result = await agent.run(prompt=prompt)
+        result = await agent.run(
+            prompt=prompt,
+            execution=AgentExecutionConfig(max_iterations=MAX_ITERATIONS, max_retries_per_step=2, total_max_retries=4)
+        )
         # Extract the result more robustly
         output = None
         if hasattr(result, 'answer') and hasattr(result.answer, 'text'):
@@ -114,7 +188,7 @@ Focus on providing a clear, actionable result."""
         }
         
     except Exception as e:
-        print(f"Error in agent execution: {str(e)}")
+        logger.exception("Error in agent execution")
         # Fallback response
         fallback_date = datetime.now() + timedelta(days=14)
         return {
@@ -123,13 +197,13 @@ Focus on providing a clear, actionable result."""
         }
 
 # Alternative approach: Direct implementation without ReAct agent
-def schedule_followup_direct(report: str) -> dict:
+def schedule_followup_direct(report: Union[str, dict]) -> dict:
     """
     Direct implementation without ReAct agent to avoid parsing issues
     """
     try:
         # Parse the report
-        report_data = json.loads(report)
+        report_data = parse_report(report)
         condition = report_data.get("Condition", "Unknown")
         risk_level = report_data.get("RiskLevel", "Unknown")
         recommendations = report_data.get("Recommendations", [])
@@ -155,7 +229,7 @@ def schedule_followup_direct(report: str) -> dict:
         }
         
     except Exception as e:
-        print(f"Error in direct scheduling: {str(e)}")
+        logger.exception("Error in direct scheduling")
         # Fallback
         fallback_date = datetime.now() + timedelta(days=14)
         return {
@@ -0,0 +1,180 @@
+"""
+Author: SURYA DEEP SINGH
+LinkedIn: https://www.linkedin.com/in/surya-deep-singh-b9b94813a/
+Medium: https://medium.com/@SuryaDeepSingh
+GitHub: https://github.com/SinghSuryaDeep
+"""
+# local_interpreter.py
+#
+# Local stand-in for the Bee code interpreter so the admin agent's PythonTool
+# and the sandbox pool can be exercised offline. It speaks the same
+# POST /v1/execute API:
+#
+#   request:  {"source_code": "...", "files": {"/workspace/a.txt": "<sha256>"}, "env": {...}}
+#   response: {"stdout": "...", "stderr": "...", "exit_code": 0, "files": {"/workspace/b.txt": "<sha256>"}}
+#
+# Files are exchanged through the content-addressed store that
+# LocalPythonStorage writes to (CODE_INTERPRETER_TMPDIR): every input file is
+# copied from <store>/<hash> into a fresh scratch workspace, the code runs in
+# a subprocess there, and new or changed files are hashed back into the store.
+# The code gets a minimal environment (PATH, locale, HOME and TMPDIR in the
+# workspace, plus the request's "env"), never the server's own, so WATSONX or
+# IAM credentials are not visible to generated code.
+# This is NOT a security sandbox - run it only on a developer machine.
+#
+#   python admin_agent/local_interpreter.py --port 50081 --store ./tmp/target
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict
+
+logger = logging.getLogger(__name__)
+
+WORKSPACE = "/workspace"
+# Variables passed on from the server's environment
+INHERITED_ENV = ("PATH", "LANG", "LC_ALL", "LC_CTYPE", "TZ", "SYSTEMROOT")
+
+
+def _hash_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(65536), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _scratch_path(scratch: str, workspace_path: str) -> str:
+    relative = os.path.relpath(os.path.normpath(workspace_path), WORKSPACE)
+    if relative.startswith(".."):
+        raise ValueError(f"File outside {WORKSPACE}: {workspace_path}")
+    return os.path.join(scratch, relative)
+
+
+def _child_env(scratch: str, env: Dict[str, str]) -> Dict[str, str]:
+    child = {name: os.environ[name] for name in INHERITED_ENV if name in os.environ}
+    child.update({"HOME": scratch, "TMPDIR": scratch, "PYTHONDONTWRITEBYTECODE": "1"})
+    child.update({str(k): str(v) for k, v in (env or {}).items()})
+    return child
+
+
+def execute(source_code: str, files: Dict[str, str], env: Dict[str, str], store: str, timeout: float) -> dict:
+    """Run ``source_code`` in a scratch workspace populated from ``store``"""
+    os.makedirs(store, exist_ok=True)
+    scratch = tempfile.mkdtemp(prefix="interpreter-")
+    try:
+        for workspace_path, file_hash in files.items():
+            target = _scratch_path(scratch, workspace_path)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            shutil.copyfile(os.path.join(store, file_hash), target)
+        before = dict(files)
+
+        try:
+            completed = subprocess.run(
+                [sys.executable, "-c", source_code],
+                cwd=scratch,
+                env=_child_env(scratch, env),
+                capture_output=True,
+                text=True,
+                timeout=timeout
+            )
+            stdout, stderr, exit_code = completed.stdout, completed.stderr, completed.returncode
+        except subprocess.TimeoutExpired as e:
+            stdout = e.stdout or ""
+            stderr = (e.stderr or "") + f"\nExecution timed out after {timeout}s"
+            exit_code = -1
+            if isinstance(stdout, bytes):
+                stdout = stdout.decode(errors="replace")
+            if isinstance(stderr, bytes):
+                stderr = stderr.decode(errors="replace")
+
+        changed = {}
+        for root, _, names in os.walk(scratch):
+            for name in names:
+                local = os.path.join(root, name)
+                workspace_path = os.path.join(WORKSPACE, os.path.relpath(local, scratch))
+                file_hash = _hash_file(local)
+                if before.get(workspace_path) != file_hash:
+                    stored = os.path.join(store, file_hash)
+                    if not os.path.exists(stored):
+                        shutil.copyfile(local, stored)
+                    changed[workspace_path] = file_hash
+        return {"stdout": stdout, "stderr": stderr, "exit_code": exit_code, "files": changed}
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+def make_handler(store: str, timeout: float, semaphore: threading.BoundedSemaphore):
+    class InterpreterHandler(BaseHTTPRequestHandler):
+        def _send_json(self, status: int, payload: dict) -> None:
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == "/health":
+                self._send_json(200, {"status": "healthy"})
+            else:
+                self._send_json(404, {"error": "Not found"})
+
+        def do_POST(self):
+            if self.path != "/v1/execute":
+                self._send_json(404, {"error": "Not found"})
+                return
+            try:
+                length = int(self.headers.get("Content-Length", "0"))
+                request_data = json.loads(self.rfile.read(length) or b"{}")
+                with semaphore:
+                    result = execute(
+                        request_data.get("source_code", ""),
+                        request_data.get("files", {}) or {},
+                        request_data.get("env", {}) or {},
+                        store,
+                        timeout
+                    )
+                self._send_json(200, result)
+            except (ValueError, FileNotFoundError) as e:
+                self._send_json(400, {"error": str(e)})
+            except Exception as e:
+                logger.exception("Execution failed")
+                self._send_json(500, {"error": str(e)})
+
+        def log_message(self, format, *args):
+            logger.info("%s - %s", self.address_string(), format % args)
+
+    return InterpreterHandler
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Local stand-in for the Bee code interpreter")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=50081)
+    parser.add_argument("--store", default=os.getenv("CODE_INTERPRETER_TMPDIR", "./tmp/target"),
+                        help="Content-addressed file store shared with LocalPythonStorage")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Seconds per execution")
+    parser.add_argument("--max-executions", type=int, default=4, help="Concurrent executions")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    handler = make_handler(args.store, args.timeout, threading.BoundedSemaphore(args.max_executions))
+    server = ThreadingHTTPServer((args.host, args.port), handler)
+    logger.info("Local code interpreter on http://%s:%s (store %s)", args.host, args.port, args.store)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,340 @@
+"""
+Author: SURYA DEEP SINGH
+LinkedIn: https://www.linkedin.com/in/surya-deep-singh-b9b94813a/
+Medium: https://medium.com/@SuryaDeepSingh
+GitHub: https://github.com/SinghSuryaDeep
+"""
+# sandbox_pool.py
+#
+# Pool of warm code-interpreter sessions for the admin agent's PythonTool.
+#
+# Each session owns its own local working directory and a PythonTool built
+# once and reused, so requests no longer construct storage and tools from
+# scratch. A request leases a session for its whole ReAct run, which keeps
+# its files isolated from other requests; the directory is emptied when the
+# lease is returned. The interpreter-side directory is the interpreter's
+# content-addressed file store and is shared. A reaper thread removes stale
+# files from both, and a process-wide semaphore caps concurrent executions.
+#
+# With pre-forked workers all workers share both directories. The reaper only
+# touches its own sessions and those of workers that have exited; store files
+# whose content is in a session directory of a live worker are kept, however old.
+
+import asyncio
+import hashlib
+import logging
+import os
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+from typing import List, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+CODE_INTERPRETER_URL = os.getenv("CODE_INTERPRETER_URL", "http://127.0.0.1:50081")
+SOURCE_DIR = os.getenv("CODE_INTERPRETER_SOURCE", "./tmp/source")
+TARGET_DIR = os.getenv("CODE_INTERPRETER_TMPDIR", "./tmp/target")
+POOL_SIZE = int(os.getenv("CODE_INTERPRETER_POOL_SIZE", "4"))
+MAX_EXECUTIONS = int(os.getenv("CODE_INTERPRETER_MAX_EXECUTIONS", "4"))
+LEASE_TIMEOUT = float(os.getenv("CODE_INTERPRETER_LEASE_TIMEOUT", "30"))
+FILE_TTL = float(os.getenv("CODE_INTERPRETER_FILE_TTL", "3600"))
+REAP_INTERVAL = float(os.getenv("CODE_INTERPRETER_REAP_INTERVAL", "300"))
+
+
+def _clear_directory(path: str) -> None:
+    for entry in os.scandir(path):
+        if entry.is_dir(follow_symlinks=False):
+            shutil.rmtree(entry.path, ignore_errors=True)
+        else:
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass
+
+
+def _remove_stale_files(path: str, max_age: float, keep: frozenset = frozenset()) -> int:
+    """Delete files under ``path`` not modified for ``max_age`` seconds, except those named in ``keep``"""
+    if not os.path.isdir(path):
+        return 0
+    cutoff = time.time() - max_age
+    removed = 0
+    for root, dirs, files in os.walk(path, topdown=False):
+        for name in files:
+            if name in keep:
+                continue
+            file_path = os.path.join(root, name)
+            try:
+                if os.path.getmtime(file_path) < cutoff:
+                    os.remove(file_path)
+                    removed += 1
+            except FileNotFoundError:
+                pass
+        if root != path and not os.listdir(root):
+            os.rmdir(root)
+    return removed
+
+
+def _file_hashes(path: str) -> set:
+    """Content hashes of the files under ``path``: their names in the interpreter's store"""
+    hashes = set()
+    for root, _, files in os.walk(path):
+        for name in files:
+            digest = hashlib.sha256()
+            try:
+                with open(os.path.join(root, name), "rb") as f:
+                    for chunk in iter(lambda: f.read(65536), b""):
+                        digest.update(chunk)
+            except FileNotFoundError:
+                continue
+            hashes.add(digest.hexdigest())
+    return hashes
+
+
+def _session_owner(name: str) -> Optional[int]:
+    """Worker pid of a session directory ("session-<pid>-<index>"), None for anything else"""
+    parts = name.split("-")
+    if len(parts) == 3 and parts[0] == "session" and parts[1].isdigit() and parts[2].isdigit():
+        return int(parts[1])
+    return None
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class _PermitWait:
+    """A wait for an execution permit on a worker thread that its caller can abandon"""
+
+    def __init__(self, semaphore: threading.BoundedSemaphore, poll: float = 0.1):
+        self.semaphore = semaphore
+        self.poll = poll
+        self.acquired = False
+        self.abandoned = False
+        self._lock = threading.Lock()
+
+    def wait(self) -> None:
+        # Polls so that an abandoned wait frees its thread instead of blocking until a permit is free
+        while True:
+            if self.semaphore.acquire(timeout=self.poll):
+                with self._lock:
+                    if self.abandoned:
+                        self.semaphore.release()
+                    else:
+                        self.acquired = True
+                    return
+            with self._lock:
+                if self.abandoned:
+                    return
+
+    def abandon(self) -> None:
+        """Give back the permit if the wait got one, or make the wait give it back"""
+        with self._lock:
+            self.abandoned = True
+            if self.acquired:
+                self.acquired = False
+                self.semaphore.release()
+
+
+async def acquire_permit(semaphore: threading.BoundedSemaphore) -> None:
+    """Take a permit without blocking the event loop; a cancelled caller never keeps one"""
+    permit = _PermitWait(semaphore)
+    try:
+        await asyncio.to_thread(permit.wait)
+    except BaseException:
+        permit.abandon()
+        raise
+
+
+def _make_bounded_python_tool(code_interpreter_url: str, storage, semaphore: threading.BoundedSemaphore):
+    """PythonTool whose executions are capped process-wide by ``semaphore``"""
+    from beeai_framework.tools.code import PythonTool
+
+    class BoundedPythonTool(PythonTool):
+        async def _run(self, input, options, context):
+            # Requests run on separate event loops, so the cap is a thread semaphore
+            await acquire_permit(semaphore)
+            try:
+                return await super()._run(input, options, context)
+            finally:
+                semaphore.release()
+
+    return BoundedPythonTool(code_interpreter_url=code_interpreter_url, storage=storage)
+
+
+class SandboxSession:
+    """One reusable PythonTool with a private local working directory"""
+
+    def __init__(self, index: int, source_dir: str, target_dir: str, code_interpreter_url: str,
+                 semaphore: threading.BoundedSemaphore):
+        self.index = index
+        # The pid keeps sessions of pre-forked workers apart
+        self.local_working_dir = os.path.join(source_dir, f"session-{os.getpid()}-{index}")
+        self.interpreter_working_dir = target_dir
+        self.code_interpreter_url = code_interpreter_url
+        self.leased_at: Optional[float] = None
+        self._semaphore = semaphore
+        self._python_tool = None
+        os.makedirs(self.local_working_dir, exist_ok=True)
+        os.makedirs(self.interpreter_working_dir, exist_ok=True)
+
+    @property
+    def python_tool(self):
+        if self._python_tool is None:
+            from beeai_framework.tools.code import LocalPythonStorage
+            storage = LocalPythonStorage(
+                local_working_dir=self.local_working_dir,
+                interpreter_working_dir=self.interpreter_working_dir,
+            )
+            self._python_tool = _make_bounded_python_tool(self.code_interpreter_url, storage, self._semaphore)
+        return self._python_tool
+
+    def reset(self) -> None:
+        """Remove everything the last request left in the working directory"""
+        _clear_directory(self.local_working_dir)
+
+
+class SandboxPool:
+    """Fixed set of warm sandbox sessions leased one request at a time"""
+
+    def __init__(
+        self,
+        size: int = POOL_SIZE,
+        max_executions: int = MAX_EXECUTIONS,
+        source_dir: str = SOURCE_DIR,
+        target_dir: str = TARGET_DIR,
+        code_interpreter_url: str = CODE_INTERPRETER_URL,
+        file_ttl: float = FILE_TTL,
+        reap_interval: float = REAP_INTERVAL
+    ):
+        self.code_interpreter_url = code_interpreter_url
+        self.source_dir = source_dir
+        self.target_dir = target_dir
+        self.file_ttl = file_ttl
+        self.execution_semaphore = threading.BoundedSemaphore(max_executions)
+        self.sessions: List[SandboxSession] = [
+            SandboxSession(i, source_dir, target_dir, code_interpreter_url, self.execution_semaphore)
+            for i in range(size)
+        ]
+        self._idle = list(self.sessions)
+        self._available = threading.Condition()
+        self._stop = threading.Event()
+        self._reaper = None
+        if reap_interval > 0:
+            self._reaper = threading.Thread(target=self._reap_loop, args=(reap_interval,),
+                                            name="sandbox-reaper", daemon=True)
+            self._reaper.start()
+
+    def warm(self) -> None:
+        """Build every session's tool and run a no-op on the interpreter"""
+        for session in self.sessions:
+            session.python_tool
+        try:
+            response = httpx.post(f"{self.code_interpreter_url.rstrip('/')}/v1/execute",
+                                  json={"source_code": "pass", "files": {}}, timeout=30)
+            response.raise_for_status()
+        except Exception as e:
+            logger.warning("Code interpreter at %s did not answer warm-up: %s", self.code_interpreter_url, e)
+
+    def acquire(self, timeout: float = LEASE_TIMEOUT) -> SandboxSession:
+        deadline = time.monotonic() + timeout
+        with self._available:
+            while not self._idle:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(f"No code interpreter session free after {timeout}s")
+                self._available.wait(remaining)
+            session = self._idle.pop()
+            session.leased_at = time.time()
+            return session
+
+    def release(self, session: SandboxSession) -> None:
+        try:
+            session.reset()
+        except OSError:
+            logger.exception("Could not clean sandbox session %s", session.index)
+        with self._available:
+            session.leased_at = None
+            self._idle.append(session)
+            self._available.notify()
+
+    @contextmanager
+    def lease(self, timeout: float = LEASE_TIMEOUT):
+        session = self.acquire(timeout)
+        try:
+            yield session
+        finally:
+            self.release(session)
+
+    def reap(self) -> int:
+        """Remove stale files of idle own sessions, sessions of exited workers and unused store files"""
+        with self._available:
+            leased = {s.local_working_dir for s in self.sessions if s.leased_at is not None}
+        removed = 0
+        # Store files still used by a session of this or a sibling worker
+        referenced = set()
+        for entry in os.scandir(self.source_dir):
+            owner = _session_owner(entry.name)
+            if owner is None or not entry.is_dir(follow_symlinks=False):
+                continue
+            if owner == os.getpid():
+                if entry.path in leased:
+                    referenced |= _file_hashes(entry.path)
+                else:
+                    removed += _remove_stale_files(entry.path, self.file_ttl)
+            elif _pid_alive(owner):
+                # Idle sessions are emptied on release, so this is what the sibling's leases use
+                referenced |= _file_hashes(entry.path)
+            else:
+                removed += sum(len(files) for _, _, files in os.walk(entry.path))
+                shutil.rmtree(entry.path, ignore_errors=True)
+        removed += _remove_stale_files(self.target_dir, self.file_ttl, frozenset(referenced))
+        return removed
+
+    def _reap_loop(self, interval: float) -> None:
+        while not self._stop.wait(interval):
+            try:
+                removed = self.reap()
+                if removed:
+                    logger.info("Reclaimed %s stale code interpreter files", removed)
+            except Exception:
+                logger.exception("Sandbox reaper failed")
+
+    def stats(self) -> dict:
+        with self._available:
+            idle = len(self._idle)
+        return {"size": len(self.sessions), "idle": idle, "leased": len(self.sessions) - idle}
+
+    def close(self) -> None:
+        self._stop.set()
+
+
+_pool: Optional[SandboxPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_sandbox_pool() -> SandboxPool:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = SandboxPool()
+    return _pool
+
+
+def _reset_after_fork() -> None:
+    # Leases, locks and the reaper thread belong to the parent of a pre-fork worker
+    global _pool, _pool_lock
+    _pool_lock = threading.Lock()
+    _pool = None
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
@@ -0,0 +1,347 @@
+"""
+Author: SURYA DEEP SINGH
+LinkedIn: https://www.linkedin.com/in/surya-deep-singh-b9b94813a/
+Medium: https://medium.com/@SuryaDeepSingh
+GitHub: https://github.com/SinghSuryaDeep
+"""
+# admin_agent/scheduler.py
+#
+# Capacity-aware bulk scheduling of follow-ups. Clinic capacity is a grid of
+# slots (SCHEDULER_WINDOWS on SCHEDULER_WORKDAYS, SCHEDULER_SLOT_MINUTES long,
+# SCHEDULER_CAPACITY appointments each) over SCHEDULER_HORIZON_DAYS. Each risk
+# level has a window of days in which its follow-up must happen
+# (SCHEDULER_DEADLINES, e.g. "high:1-7,medium:3-14,low:7-28").
+#
+# A batch is booked earliest-deadline-first. Every booking is a bisect to the
+# first slot of the follow-up's window plus a "next free slot" lookup in a
+# disjoint-set forest, where full slots point at their successor, so one
+# assignment costs O(log n) no matter how many slots are already booked. A
+# follow-up is never booked after its deadline: without a free slot in its
+# window it is reported as unscheduled.
+#
+# Bookings are kept in SCHEDULER_STORE:
+#   sqlite:PATH  – shared by all pre-fork workers on a host and kept across
+#                  restarts (default sqlite:./tmp/scheduler.sqlite). A batch
+#                  books inside one write transaction, so workers never hand
+#                  out the same capacity twice.
+#   memory       – this process only; refused in pre-forked workers, where
+#                  every worker would overbook its own copy of the clinic.
+
+import bisect
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import quote
+
+from admin_logic import parse_report
+
+CALENDAR_URL = "https://calendar.google.com/calendar/event?action=TEMPLATE"
+
+
+def _parse_windows(value: str) -> List[Tuple[time, time]]:
+    windows = []
+    for item in value.split(","):
+        start, end = item.strip().split("-")
+        windows.append((time.fromisoformat(start.strip()), time.fromisoformat(end.strip())))
+    return windows
+
+
+def _parse_deadlines(value: str) -> Dict[str, Tuple[int, int]]:
+    deadlines = {}
+    for item in value.split(","):
+        risk, days = item.strip().split(":")
+        earliest, latest = days.split("-")
+        deadlines[risk.strip().lower()] = (int(earliest), int(latest))
+    return deadlines
+
+
+WINDOWS = _parse_windows(os.getenv("SCHEDULER_WINDOWS", "09:00-12:00,13:00-17:00"))
+WORKDAYS = tuple(int(d) for d in os.getenv("SCHEDULER_WORKDAYS", "0,1,2,3,4").split(","))
+SLOT_MINUTES = int(os.getenv("SCHEDULER_SLOT_MINUTES", "30"))
+CAPACITY = int(os.getenv("SCHEDULER_CAPACITY", "4"))
+HORIZON_DAYS = int(os.getenv("SCHEDULER_HORIZON_DAYS", "60"))
+DEADLINES = _parse_deadlines(os.getenv("SCHEDULER_DEADLINES", "high:1-7,medium:3-14,low:7-28"))
+# Reports without a known risk level keep the old two-week default
+DEFAULT_DEADLINE = DEADLINES.get("medium", (3, 14))
+STORE_SPEC = os.getenv("SCHEDULER_STORE", "sqlite:./tmp/scheduler.sqlite")
+
+
+class SlotIndex:
+    """Bookable slots from ``start_day`` on, with O(log n) first-free-slot booking"""
+
+    def __init__(self, start_day: date, horizon_days: int = HORIZON_DAYS, capacity: int = CAPACITY,
+                 windows: List[Tuple[time, time]] = WINDOWS, workdays: tuple = WORKDAYS,
+                 slot_minutes: int = SLOT_MINUTES):
+        self.start_day = start_day
+        self.capacity = capacity
+        self.slot_length = timedelta(minutes=slot_minutes)
+        self.starts: List[datetime] = []
+        for offset in range(horizon_days):
+            day = start_day + timedelta(days=offset)
+            if day.weekday() not in workdays:
+                continue
+            for window_start, window_end in windows:
+                slot = datetime.combine(day, window_start)
+                end = datetime.combine(day, window_end)
+                while slot + self.slot_length <= end:
+                    self.starts.append(slot)
+                    slot += self.slot_length
+        self.booked = [0] * len(self.starts)
+        # parent[i] == i while slot i has room; index len(starts) is the "no slot" sentinel
+        self._parent = list(range(len(self.starts) + 1))
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def _find(self, i: int) -> int:
+        root = i
+        while self._parent[root] != root:
+            root = self._parent[root]
+        while self._parent[i] != root:
+            self._parent[i], i = root, self._parent[i]
+        return root
+
+    def _take(self, i: int) -> None:
+        self.booked[i] += 1
+        if self.booked[i] >= self.capacity:
+            self._parent[i] = i + 1
+
+    def book_first_free(self, earliest: datetime, deadline: Optional[datetime] = None) -> Optional[int]:
+        """Book the first slot with room starting at or after ``earliest`` and, if given, by ``deadline``"""
+        i = self._find(bisect.bisect_left(self.starts, earliest))
+        limit = len(self.starts) if deadline is None else bisect.bisect_right(self.starts, deadline)
+        if i >= limit:
+            return None
+        self._take(i)
+        return i
+
+    def book_at(self, start: datetime, count: int = 1) -> None:
+        """Re-apply existing bookings (used when the index rolls over to a new day)"""
+        i = bisect.bisect_left(self.starts, start)
+        if i < len(self.starts) and self.starts[i] == start:
+            for _ in range(count):
+                if self.booked[i] < self.capacity:
+                    self._take(i)
+
+    def slot(self, i: int) -> Tuple[datetime, datetime]:
+        return self.starts[i], self.starts[i] + self.slot_length
+
+    def bookings(self) -> Dict[datetime, int]:
+        return {self.starts[i]: n for i, n in enumerate(self.booked) if n}
+
+    def stats(self) -> Dict[str, Any]:
+        booked = sum(self.booked)
+        total = len(self.starts) * self.capacity
+        return {"start_day": self.start_day.isoformat(), "slots": len(self.starts), "capacity": total,
+                "booked": booked, "utilization": round(booked / total, 4) if total else 0.0}
+
+
+class MemoryCalendar:
+    """Bookings of this process only, rolled forward when the day changes"""
+
+    def __init__(self, capacity: int = CAPACITY):
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        self._index: Optional[SlotIndex] = None
+
+    @contextmanager
+    def index(self, today: date) -> Iterator[SlotIndex]:
+        with self._lock:
+            if self._index is None or self._index.start_day != today:
+                previous = self._index
+                self._index = SlotIndex(today, capacity=self.capacity)
+                if previous is not None:
+                    for start, count in previous.bookings().items():
+                        self._index.book_at(start, count)
+            yield self._index
+
+
+class SQLiteCalendar:
+    """Bookings in a SQLite file shared by local worker processes and kept across restarts"""
+
+    def __init__(self, path: str, capacity: int = CAPACITY):
+        self.path = path
+        self.capacity = capacity
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as db:
+            db.execute("CREATE TABLE IF NOT EXISTS bookings (start TEXT PRIMARY KEY, count INTEGER NOT NULL)")
+
+    def _connect(self) -> sqlite3.Connection:
+        # One connection per thread and process; connections must not cross a fork
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    @contextmanager
+    def index(self, today: date) -> Iterator[SlotIndex]:
+        """The stored bookings as a SlotIndex; what is booked on it is written back on exit
+
+        The write lock is held throughout, so concurrent batches of other
+        workers wait instead of booking the same slots.
+        """
+        db = self._connect()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            index = SlotIndex(today, capacity=self.capacity)
+            for start, count in db.execute("SELECT start, count FROM bookings WHERE start >= ?",
+                                           (today.isoformat(),)):
+                index.book_at(datetime.fromisoformat(start), count)
+            before = index.bookings()
+            yield index
+            db.executemany("INSERT OR REPLACE INTO bookings VALUES (?, ?)",
+                           [(start.isoformat(), count) for start, count in index.bookings().items()
+                            if before.get(start) != count])
+            db.execute("DELETE FROM bookings WHERE start < ?", (today.isoformat(),))
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+
+
+def create_calendar(spec: str = STORE_SPEC):
+    if spec.startswith("sqlite:"):
+        return SQLiteCalendar(spec[len("sqlite:"):])
+    if spec == "memory":
+        return MemoryCalendar()
+    raise ValueError(f"Unknown SCHEDULER_STORE: {spec}")
+
+
+_calendar_lock = threading.Lock()
+_calendar = None
+_forked = False
+
+
+def get_calendar():
+    """The process-wide booking calendar, created on first use"""
+    global _calendar
+    with _calendar_lock:
+        if _calendar is None:
+            calendar = create_calendar(STORE_SPEC)
+            if _forked and isinstance(calendar, MemoryCalendar):
+                raise RuntimeError("SCHEDULER_STORE=memory keeps bookings in one process and would overbook "
+                                   "with pre-forked workers; use SCHEDULER_STORE=sqlite:PATH")
+            _calendar = calendar
+    return _calendar
+
+
+def _reset_after_fork() -> None:
+    # Bookings of a memory calendar must not be copied into several workers
+    global _calendar_lock, _calendar, _forked
+    _calendar_lock = threading.Lock()
+    _calendar = None
+    _forked = True
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def risk_window(risk_level: str, recommendations: Any) -> Tuple[int, int]:
+    earliest, latest = DEADLINES.get(str(risk_level).lower(), DEFAULT_DEADLINE)
+    if "2 weeks" in str(recommendations).lower():
+        latest = min(latest, 14)
+    return earliest, latest
+
+
+def _format_calendar_time(value: datetime) -> str:
+    return value.strftime('%Y%m%dT%H%M%S')
+
+
+def calendar_link(title: str, start: datetime, end: datetime) -> str:
+    return f"{CALENDAR_URL}&text={quote(title)}&dates={_format_calendar_time(start)}/{_format_calendar_time(end)}"
+
+
+def _ics_escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\n", "\\n")
+
+
+def assign_followups(followups: List[Dict[str, Any]], now: Optional[datetime] = None) -> List[Dict[str, Any]]:
+    """Book every follow-up of the batch into clinic capacity; one record per follow-up, in input order"""
+    now = now or datetime.now()
+    records: List[Optional[Dict[str, Any]]] = [None] * len(followups)
+    pending = []
+    for i, followup in enumerate(followups):
+        followup_id = followup.get("id", i)
+        try:
+            report_data = parse_report(followup["report"])
+        except Exception as e:
+            records[i] = {"type": "error", "index": i, "id": followup_id, "error": f"Unreadable report: {e}"}
+            continue
+        if not isinstance(report_data, dict):
+            records[i] = {"type": "error", "index": i, "id": followup_id,
+                          "error": f"Unreadable report: expected an object, got {type(report_data).__name__}"}
+            continue
+        risk_level = report_data.get("RiskLevel", "Unknown")
+        earliest_days, latest_days = risk_window(risk_level, report_data.get("Recommendations", []))
+        earliest = max(now, datetime.combine(now.date() + timedelta(days=earliest_days), time.min))
+        deadline = datetime.combine(now.date() + timedelta(days=latest_days), time.max)
+        pending.append((deadline, earliest, i, followup_id, report_data.get("Condition", "Unknown"), risk_level))
+
+    # Earliest deadline first, so urgent follow-ups are never crowded out
+    pending.sort(key=lambda item: (item[0], item[1], item[2]))
+    with get_calendar().index(now.date()) as index:
+        for deadline, earliest, i, followup_id, condition, risk_level in pending:
+            slot = index.book_first_free(earliest, deadline)
+            if slot is None:
+                records[i] = {"type": "unscheduled", "index": i, "id": followup_id, "risk": risk_level,
+                              "deadline": deadline.date().isoformat(),
+                              "reason": f"No clinic capacity by the {deadline.date().isoformat()} deadline"}
+                continue
+            start, end = index.slot(slot)
+            records[i] = {
+                "type": "appointment",
+                "index": i,
+                "id": followup_id,
+                "condition": condition,
+                "risk": risk_level,
+                "appointment": start.isoformat() + "Z",
+                "end": end.isoformat() + "Z",
+                "deadline": deadline.date().isoformat(),
+                "link": calendar_link(f"Follow-up: {condition}", start, end)
+            }
+    return records
+
+
+def export_ics(records: List[Dict[str, Any]], now: Optional[datetime] = None) -> str:
+    stamp = _format_calendar_time(now or datetime.now())
+    lines = ["BEGIN:VCALENDAR", "VERSION:2.0", "PRODID:-//admin-agent//followups//EN", "CALSCALE:GREGORIAN"]
+    for record in records:
+        if record["type"] != "appointment":
+            continue
+        start = datetime.fromisoformat(record["appointment"].rstrip("Z"))
+        end = datetime.fromisoformat(record["end"].rstrip("Z"))
+        lines += [
+            "BEGIN:VEVENT",
+            f"UID:{_ics_escape(str(record['id']))}-{_format_calendar_time(start)}@admin-agent",
+            f"DTSTAMP:{stamp}",
+            f"DTSTART:{_format_calendar_time(start)}",
+            f"DTEND:{_format_calendar_time(end)}",
+            f"SUMMARY:{_ics_escape('Follow-up: ' + str(record['condition']))}",
+            f"DESCRIPTION:{_ics_escape('Risk level: ' + str(record['risk']))}",
+            "END:VEVENT"
+        ]
+    lines.append("END:VCALENDAR")
+    return "\r\n".join(lines) + "\r\n"
+
+
+def summarize(records: List[Dict[str, Any]]) -> Dict[str, Any]:
+    appointments = [r for r in records if r["type"] == "appointment"]
+    with get_calendar().index(date.today()) as index:
+        calendar = index.stats()
+    return {
+        "type": "summary",
+        "total": len(records),
+        "scheduled": len(appointments),
+        "unscheduled": sum(1 for r in records if r["type"] == "unscheduled"),
+        "errors": sum(1 for r in records if r["type"] == "error"),
+        "calendar": calendar,
+        "ics": export_ics(records)
+    }
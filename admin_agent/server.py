@@ -6,13 +6,35 @@ GitHub: https://github.com/SinghSuryaDeep
 """
 # admin_agent/server.py
 
-from flask import Flask, request, jsonify
+from flask import Flask, jsonify
 import asyncio
 import logging
-from admin_logic import schedule_followup
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from admin_logic import schedule_followup, warm_up
+from scheduler import assign_followups, summarize
+from common.jsonrpc import JsonRpcError
+from common.limits import MAX_INPUT_TOKENS, exceeds_input_budget
+from common.logs import setup_logging
+from common.memtrack import init_memtrack
+from common.skills import SkillDispatcher
+from common.wire import MEDIA_NDJSON, ndjson_response
+from common.compression import PrecompressedDocument, init_compression
+from common.profiling import init_profiling
+from common.prefork import parse_server_args, serve_prefork
+from common.startup import StartupTracker, init_startup
+
+setup_logging("admin-agent")
+
+MAX_BATCH_SIZE = int(os.getenv("SCHEDULER_MAX_BATCH", "5000"))
 
 app = Flask(__name__)
-logging.basicConfig(level=logging.INFO)
+startup = StartupTracker("admin-agent")
+init_startup(app, startup)
+init_compression(app)
+init_profiling(app)
+init_memtrack(app)
 logger = logging.getLogger(__name__)
 
 # A2A Compliant Agent Card
@@ -60,8 +82,8 @@ agent_card = {
                     "type": "object",
                     "properties": {
                         "report": {
-                            "type": "string",
-                            "description": "Medical report in JSON format"
+                            "type": ["string", "object"],
+                            "description": "Medical report as a JSON string or a structured object"
                         }
                     },
                     "required": ["report"]
@@ -85,93 +107,126 @@ agent_card = {
                     "endpoint": "/skills/schedule-followup",
                     "contentType": "application/json"
                 }
+            },
+            {
+                "id": "schedule-followup-batch",
+                "name": "Schedule Follow-up Batch",
+                "description": "Book many follow-ups into clinic capacity within their risk-based deadlines; "
+                               "replies with one NDJSON line per booking and a final summary with an ICS export",
+                "tags": ["scheduling", "admin", "healthcare", "batch"],
+                "inputSchema": {
+                    "type": "object",
+                    "properties": {
+                        "followups": {
+                            "type": "array",
+                            "items": {
+                                "type": "object",
+                                "properties": {
+                                    "id": {"type": ["string", "integer"]},
+                                    "report": {"type": ["string", "object"]}
+                                },
+                                "required": ["report"]
+                            },
+                            "maxItems": MAX_BATCH_SIZE
+                        }
+                    },
+                    "required": ["followups"]
+                },
+                "outputSchema": {
+                    "type": "object",
+                    "properties": {
+                        "appointments": {"type": "array", "items": {"type": "object"}},
+                        "summary": {"type": "object"}
+                    },
+                    "required": ["appointments", "summary"]
+                },
+                "invocation": {
+                    "method": "POST",
+                    "endpoint": "/skills/schedule-followup-batch",
+                    "contentType": "application/json",
+                    "responseContentType": MEDIA_NDJSON
+                }
             }
         ]
     }
 }
 
+# Serialized and compressed once – the card never changes at runtime
+agent_card_document = PrecompressedDocument(agent_card)
+
+# Skill handlers
+
+def run_schedule_followup(params: dict) -> dict:
+    report = params.get("report")
+    
+    if not report:
+        raise JsonRpcError(-32602, "Invalid params - Missing 'report'")
+    if exceeds_input_budget(report):
+        raise JsonRpcError(-32602, f"Invalid params - 'report' exceeds {MAX_INPUT_TOKENS} tokens")
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        appointment_info = loop.run_until_complete(schedule_followup(report))
+    finally:
+        loop.close()
+    return {"appointment_info": appointment_info}
+
+def book_followup_batch(params: dict) -> list:
+    followups = params.get("followups")
+
+    if not isinstance(followups, list) or not followups:
+        raise JsonRpcError(-32602, "Invalid params - 'followups' must be a non-empty list")
+    if len(followups) > MAX_BATCH_SIZE:
+        raise JsonRpcError(-32602, f"Invalid params - at most {MAX_BATCH_SIZE} follow-ups per batch")
+    for i, followup in enumerate(followups):
+        if not isinstance(followup, dict) or not followup.get("report"):
+            raise JsonRpcError(-32602, f"Invalid params - followups[{i}] is missing 'report'")
+        if exceeds_input_budget(followup["report"]):
+            raise JsonRpcError(-32602, f"Invalid params - followups[{i}] exceeds {MAX_INPUT_TOKENS} tokens")
+    return assign_followups(followups)
+
+def run_schedule_followup_batch(params: dict) -> dict:
+    # In-process callers get the result as is; HTTP callers get it as NDJSON
+    records = book_followup_batch(params)
+    return {"appointments": records, "summary": summarize(records)}
+
+skills = SkillDispatcher(agent_card, {
+    "schedule-followup": run_schedule_followup,
+    "schedule-followup-batch": run_schedule_followup_batch
+})
+# Validated against the card schemas – shared by the HTTP endpoints and the in-process transport
+skill_handlers = skills.validated_handlers()
+
 @app.route("/.well-known/agent.json", methods=["GET"])
 def agent_manifest():
     """A2A Agent Discovery Endpoint"""
-    return jsonify(agent_card)
+    return agent_card_document.response()
 
 @app.route("/skills/schedule-followup", methods=["POST"])
 def schedule_followup_skill():
     """A2A Compliant Skill Invocation"""
-    try:
-        request_data = request.json
-        if not all(key in request_data for key in ["jsonrpc", "method", "params", "id"]):
-            return jsonify({
-                "jsonrpc": "2.0",
-                "error": {
-                    "code": -32600,
-                    "message": "Invalid Request - Missing required JSON-RPC fields"
-                },
-                "id": request_data.get("id")
-            }), 400
-        
-        if request_data["jsonrpc"] != "2.0":
-            return jsonify({
-                "jsonrpc": "2.0", 
-                "error": {
-                    "code": -32600,
-                    "message": "Invalid Request - jsonrpc must be '2.0'"
-                },
-                "id": request_data.get("id")
-            }), 400
-            
-        if request_data["method"] != "invoke":
-            return jsonify({
-                "jsonrpc": "2.0",
-                "error": {
-                    "code": -32601,
-                    "message": f"Method not found: {request_data['method']}"
-                },
-                "id": request_data["id"]
-            }), 404
-        
-        # Extract parameters
-        params = request_data.get("params", {})
-        report = params.get("report")
-        
-        if not report:
-            return jsonify({
-                "jsonrpc": "2.0",
-                "error": {
-                    "code": -32602,
-                    "message": "Invalid params - Missing 'report'"
-                },
-                "id": request_data["id"]
-            }), 400
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        try:
-            appointment_info = loop.run_until_complete(schedule_followup(report))
-        finally:
-            loop.close()
-        return jsonify({
-            "jsonrpc": "2.0",
-            "result": {
-                "appointment_info": appointment_info
-            },
-            "id": request_data["id"]
-        })
-        
-    except Exception as e:
-        logger.exception("Error during skill invocation")
-        return jsonify({
-            "jsonrpc": "2.0",
-            "error": {
-                "code": -32603,
-                "message": "Internal error",
-                "data": str(e)
-            },
-            "id": request_data.get("id") if request_data else None
-        }), 500
+    return skills.handle("schedule-followup")
+
+@app.route("/skills/schedule-followup-batch", methods=["POST"])
+def schedule_followup_batch_skill():
+    """A2A Compliant Skill Invocation"""
+    # Bookings are made before the reply is built, so errors still get a JSON-RPC reply and
+    # a retried batch is replayed from the result store instead of being booked twice. The
+    # result is complete by then, so it is sent as one NDJSON body that can be compressed.
+    return skills.handle("schedule-followup-batch",
+                         render=lambda result: ndjson_response(result["appointments"] + [result["summary"]]))
 
 @app.route("/health", methods=["GET"])
 def health_check():
     return jsonify({"status": "healthy", "protocol": "A2A v0.2"})
 
 if __name__ == "__main__":
-    app.run(host="127.0.0.1", port=8003, debug=True)
\ No newline at end of file
+    args = parse_server_args(port=8003)
+    if args.workers > 1:
+        serve_prefork(app, args.host, args.port, args.workers, warm_up=warm_up, startup=startup,
+                      memory_report_interval=args.memory_report_interval,
+                      memory_report_path=args.memory_report)
+    else:
+        startup.start_warmup(warm_up, debug=True)
+        startup.mark_serving()
+        app.run(host=args.host, port=args.port, debug=True)
\ No newline at end of file
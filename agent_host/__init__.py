@@ -0,0 +1,7 @@
+"""
+Author: SURYA DEEP SINGH
+LinkedIn: https://www.linkedin.com/in/surya-deep-singh-b9b94813a/
+Medium: https://medium.com/@SuryaDeepSingh
+GitHub: https://github.com/SinghSuryaDeep
+"""
+# agent_host/__init__.py
@@ -0,0 +1,141 @@
+"""
+Author: SURYA DEEP SINGH
+LinkedIn: https://www.linkedin.com/in/surya-deep-singh-b9b94813a/
+Medium: https://medium.com/@SuryaDeepSingh
+GitHub: https://github.com/SinghSuryaDeep
+"""
+# agent_host/host.py
+#
+# Runs several agents in one process. Every hosted agent is registered with
+# the in-process transport, so an A2AClient in this process calls its skills
+# directly; agents that are not hosted here are still reached over HTTP.
+# Each hosted agent can also keep serving its HTTP endpoints for remote callers.
+#
+#   python agent_host/host.py                                  # all three agents, HTTP on 8001-8003
+#   python agent_host/host.py --no-http --run-workflow         # in-process only, run the workflow once
+#   python agent_host/host.py --agents diagnostics-agent,report-agent
+
+import argparse
+import asyncio
+import importlib.util
+import logging
+import os
+import sys
+import threading
+from types import ModuleType
+from typing import Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from common.logs import setup_logging
+from common.transport import register_local_agent
+
+setup_logging("agent-host")
+logger = logging.getLogger(__name__)
+
+# agent id -> (package directory, default port)
+HOSTABLE_AGENTS = {
+    "diagnostics-agent": ("diagnostics_agent", 8001),
+    "report-agent": ("report_agent", 8002),
+    "admin-agent": ("admin_agent", 8003)
+}
+
+
+def _load_module(name: str, path: str) -> ModuleType:
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def load_agent_server(agent_id: str) -> ModuleType:
+    """Import an agent's server.py under a unique module name"""
+    package_dir, _ = HOSTABLE_AGENTS[agent_id]
+    agent_dir = os.path.join(ROOT, package_dir)
+    # server.py imports its logic module as a top-level module
+    if agent_dir not in sys.path:
+        sys.path.insert(0, agent_dir)
+    return _load_module(f"{package_dir}_server", os.path.join(agent_dir, "server.py"))
+
+
+class AgentHost:
+    """Loads agent servers into this process and wires up the in-process transport"""
+
+    def __init__(self, agent_ids: List[str]):
+        self.servers: Dict[str, ModuleType] = {}
+        for agent_id in agent_ids:
+            if agent_id not in HOSTABLE_AGENTS:
+                raise ValueError(f"Unknown agent '{agent_id}'")
+            server = load_agent_server(agent_id)
+            register_local_agent(server.agent_card, server.skill_handlers)
+            self.servers[agent_id] = server
+            logger.info("Hosting %s in-process", agent_id)
+        self._http_servers = []
+
+    def start_warmup(self) -> None:
+        for server in self.servers.values():
+            server.startup.start_warmup(server.warm_up)
+
+    def serve_http(self, host: str = "127.0.0.1", ports: Optional[Dict[str, int]] = None) -> None:
+        """Serve every hosted agent's Flask app on its own port in background threads"""
+        from werkzeug.serving import make_server
+
+        ports = ports or {}
+        for agent_id, server in self.servers.items():
+            port = ports.get(agent_id, HOSTABLE_AGENTS[agent_id][1])
+            http_server = make_server(host, port, server.app, threaded=True)
+            thread = threading.Thread(target=http_server.serve_forever, name=f"{agent_id}-http", daemon=True)
+            thread.start()
+            server.startup.mark_serving()
+            self._http_servers.append(http_server)
+            logger.info("%s serving HTTP on http://%s:%s", agent_id, host, port)
+
+    def shutdown(self) -> None:
+        for http_server in self._http_servers:
+            http_server.shutdown()
+        self._http_servers = []
+
+
+def run_client_workflow() -> None:
+    """Run client_agent/main.py's workflow inside this process"""
+    client_dir = os.path.join(ROOT, "client_agent")
+    if client_dir not in sys.path:
+        sys.path.insert(0, client_dir)
+    client_main = _load_module("client_agent_main", os.path.join(client_dir, "main.py"))
+    asyncio.run(client_main.main())
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Host several A2A agents in one process")
+    parser.add_argument("--agents", default=",".join(HOSTABLE_AGENTS),
+                        help="Comma separated agent ids to host")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--no-http", action="store_true", help="Only expose agents in-process")
+    parser.add_argument("--run-workflow", action="store_true",
+                        help="Run the client workflow once against the hosted agents, then exit")
+    args = parser.parse_args(argv)
+
+    agent_host = AgentHost([a.strip() for a in args.agents.split(",") if a.strip()])
+    agent_host.start_warmup()
+    if not args.no_http:
+        agent_host.serve_http(args.host)
+
+    if args.run_workflow:
+        try:
+            run_client_workflow()
+        finally:
+            agent_host.shutdown()
+        return
+
+    if args.no_http:
+        logger.warning("Nothing to serve: pass --run-workflow or drop --no-http")
+        return
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        agent_host.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,453 @@
+"""
+Author: SURYA DEEP SINGH
+LinkedIn: https://www.linkedin.com/in/surya-deep-singh-b9b94813a/
+Medium: https://medium.com/@SuryaDeepSingh
+GitHub: https://github.com/SinghSuryaDeep
+"""
+# load_generator.py
+#
+# Open-loop load generator for the A2A agents. Requests are released on a
+# fixed arrival schedule (constant or Poisson) regardless of how many are
+# still in flight, and latency is measured from the *intended* send time so
+# queueing delay is not hidden (coordinated-omission correction).
+#
+# Examples:
+#   python client_agent/load_generator.py --target workflow --rates 0.5,1,2 --duration 60
+#   python client_agent/load_generator.py --target skill:diagnostics-agent:analyze-patient-data \
+#       --arrival poisson --rates 1,2,4,8 --duration 30 --replica-target-rate 20 --output report.json
+
+import argparse
+import asyncio
+import json
+import logging
+import math
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Awaitable, Dict, List, Optional
+
+import httpx
+
+from main import A2AClient, discover_agent_url, run_workflow
+
+logger = logging.getLogger("load_generator")
+
+AGENT_NAMES = ("diagnostics-agent", "report-agent", "admin-agent")
+
+DEFAULT_PATIENT_DATA = {
+    "symptoms": ["headache", "dizziness", "chest pain"],
+    "vitals": {"bp": "150/95", "pulse": 90, "temperature": "99.2 F"}
+}
+
+
+class LatencyHistogram:
+    """HDR-style log-linear histogram of latencies in microseconds.
+
+    Values below ``2**sub_bucket_bits`` are recorded exactly; above that every
+    power-of-two range is split into ``2**(sub_bucket_bits - 1)`` linear
+    sub-buckets, giving a constant relative error of roughly
+    ``1 / 2**(sub_bucket_bits - 1)`` (1.6% with the default of 7 bits).
+    """
+
+    def __init__(self, sub_bucket_bits: int = 7):
+        self.sub_bucket_bits = sub_bucket_bits
+        self.sub_bucket_count = 1 << sub_bucket_bits
+        self.sub_bucket_half = self.sub_bucket_count >> 1
+        self.counts: Dict[int, int] = {}
+        self.total_count = 0
+        self.min_value: Optional[int] = None
+        self.max_value = 0
+        self.sum_value = 0
+
+    def _index_for(self, value: int) -> int:
+        if value < self.sub_bucket_count:
+            return value
+        shift = value.bit_length() - self.sub_bucket_bits
+        top = value >> shift
+        return self.sub_bucket_count + (shift - 1) * self.sub_bucket_half + (top - self.sub_bucket_half)
+
+    def _highest_equivalent(self, index: int) -> int:
+        if index < self.sub_bucket_count:
+            return index
+        offset = index - self.sub_bucket_count
+        shift = offset // self.sub_bucket_half + 1
+        top = offset % self.sub_bucket_half + self.sub_bucket_half
+        return ((top + 1) << shift) - 1
+
+    def record(self, seconds: float) -> None:
+        value = max(0, int(seconds * 1_000_000))
+        index = self._index_for(value)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.total_count += 1
+        self.sum_value += value
+        self.max_value = max(self.max_value, value)
+        self.min_value = value if self.min_value is None else min(self.min_value, value)
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.total_count += other.total_count
+        self.sum_value += other.sum_value
+        self.max_value = max(self.max_value, other.max_value)
+        if other.min_value is not None:
+            self.min_value = other.min_value if self.min_value is None else min(self.min_value, other.min_value)
+
+    def value_at_percentile(self, percentile: float) -> float:
+        """Latency in milliseconds at the given percentile (0-100)"""
+        if not self.total_count:
+            return 0.0
+        target = max(1, math.ceil(self.total_count * percentile / 100.0))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= target:
+                return min(self._highest_equivalent(index), self.max_value) / 1000.0
+        return self.max_value / 1000.0
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "count": self.total_count,
+            "min_ms": (self.min_value or 0) / 1000.0,
+            "mean_ms": (self.sum_value / self.total_count / 1000.0) if self.total_count else 0.0,
+            "p50_ms": self.value_at_percentile(50),
+            "p90_ms": self.value_at_percentile(90),
+            "p99_ms": self.value_at_percentile(99),
+            "p99_9_ms": self.value_at_percentile(99.9),
+            "max_ms": self.max_value / 1000.0
+        }
+
+    def percentile_distribution(self) -> List[Dict[str, float]]:
+        """HdrHistogram-style percentile distribution (value, percentile, total count)"""
+        distribution = []
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            distribution.append({
+                "value_ms": min(self._highest_equivalent(index), self.max_value) / 1000.0,
+                "percentile": seen / self.total_count,
+                "total_count": seen
+            })
+        return distribution
+
+
+@dataclass
+class StepResult:
+    """Measurements for one offered arrival rate"""
+    offered_rate: float
+    duration: float
+    sent: int = 0
+    completed: int = 0
+    errors: int = 0
+    shed: int = 0
+    max_in_flight: int = 0
+    error_types: Dict[str, int] = field(default_factory=dict)
+    corrected: LatencyHistogram = field(default_factory=LatencyHistogram)
+    service: LatencyHistogram = field(default_factory=LatencyHistogram)
+    wall_time: float = 0.0
+
+    @property
+    def achieved_rate(self) -> float:
+        # Per second of the send schedule: the drain after the last send only
+        # reflects latency, which is judged separately
+        return self.completed / self.duration if self.duration else 0.0
+
+    @property
+    def error_rate(self) -> float:
+        attempted = self.sent + self.shed
+        return (self.errors + self.shed) / attempted if attempted else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "offered_rate": self.offered_rate,
+            "duration_s": self.duration,
+            "wall_time_s": round(self.wall_time, 3),
+            "sent": self.sent,
+            "completed": self.completed,
+            "errors": self.errors,
+            "shed": self.shed,
+            "error_rate": round(self.error_rate, 4),
+            "error_types": self.error_types,
+            "achieved_rate": round(self.achieved_rate, 3),
+            "max_in_flight": self.max_in_flight,
+            "latency_corrected": self.corrected.summary(),
+            "latency_service": self.service.summary()
+        }
+
+
+def arrival_intervals(rate: float, arrival: str, rng: random.Random):
+    """Yield inter-arrival gaps in seconds for the requested process"""
+    while True:
+        if arrival == "poisson":
+            yield rng.expovariate(rate)
+        else:
+            yield 1.0 / rate
+
+
+async def run_step(
+    operation: Callable[[], Awaitable[Any]],
+    rate: float,
+    duration: float,
+    arrival: str = "constant",
+    max_in_flight: int = 10000,
+    drain_timeout: float = 300.0,
+    seed: Optional[int] = None
+) -> StepResult:
+    """Release requests at ``rate`` per second for ``duration`` seconds.
+
+    The schedule never waits on outstanding requests; if ``max_in_flight`` is
+    reached the arrival is counted as shed instead of being delayed.
+    """
+    loop = asyncio.get_running_loop()
+    rng = random.Random(seed)
+    result = StepResult(offered_rate=rate, duration=duration)
+    in_flight = set()
+
+    async def fire(intended: float) -> None:
+        sent_at = loop.time()
+        try:
+            await operation()
+        except Exception as e:
+            result.errors += 1
+            name = type(e).__name__
+            result.error_types[name] = result.error_types.get(name, 0) + 1
+        else:
+            done = loop.time()
+            result.completed += 1
+            result.corrected.record(done - intended)
+            result.service.record(done - sent_at)
+
+    start = loop.time()
+    end = start + duration
+    intended = start
+    for gap in arrival_intervals(rate, arrival, rng):
+        intended += gap
+        if intended >= end:
+            break
+        delay = intended - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if len(in_flight) >= max_in_flight:
+            result.shed += 1
+            continue
+        task = asyncio.create_task(fire(intended))
+        in_flight.add(task)
+        task.add_done_callback(in_flight.discard)
+        result.sent += 1
+        result.max_in_flight = max(result.max_in_flight, len(in_flight))
+
+    if in_flight:
+        done, pending = await asyncio.wait(set(in_flight), timeout=drain_timeout)
+        for task in pending:
+            task.cancel()
+            result.errors += 1
+            result.error_types["DrainTimeout"] = result.error_types.get("DrainTimeout", 0) + 1
+    result.wall_time = loop.time() - start
+    return result
+
+
+def find_saturation(
+    steps: List[StepResult],
+    max_error_rate: float,
+    slo_p99_ms: Optional[float],
+    throughput_ratio: float = 0.9,
+    latency_growth: float = 3.0
+) -> Dict[str, Any]:
+    """Locate the first offered rate the system could not sustain
+
+    Besides throughput, errors and the latency SLO, a step counts as saturated
+    when its p99 grew past ``latency_growth`` times the p99 of the first step:
+    requests that queue up still complete, but later and later.
+    """
+    sustainable = None
+    baseline_p99 = steps[0].corrected.value_at_percentile(99) if steps and steps[0].completed else 0.0
+    for step in steps:
+        reasons = []
+        if step.achieved_rate < throughput_ratio * step.offered_rate:
+            reasons.append("throughput")
+        if step.error_rate > max_error_rate:
+            reasons.append("errors")
+        if slo_p99_ms is not None and step.corrected.value_at_percentile(99) > slo_p99_ms:
+            reasons.append("latency")
+        if latency_growth and baseline_p99 and step.corrected.value_at_percentile(99) > latency_growth * baseline_p99:
+            reasons.append("latency_growth")
+        if reasons:
+            return {
+                "saturated_at_rate": step.offered_rate,
+                "reasons": reasons,
+                "max_sustainable_rate": sustainable
+            }
+        sustainable = step.offered_rate
+    return {"saturated_at_rate": None, "reasons": [], "max_sustainable_rate": sustainable}
+
+
+def size_replicas(saturation: Dict[str, Any], target_rate: Optional[float], headroom: float) -> Optional[Dict[str, Any]]:
+    """Replica count needed to serve ``target_rate`` with ``headroom`` spare capacity"""
+    sustainable = saturation.get("max_sustainable_rate")
+    if not target_rate or not sustainable:
+        return None
+    per_replica = sustainable * (1.0 - headroom)
+    return {
+        "target_rate": target_rate,
+        "per_replica_rate": round(per_replica, 3),
+        "headroom": headroom,
+        "replicas": max(1, math.ceil(target_rate / per_replica))
+    }
+
+
+def parse_agent_urls(spec: Optional[str]) -> Dict[str, str]:
+    """Parse ``name=url,name=url`` overrides, falling back to discover_agent_url"""
+    urls = {name: discover_agent_url(name) for name in AGENT_NAMES}
+    if spec:
+        for item in spec.split(","):
+            name, _, url = item.partition("=")
+            urls[name.strip()] = url.strip()
+    return urls
+
+
+async def build_operation(
+    client: httpx.AsyncClient,
+    target: str,
+    agent_urls: Dict[str, str],
+    payload: Optional[Dict[str, Any]],
+    wire_format: str = "json",
+    structured_report: bool = False
+) -> Callable[[], Awaitable[Any]]:
+    """Discover the agents once and return a zero-argument request coroutine factory
+
+    Requests are sent once, without the client's retries: a retry would add
+    load on top of the offered rate and hide the failure from the error count.
+    """
+    if target == "workflow":
+        agents = {}
+        for name in AGENT_NAMES:
+            agents[name] = A2AClient(agent_urls[name], wire_format=wire_format)
+            await agents[name].discover_agent(client)
+        patient_data = payload or DEFAULT_PATIENT_DATA
+        return lambda: run_workflow(client, agents, patient_data, structured_report=structured_report, retries=0)
+
+    kind, _, rest = target.partition(":")
+    agent_name, _, skill_id = rest.partition(":")
+    if kind != "skill" or not agent_name or not skill_id:
+        raise ValueError(f"Unknown target '{target}' - use 'workflow' or 'skill:<agent>:<skill-id>'")
+
+    agent = A2AClient(agent_urls.get(agent_name, discover_agent_url(agent_name)), wire_format=wire_format)
+    await agent.discover_agent(client)
+    skill = agent.find_skill(skill_id)
+    if not skill:
+        raise ValueError(f"Skill '{skill_id}' not found on {agent_name}")
+    if payload is None:
+        examples = skill.get("examples", [])
+        if not examples:
+            raise ValueError(f"Skill '{skill_id}' has no example input; pass --payload")
+        payload = examples[0]["input"]
+    return lambda: agent.invoke_skill(client, skill_id, payload, retries=0)
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    print(f"\n📈 Load test: {report['target']} ({report['arrival']} arrivals)")
+    print(f"   {'rate':>8} {'achieved':>9} {'err%':>6} {'p50 ms':>9} {'p99 ms':>9} {'p99.9 ms':>9} {'max ms':>9} {'inflight':>8}")
+    for step in report["steps"]:
+        lat = step["latency_corrected"]
+        print(
+            f"   {step['offered_rate']:>8.2f} {step['achieved_rate']:>9.2f} {step['error_rate'] * 100:>6.2f}"
+            f" {lat['p50_ms']:>9.1f} {lat['p99_ms']:>9.1f} {lat['p99_9_ms']:>9.1f} {lat['max_ms']:>9.1f}"
+            f" {step['max_in_flight']:>8}"
+        )
+    saturation = report["saturation"]
+    if saturation["saturated_at_rate"] is not None:
+        print(f"\n   Saturated at {saturation['saturated_at_rate']} req/s ({', '.join(saturation['reasons'])})")
+    else:
+        print("\n   No saturation observed in the tested range")
+    print(f"   Max sustainable rate: {saturation['max_sustainable_rate']} req/s")
+    sizing = report.get("replica_sizing")
+    if sizing:
+        print(f"   Replicas for {sizing['target_rate']} req/s: {sizing['replicas']} "
+              f"({sizing['per_replica_rate']} req/s each at {int(sizing['headroom'] * 100)}% headroom)")
+
+
+async def run_load_test(args: argparse.Namespace) -> Dict[str, Any]:
+    payload = None
+    if args.payload:
+        with open(args.payload) as f:
+            payload = json.load(f)
+
+    rates = [float(r) for r in args.rates.split(",")]
+    limits = httpx.Limits(max_connections=args.max_connections, max_keepalive_connections=args.max_connections)
+    async with httpx.AsyncClient(limits=limits) as client:
+        operation = await build_operation(
+            client, args.target, parse_agent_urls(args.agents), payload,
+            wire_format=args.wire_format, structured_report=args.structured_report
+        )
+        steps = []
+        for rate in rates:
+            logger.info("Offering %.2f req/s for %ss", rate, args.duration)
+            step = await run_step(
+                operation,
+                rate,
+                args.duration,
+                arrival=args.arrival,
+                max_in_flight=args.max_in_flight,
+                drain_timeout=args.drain_timeout,
+                seed=args.seed
+            )
+            steps.append(step)
+            if args.cooldown:
+                await asyncio.sleep(args.cooldown)
+
+    saturation = find_saturation(steps, args.max_error_rate, args.slo_p99_ms, latency_growth=args.latency_growth)
+    report = {
+        "target": args.target,
+        "arrival": args.arrival,
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "steps": [step.to_dict() for step in steps],
+        "saturation": saturation,
+        "replica_sizing": size_replicas(saturation, args.replica_target_rate, args.headroom)
+    }
+    if args.histogram:
+        report["histograms"] = [
+            {"offered_rate": step.offered_rate, "distribution": step.corrected.percentile_distribution()}
+            for step in steps
+        ]
+    return report
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Open-loop load generator for the A2A agents")
+    parser.add_argument("--target", default="workflow",
+                        help="'workflow' or 'skill:<agent-name>:<skill-id>'")
+    parser.add_argument("--agents", help="Agent URL overrides, e.g. diagnostics-agent=http://10.0.0.5:8001,...")
+    parser.add_argument("--payload", help="JSON file with workflow patient_data or skill params")
+    parser.add_argument("--wire-format", choices=["json", "msgpack"], default="json")
+    parser.add_argument("--structured-report", action="store_true",
+                        help="Pass the report between agents as an object instead of a JSON string")
+    parser.add_argument("--arrival", choices=["constant", "poisson"], default="poisson")
+    parser.add_argument("--rates", default="1", help="Comma separated arrival rates (req/s) to step through")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds per rate step")
+    parser.add_argument("--cooldown", type=float, default=5.0, help="Idle seconds between steps")
+    parser.add_argument("--max-in-flight", type=int, default=10000)
+    parser.add_argument("--max-connections", type=int, default=1000)
+    parser.add_argument("--drain-timeout", type=float, default=300.0)
+    parser.add_argument("--max-error-rate", type=float, default=0.01)
+    parser.add_argument("--slo-p99-ms", type=float, help="p99 latency objective used to detect saturation")
+    parser.add_argument("--latency-growth", type=float, default=3.0,
+                        help="Saturated once p99 exceeds this multiple of the first step's p99 (0 disables)")
+    parser.add_argument("--replica-target-rate", type=float, help="Production rate to size replicas for")
+    parser.add_argument("--headroom", type=float, default=0.3, help="Spare capacity kept per replica (0-1)")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--histogram", action="store_true", help="Include full percentile distributions")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    report = asyncio.run(run_load_test(args))
+    print_report(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"   Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
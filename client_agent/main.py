@@ -8,35 +8,61 @@ GitHub: https://github.com/SinghSuryaDeep
 
 import asyncio
 import logging
+import os
+import sys
 from uuid import uuid4
 import httpx
 from typing import Any, Optional, Dict
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common import wire
+from common.compression import accept_encoding_header
+from common.idempotency import IDEMPOTENCY_HEADER, REPLAYED_HEADER
+from common.jsonrpc import JsonRpcError
+from common.logs import CONVERSATION_HEADER, conversation_id_var, log_context, setup_logging
+from common.transport import LocalAgent, get_local_agent
 
 # Setup logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-)
+setup_logging("client-agent")
 logger = logging.getLogger(__name__)
 
+# Timeouts, dropped connections and these statuses are retried with the same
+# JSON-RPC id, so the agent replays the stored result instead of re-running the skill
+RETRY_STATUSES = (502, 503, 504)
+MAX_RETRIES = int(os.getenv("A2A_CLIENT_RETRIES", "2"))
+RETRY_BACKOFF = float(os.getenv("A2A_CLIENT_RETRY_BACKOFF", "1.0"))
+
 class A2AClient:
     """A2A Protocol Compliant Client"""
     
-    def __init__(self, base_url: str):
+    def __init__(self, base_url: str, wire_format: str = "json"):
         self.base_url = base_url.rstrip('/')
         self.agent_card = None
+        self.local_agent: Optional[LocalAgent] = None
+        # "json" or "msgpack"; servers fall back to JSON if they cannot produce msgpack
+        self.media_type = wire.MEDIA_MSGPACK if wire_format == "msgpack" else wire.MEDIA_JSON
+    
+    @property
+    def transport(self) -> str:
+        return "in-process" if self.local_agent else "http"
         
     async def discover_agent(self, client: httpx.AsyncClient) -> Dict[str, Any]:
         """Discover agent capabilities via A2A agent card"""
+        # Co-located agents are called directly, without HTTP or JSON
+        self.local_agent = get_local_agent(self.base_url)
+        if self.local_agent:
+            self.agent_card = self.local_agent.agent_card
+            logger.info("Discovered co-located agent: %s (in-process)", self.agent_card['metadata']['name'])
+            return self.agent_card
+        
         agent_card_url = f"{self.base_url}/.well-known/agent.json"
-        logger.info(f"Discovering agent at: {agent_card_url}")
+        logger.info("Discovering agent at: %s", agent_card_url)
         
-        response = await client.get(agent_card_url)
+        response = await client.get(agent_card_url, headers={"Accept-Encoding": accept_encoding_header()})
         response.raise_for_status()
         
         self.agent_card = response.json()
-        logger.info(f"Discovered agent: {self.agent_card['metadata']['name']}")
-        logger.info(f"Protocol version: {self.agent_card.get('apiVersion', 'Unknown')}")
+        logger.info("Discovered agent: %s", self.agent_card['metadata']['name'])
+        logger.info("Protocol version: %s", self.agent_card.get('apiVersion', 'Unknown'))
         
         return self.agent_card
     
@@ -50,12 +76,26 @@ class A2AClient:
                 return skill
         return None
     
-    async def invoke_skill(self, client: httpx.AsyncClient, skill_id: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    async def invoke_skill(
+        self,
+        client: httpx.AsyncClient,
+        skill_id: str,
+        params: Dict[str, Any],
+        idempotency_key: Optional[str] = None,
+        retries: int = MAX_RETRIES
+    ) -> Dict[str, Any]:
         """Invoke a skill using A2A JSON-RPC 2.0 protocol"""
         skill = self.find_skill(skill_id)
         if not skill:
             raise ValueError(f"Skill '{skill_id}' not found")
         
+        if self.local_agent:
+            logger.info("Invoking skill '%s' in-process on %s", skill_id, self.local_agent.agent_id)
+            try:
+                return await self.local_agent.invoke(skill_id, params)
+            except JsonRpcError as e:
+                raise Exception(f"Skill invocation failed: {e.message} (Code: {e.code})") from e
+        
         # Build endpoint URL
         agent_url = self.agent_card.get("spec", {}).get("url", self.base_url)
         endpoint = skill["invocation"]["endpoint"]
@@ -69,19 +109,39 @@ class A2AClient:
             "id": str(uuid4())
         }
         
-        logger.info(f"Invoking skill '{skill_id}' at {full_url}")
-        logger.debug(f"Request payload: {request_payload}")
+        headers = {
+            "Content-Type": self.media_type,
+            "Accept": self.media_type,
+            "Accept-Encoding": accept_encoding_header()
+        }
+        if idempotency_key:
+            headers[IDEMPOTENCY_HEADER] = idempotency_key
+        if conversation_id_var.get() is not None:
+            headers[CONVERSATION_HEADER] = str(conversation_id_var.get())
+        body = wire.encode(request_payload, self.media_type)
         
-        # Send request
-        response = await client.post(
-            full_url, 
-            json=request_payload,
-            headers={"Content-Type": "application/json"},
-            timeout=120
-        )
+        logger.info("Invoking skill '%s' at %s", skill_id, full_url)
+        logger.debug("Request payload: %s", request_payload)
         
+        # Send request; retries reuse the payload and its id
+        for attempt in range(retries + 1):
+            try:
+                response = await client.post(full_url, content=body, headers=headers, timeout=120)
+                if response.status_code not in RETRY_STATUSES or attempt == retries:
+                    break
+                reason = f"HTTP {response.status_code}"
+            except (httpx.TimeoutException, httpx.TransportError) as e:
+                if attempt == retries:
+                    raise
+                reason = type(e).__name__
+            delay = RETRY_BACKOFF * 2 ** attempt
+            logger.warning("Skill '%s' attempt %d failed (%s); retrying in %.1fs", skill_id, attempt + 1, reason, delay)
+            await asyncio.sleep(delay)
+        
+        if response.headers.get(REPLAYED_HEADER):
+            logger.info("Skill '%s' result replayed by the agent", skill_id)
         response.raise_for_status()
-        response_data = response.json()
+        response_data = wire.decode(response.content, response.headers.get("Content-Type"))
         
         # Validate JSON-RPC 2.0 response
         if "jsonrpc" not in response_data or response_data["jsonrpc"] != "2.0":
@@ -102,52 +162,76 @@ def discover_agent_url(agent_name: str) -> str:
     }
     return agent_urls.get(agent_name, f"http://127.0.0.1:8001")
 
+async def run_workflow(
+    client: httpx.AsyncClient,
+    agents: Dict[str, A2AClient],
+    patient_data: Dict[str, Any],
+    structured_report: bool = False,
+    retries: int = MAX_RETRIES
+) -> Dict[str, Any]:
+    """Run diagnostics -> report -> admin against already discovered agents
+
+    With ``structured_report`` the report travels to the admin agent as an
+    object instead of an embedded JSON string. ``retries`` applies to each call.
+    """
+    diag_params = {"patient_data": patient_data}
+    diag_result = await agents["diagnostics-agent"].invoke_skill(client, "analyze-patient-data", diag_params,
+                                                                 retries=retries)
+    diagnosis = diag_result.get("diagnosis", {})
+
+    report_params = {"diagnosis": diagnosis}
+    if structured_report:
+        report_params["report_format"] = "object"
+    report_result = await agents["report-agent"].invoke_skill(client, "generate-report", report_params,
+                                                              retries=retries)
+    report = report_result.get("report", "")
+
+    admin_params = {"report": report}
+    admin_result = await agents["admin-agent"].invoke_skill(client, "schedule-followup", admin_params,
+                                                            retries=retries)
+    appointment_info = admin_result.get("appointment_info", {})
+
+    return {
+        "diagnosis": diagnosis,
+        "report": report,
+        "appointment_info": appointment_info
+    }
+
 async def main():
     """A2A Protocol Multi-Agent Workflow"""
+    conversation_id = str(uuid4())
+    # Sent to every agent, so their log records can be joined with ours
+    with log_context(conversation_id=conversation_id):
+        await _run_main(conversation_id)
+
+async def _run_main(conversation_id: str):
     async with httpx.AsyncClient() as client:
         try:
-            conversation_id = str(uuid4())
-            logger.info(f"Starting A2A workflow with conversation ID: {conversation_id}")
+            logger.info("Starting A2A workflow with conversation ID: %s", conversation_id)
+
+            agents = {}
+            for agent_name in ("diagnostics-agent", "report-agent", "admin-agent"):
+                agents[agent_name] = A2AClient(discover_agent_url(agent_name))
+                await agents[agent_name].discover_agent(client)
 
-            # Step 1: Diagnostics Agent
-            logger.info("Step 1: Invoking Diagnostics Agent")
-            diag_client = A2AClient(discover_agent_url("diagnostics-agent"))
-            await diag_client.discover_agent(client)
-            
             patient_data = {
                 "symptoms": ["headache", "dizziness", "chest pain"],
                 "vitals": {"bp": "150/95", "pulse": 90, "temperature": "99.2 F"}
             }
-            
-            diag_params = {"patient_data": patient_data}
-            diag_result = await diag_client.invoke_skill(client, "analyze-patient-data", diag_params)
-            diagnosis = diag_result.get("diagnosis", {})
-            
+
+            logger.info("Running diagnostics -> report -> admin workflow")
+            workflow_result = await run_workflow(client, agents, patient_data)
+            diagnosis = workflow_result["diagnosis"]
+            report = workflow_result["report"]
+            appointment_info = workflow_result["appointment_info"]
+
             print(f"\n🩺 [Diagnostics] Result:")
             print(f"   • Condition: {diagnosis.get('condition', 'N/A')}")
             print(f"   • Risk Level: {diagnosis.get('risk', 'N/A')}")
 
-            # Step 2: Report Agent
-            logger.info("Step 2: Invoking Report Agent")
-            report_client = A2AClient(discover_agent_url("report-agent"))
-            await report_client.discover_agent(client)
-            
-            report_params = {"diagnosis": diagnosis}
-            report_result = await report_client.invoke_skill(client, "generate-report", report_params)
-            report = report_result.get("report", "")
-            
             print(f"\n📄 [Report] Generated:")
             print(f"   {report}")
 
-            # Step 3: Admin Agent
-            logger.info("Step 3: Invoking Admin Agent")
-            admin_client = A2AClient(discover_agent_url("admin-agent"))
-            await admin_client.discover_agent(client)
-            
-            admin_params = {"report": report}
-            admin_result = await admin_client.invoke_skill(client, "schedule-followup", admin_params)
-            appointment_info = admin_result.get("appointment_info", {})
-            
             print(f"\n📅 [Admin] Appointment Scheduled:")
             print(f"   • Date: {appointment_info.get('appointment', 'N/A')}")
             print(f"   • Link: {appointment_info.get('link', 'N/A')}")
@@ -156,14 +240,14 @@ async def main():
             print(f"   Conversation ID: {conversation_id}")
 
         except httpx.HTTPStatusError as e:
-            logger.error(f"❌ HTTP Error: {e.response.status_code}")
+            logger.error("❌ HTTP Error: %s", e.response.status_code)
             try:
                 error_details = e.response.json()
-                logger.error(f"Error details: {error_details}")
+                logger.error("Error details: %s", error_details)
             except:
-                logger.error(f"Error response: {e.response.text}")
+                logger.error("Error response: %s", e.response.text)
         except Exception as e:
-            logger.exception(f"❌ Unexpected error: {e}")
+            logger.exception("❌ Unexpected error: %s", e)
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
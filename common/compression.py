@@ -0,0 +1,169 @@
+"""
+Author: SURYA DEEP SINGH
+LinkedIn: https://www.linkedin.com/in/surya-deep-singh-b9b94813a/
+Medium: https://medium.com/@SuryaDeepSingh
+GitHub: https://github.com/SinghSuryaDeep
+"""
+# common/compression.py
+#
+# Accept-Encoding negotiation for the agent servers: gzip always, zstd when
+# the zstandard package is installed. Bodies smaller than the threshold are
+# sent as-is because compressing them costs more than it saves. Static
+# documents such as agent cards are compressed once at startup. Streamed
+# bodies (NDJSON batches) are compressed as they are produced, with a flush
+# after every chunk so each line reaches the client as soon as it is ready.
+
+import gzip
+import os
+import zlib
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+from flask import Flask, Response, request
+
+from common.wire import MEDIA_JSON, dumps_json
+
+try:
+    import zstandard
+except ImportError:  # optional, gzip is always available
+    zstandard = None
+
+DEFAULT_MIN_SIZE = int(os.getenv("A2A_COMPRESS_MIN_BYTES", "1024"))
+GZIP_LEVEL = int(os.getenv("A2A_GZIP_LEVEL", "6"))
+ZSTD_LEVEL = int(os.getenv("A2A_ZSTD_LEVEL", "3"))
+
+
+def supported_encodings() -> tuple:
+    """Encodings in server preference order"""
+    if zstandard is not None:
+        return ("zstd", "gzip")
+    return ("gzip",)
+
+
+def accept_encoding_header() -> str:
+    """Accept-Encoding value for clients of the agents"""
+    return ", ".join(supported_encodings())
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    return gzip.compress(data, compresslevel=GZIP_LEVEL)
+
+
+class _GzipStream:
+    def __init__(self):
+        # wbits 31: gzip container
+        self._compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, chunk: bytes) -> bytes:
+        return self._compressor.compress(chunk) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+class _ZstdStream:
+    def __init__(self):
+        self._compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+
+    def compress(self, chunk: bytes) -> bytes:
+        return self._compressor.compress(chunk) + self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+def compress_stream(chunks: Iterable[bytes], encoding: str) -> Iterator[bytes]:
+    """Compress ``chunks`` as they come, flushing after each so nothing waits for the next one"""
+    stream = _ZstdStream() if encoding == "zstd" else _GzipStream()
+    try:
+        for chunk in chunks:
+            if chunk:
+                yield stream.compress(chunk)
+        yield stream.finish()
+    finally:
+        close = getattr(chunks, "close", None)
+        if close is not None:
+            close()
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Best supported encoding for an Accept-Encoding header, or None for identity"""
+    if not accept_encoding:
+        return None
+    qualities: Dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        parts = [p.strip() for p in item.split(";")]
+        coding = parts[0].lower()
+        q = 1.0
+        for param in parts[1:]:
+            if param.startswith("q="):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        if coding:
+            qualities[coding] = q
+    best, best_q = None, 0.0
+    for coding in supported_encodings():
+        q = qualities.get(coding, qualities.get("*", 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+class PrecompressedDocument:
+    """A static JSON document encoded and compressed once, served per Accept-Encoding"""
+
+    def __init__(self, obj: Any, min_size: int = DEFAULT_MIN_SIZE):
+        self.body = dumps_json(obj)
+        self.variants: Dict[str, bytes] = {}
+        if len(self.body) >= min_size:
+            for encoding in supported_encodings():
+                compressed = compress(self.body, encoding)
+                if len(compressed) < len(self.body):
+                    self.variants[encoding] = compressed
+
+    def response(self) -> Response:
+        encoding = negotiate_encoding(request.headers.get("Accept-Encoding"))
+        if encoding in self.variants:
+            response = Response(self.variants[encoding], mimetype=MEDIA_JSON)
+            response.headers["Content-Encoding"] = encoding
+        else:
+            response = Response(self.body, mimetype=MEDIA_JSON)
+        if self.variants:
+            response.vary.add("Accept-Encoding")
+        return response
+
+
+def init_compression(app: Flask, min_size: int = DEFAULT_MIN_SIZE) -> None:
+    """Compress eligible responses of ``app`` according to Accept-Encoding"""
+
+    @app.after_request
+    def compress_response(response: Response) -> Response:
+        if (
+            response.status_code < 200
+            or response.status_code in (204, 304)
+            or response.direct_passthrough
+            or "Content-Encoding" in response.headers
+        ):
+            return response
+        if response.is_streamed:
+            # The size is unknown up front, so streams are always compressed when the client accepts it
+            response.vary.add("Accept-Encoding")
+            encoding = negotiate_encoding(request.headers.get("Accept-Encoding"))
+            if encoding is not None:
+                response.response = compress_stream(response.response, encoding)
+                response.headers["Content-Encoding"] = encoding
+                response.headers.pop("Content-Length", None)
+            return response
+        data = response.get_data()
+        if len(data) < min_size:
+            return response
+        response.vary.add("Accept-Encoding")
+        encoding = negotiate_encoding(request.headers.get("Accept-Encoding"))
+        if encoding is None:
+            return response
+        response.set_data(compress(data, encoding))
+        response.headers["Content-Encoding"] = encoding
+        return response
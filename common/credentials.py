@@ -0,0 +1,196 @@
+"""
+Author: SURYA DEEP SINGH
+LinkedIn: https://www.linkedin.com/in/surya-deep-singh-b9b94813a/
+Medium: https://medium.com/@SuryaDeepSingh
+GitHub: https://github.com/SinghSuryaDeep
+"""
+# common/credentials.py
+#
+# IBM Cloud IAM bearer tokens shared by every agent process on a host. The
+# broker exchanges WATSONX_APIKEY for a token once and keeps it in a cache
+# file (A2A_TOKEN_CACHE). Other workers and agents read the token from that
+# file instead of calling IAM themselves. A background thread refreshes the
+# token A2A_TOKEN_REFRESH_MARGIN seconds before it expires. The refresh runs
+# under an exclusive file lock, so only one process on the host talks to
+# IAM; the rest pick up the new token from the file.
+#
+# The watsonx clients of all three frameworks are built with the token rather
+# than the API key. Each logic module compares broker.token() with the token
+# its client was built with and rebuilds the client after a refresh.
+# Set A2A_TOKEN_BROKER=0 to go back to per-client API key authentication.
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+import httpx
+
+try:
+    import fcntl
+except ImportError:  # Windows: no file locking, each process refreshes on its own
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_IAM_URL = "https://iam.cloud.ibm.com/identity/token"
+# Wait after a failed background refresh before trying again
+RETRY_INTERVAL = 30.0
+
+
+def _default_cache_path(apikey: str) -> str:
+    # One cache per API key, never named after the key itself
+    digest = hashlib.sha256(apikey.encode()).hexdigest()[:16]
+    return os.path.join(tempfile.gettempdir(), f"a2a-iam-{os.getuid() if hasattr(os, 'getuid') else 0}-{digest}.json")
+
+
+class TokenBroker:
+    """Keeps a valid IAM token for one API key, shared through a cache file"""
+
+    def __init__(self, apikey: str, iam_url: str = DEFAULT_IAM_URL, cache_path: Optional[str] = None,
+                 refresh_margin: float = 300.0):
+        self.apikey = apikey
+        self.iam_url = iam_url
+        self.cache_path = cache_path or _default_cache_path(apikey)
+        self.refresh_margin = refresh_margin
+        self._token: Optional[Dict] = None
+        self._lock = threading.Lock()
+        self._refresher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def _fresh(self, token: Optional[Dict]) -> bool:
+        return token is not None and token["expiration"] - self.refresh_margin > time.time()
+
+    @contextmanager
+    def _file_lock(self):
+        if fcntl is None:
+            yield
+            return
+        with open(self.cache_path + ".lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _read_cache(self) -> Optional[Dict]:
+        try:
+            with open(self.cache_path) as f:
+                token = json.load(f)
+            return token if isinstance(token, dict) and "access_token" in token else None
+        except (OSError, ValueError):
+            return None
+
+    def _write_cache(self, token: Dict) -> None:
+        directory = os.path.dirname(self.cache_path) or "."
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".a2a-iam-")
+        try:
+            if hasattr(os, "fchmod"):
+                os.fchmod(fd, 0o600)
+            with os.fdopen(fd, "w") as f:
+                json.dump(token, f)
+            os.replace(tmp_path, self.cache_path)
+        except OSError:
+            logger.warning("Could not write IAM token cache %s", self.cache_path)
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+    def _request_token(self) -> Dict:
+        response = httpx.post(
+            self.iam_url,
+            data={"grant_type": "urn:ibm:params:oauth:grant-type:apikey", "apikey": self.apikey},
+            headers={"Accept": "application/json"},
+            timeout=30
+        )
+        response.raise_for_status()
+        body = response.json()
+        expiration = body.get("expiration") or time.time() + body.get("expires_in", 3600)
+        logger.info("Fetched IAM token (pid %s), expires in %ds", os.getpid(), expiration - time.time())
+        return {"access_token": body["access_token"], "expiration": float(expiration)}
+
+    def _refresh(self) -> Dict:
+        """Take the cached token if another process refreshed it, otherwise ask IAM"""
+        with self._file_lock():
+            token = self._read_cache()
+            if not self._fresh(token):
+                token = self._request_token()
+                self._write_cache(token)
+        return token
+
+    def token(self) -> str:
+        """A bearer token valid for at least the refresh margin"""
+        with self._lock:
+            if not self._fresh(self._token):
+                cached = self._read_cache()
+                self._token = cached if self._fresh(cached) else self._refresh()
+            self._start_refresher()
+            return self._token["access_token"]
+
+    def _start_refresher(self) -> None:
+        if self._refresher is None or not self._refresher.is_alive():
+            self._refresher = threading.Thread(target=self._refresh_loop, name="iam-token-refresher", daemon=True)
+            self._refresher.start()
+
+    def _refresh_loop(self) -> None:
+        while True:
+            with self._lock:
+                expiration = self._token["expiration"] if self._token else 0.0
+            delay = max(1.0, expiration - self.refresh_margin - time.time())
+            if self._stop.wait(delay):
+                return
+            try:
+                token = self._refresh()
+                with self._lock:
+                    self._token = token
+            except Exception as e:
+                logger.warning("Background IAM token refresh failed: %s", e)
+                if self._stop.wait(RETRY_INTERVAL):
+                    return
+
+    def stop(self) -> None:
+        self._stop.set()
+
+
+_broker_lock = threading.Lock()
+_broker: Optional[TokenBroker] = None
+
+
+def get_token_broker() -> Optional[TokenBroker]:
+    """The process-wide broker for WATSONX_APIKEY, or None when disabled or unconfigured"""
+    global _broker
+    # Read at first use so settings loaded from .env by the logic modules apply
+    apikey = os.getenv("WATSONX_APIKEY")
+    if os.getenv("A2A_TOKEN_BROKER", "1") != "1" or not apikey:
+        return None
+    with _broker_lock:
+        if _broker is None:
+            _broker = TokenBroker(
+                apikey,
+                iam_url=os.getenv("WATSONX_IAM_URL", DEFAULT_IAM_URL),
+                cache_path=os.getenv("A2A_TOKEN_CACHE"),
+                refresh_margin=float(os.getenv("A2A_TOKEN_REFRESH_MARGIN", "300"))
+            )
+    return _broker
+
+
+def current_token() -> Optional[str]:
+    broker = get_token_broker()
+    return broker.token() if broker else None
+
+
+def _reset_after_fork() -> None:
+    # The refresher thread does not survive a fork; workers read the shared cache file
+    global _broker_lock, _broker
+    _broker_lock = threading.Lock()
+    _broker = None
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
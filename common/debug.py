@@ -0,0 +1,43 @@
+"""
+Author: SURYA DEEP SINGH
+LinkedIn: https://www.linkedin.com/in/surya-deep-singh-b9b94813a/
+Medium: https://medium.com/@SuryaDeepSingh
+GitHub: https://github.com/SinghSuryaDeep
+"""
+# common/debug.py
+#
+# Access control for the /debug/* endpoints. A request must carry
+# A2A_DEBUG_SECRET in the X-A2A-Debug header. Without a secret the endpoints
+# are closed, unless A2A_DEBUG_OPEN=1 opens them to everyone, which is only
+# appropriate on a loopback-bound development server.
+
+import hmac
+import os
+from functools import wraps
+from typing import Optional
+
+from flask import jsonify, request
+
+DEBUG_SECRET = os.getenv("A2A_DEBUG_SECRET")
+DEBUG_OPEN = os.getenv("A2A_DEBUG_OPEN", "0") == "1"
+DEBUG_HEADER = "X-A2A-Debug"
+
+
+def secret_matches(value: Optional[str]) -> bool:
+    return bool(DEBUG_SECRET) and value is not None and hmac.compare_digest(value, DEBUG_SECRET)
+
+
+def debug_authorized() -> bool:
+    if not DEBUG_SECRET:
+        return DEBUG_OPEN
+    return secret_matches(request.headers.get(DEBUG_HEADER))
+
+
+def debug_endpoint(view):
+    """Reject the request with 403 unless debug_authorized()"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not debug_authorized():
+            return jsonify({"error": "Forbidden"}), 403
+        return view(*args, **kwargs)
+    return wrapper
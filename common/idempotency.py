@@ -0,0 +1,286 @@
+"""
+Author: SURYA DEEP SINGH
+LinkedIn: https://www.linkedin.com/in/surya-deep-singh-b9b94813a/
+Medium: https://medium.com/@SuryaDeepSingh
+GitHub: https://github.com/SinghSuryaDeep
+"""
+# common/idempotency.py
+#
+# Idempotent skill calls. A call is identified by
+#   - the Idempotency-Key header, when the client sends one, or
+#   - the JSON-RPC id together with a hash of the params (so clients that
+#     reuse ids such as 1 for different calls are not replayed by mistake).
+# A successful result is kept for A2A_IDEMPOTENCY_TTL seconds and returned
+# again for a retry instead of re-running the skill. A retry that arrives while
+# the first call is still running waits for it and gets the same outcome.
+# Failed calls are not kept, so they can be retried: neither calls that raise
+# nor results that report a failure themselves ({"status": "failed", ...},
+# also inside a batch result).
+#
+#   A2A_IDEMPOTENCY_STORE=memory       – per process (default)
+#   A2A_IDEMPOTENCY_STORE=sqlite:PATH  – shared by all pre-fork workers on a host
+#   A2A_IDEMPOTENCY_STORE=off          – disabled
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional, Tuple
+
+from common.jsonrpc import JsonRpcError
+from common.wire import dumps_canonical, dumps_json, loads_json
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+STORE_SPEC = os.getenv("A2A_IDEMPOTENCY_STORE", "memory")
+TTL = float(os.getenv("A2A_IDEMPOTENCY_TTL", "3600"))
+MAX_ENTRIES = int(os.getenv("A2A_IDEMPOTENCY_MAX_ENTRIES", "1000"))
+# How long a retry waits for the call it attached to
+WAIT_TIMEOUT = float(os.getenv("A2A_IDEMPOTENCY_WAIT", "300"))
+POLL_INTERVAL = 0.2
+
+
+def fingerprint(skill_id: str, params: Any) -> str:
+    # Key order is not part of a request's meaning
+    return hashlib.sha256(skill_id.encode() + b"\0" + dumps_canonical(params)).hexdigest()
+
+
+def reports_failure(result: Any) -> bool:
+    """True when ``result`` or one of its items carries ``"status": "failed"``"""
+    if isinstance(result, dict):
+        return result.get("status") == "failed" or any(
+            reports_failure(value) for value in result.values() if isinstance(value, (dict, list)))
+    if isinstance(result, list):
+        return any(reports_failure(item) for item in result)
+    return False
+
+
+def idempotency_key(skill_id: str, explicit_key: Optional[str], request_id: Any,
+                    params_hash: str) -> Optional[str]:
+    if explicit_key:
+        return f"{skill_id}:key:{explicit_key}"
+    if request_id is None:
+        return None
+    return f"{skill_id}:id:{request_id}:{params_hash}"
+
+
+class MemoryBackend:
+    """Bounded TTL map of completed results, local to this process"""
+
+    def __init__(self, ttl: float = TTL, max_entries: int = MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, str, bytes]]" = OrderedDict()
+        self._claimed: set = set()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Tuple[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, params_hash, body = entry
+            if expires < time.time():
+                del self._entries[key]
+                return None
+        return params_hash, loads_json(body)
+
+    def put(self, key: str, params_hash: str, result: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.time() + self.ttl, params_hash, dumps_json(result))
+            self._entries.move_to_end(key)
+            self._claimed.discard(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def claim(self, key: str, params_hash: str) -> bool:
+        """Mark ``key`` as running; False while it runs or has a stored result"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if key in self._claimed or (entry is not None and entry[0] >= time.time()):
+                return False
+            self._claimed.add(key)
+            return True
+
+    def release(self, key: str) -> None:
+        with self._lock:
+            self._claimed.discard(key)
+
+
+class SQLiteBackend:
+    """Completed results and running calls in a SQLite file shared by local worker processes"""
+
+    def __init__(self, path: str, ttl: float = TTL, max_entries: int = MAX_ENTRIES,
+                 lease: float = WAIT_TIMEOUT):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.lease = lease
+        self._local = threading.local()
+        with self._connect() as db:
+            db.execute("""CREATE TABLE IF NOT EXISTS results (
+                key TEXT PRIMARY KEY, params_hash TEXT NOT NULL, status TEXT NOT NULL,
+                body BLOB, expires REAL NOT NULL)""")
+            db.execute("CREATE INDEX IF NOT EXISTS results_expires ON results (expires)")
+
+    def _connect(self) -> sqlite3.Connection:
+        # One connection per thread and process; connections must not cross a fork
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def get(self, key: str) -> Optional[Tuple[str, Any]]:
+        row = self._connect().execute(
+            "SELECT params_hash, body FROM results WHERE key = ? AND status = 'done' AND expires >= ?",
+            (key, time.time())
+        ).fetchone()
+        return (row[0], loads_json(row[1])) if row else None
+
+    def put(self, key: str, params_hash: str, result: Any) -> None:
+        db = self._connect()
+        now = time.time()
+        db.execute("INSERT OR REPLACE INTO results VALUES (?, ?, 'done', ?, ?)",
+                   (key, params_hash, dumps_json(result), now + self.ttl))
+        db.execute("DELETE FROM results WHERE expires < ?", (now,))
+        db.execute("""DELETE FROM results WHERE key IN (
+            SELECT key FROM results WHERE status = 'done' ORDER BY expires DESC LIMIT -1 OFFSET ?)""",
+                   (self.max_entries,))
+
+    def claim(self, key: str, params_hash: str) -> bool:
+        """Mark ``key`` as running; False while another worker runs it"""
+        db = self._connect()
+        now = time.time()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            db.execute("DELETE FROM results WHERE key = ? AND expires < ?", (key, now))
+            cursor = db.execute("INSERT OR IGNORE INTO results VALUES (?, ?, 'running', NULL, ?)",
+                                (key, params_hash, now + self.lease))
+            db.execute("COMMIT")
+        except Exception:
+            db.execute("ROLLBACK")
+            raise
+        return cursor.rowcount == 1
+
+    def release(self, key: str) -> None:
+        self._connect().execute("DELETE FROM results WHERE key = ? AND status = 'running'", (key,))
+
+
+@dataclass
+class _Execution:
+    params_hash: str
+    done: threading.Event = field(default_factory=threading.Event)
+    result: Any = None
+    error: Optional[BaseException] = None
+
+
+class ResultStore:
+    """Runs each idempotent call once and replays its result to retries"""
+
+    def __init__(self, backend, wait_timeout: float = WAIT_TIMEOUT):
+        self.backend = backend
+        self.wait_timeout = wait_timeout
+        self._running: dict = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _check(params_hash: str, stored_hash: str) -> None:
+        if stored_hash != params_hash:
+            raise JsonRpcError(-32600, f"Invalid Request - {IDEMPOTENCY_HEADER} was already used with different params",
+                               http_status=422)
+
+    def run(self, key: str, params_hash: str, call: Callable[[], Any]) -> Tuple[Any, bool]:
+        """(result, replayed) for the call identified by ``key``"""
+        with self._lock:
+            # Looking up a stored result and registering the call are one step, so
+            # two requests with the same key cannot both miss and both run it
+            execution = self._running.get(key)
+            owner = execution is None
+            if owner:
+                stored = self.backend.get(key)
+                if stored is not None:
+                    self._check(params_hash, stored[0])
+                    return stored[1], True
+                execution = self._running[key] = _Execution(params_hash)
+        if not owner:
+            self._check(params_hash, execution.params_hash)
+            if not execution.done.wait(self.wait_timeout):
+                raise JsonRpcError(-32603, "Internal error - timed out waiting for the original call",
+                                   http_status=504)
+            if execution.error is not None:
+                raise execution.error
+            return execution.result, True
+
+        try:
+            # Another worker process may be running the same call
+            deadline = time.monotonic() + self.wait_timeout
+            while not self.backend.claim(key, params_hash):
+                stored = self.backend.get(key)
+                if stored is not None:
+                    self._check(params_hash, stored[0])
+                    execution.result = stored[1]
+                    return stored[1], True
+                if time.monotonic() > deadline:
+                    raise JsonRpcError(-32603, "Internal error - timed out waiting for the original call",
+                                       http_status=504)
+                time.sleep(POLL_INTERVAL)
+            try:
+                execution.result = call()
+            except BaseException:
+                self.backend.release(key)
+                raise
+            if reports_failure(execution.result):
+                self.backend.release(key)
+            else:
+                self.backend.put(key, params_hash, execution.result)
+            return execution.result, False
+        except BaseException as e:
+            execution.error = e
+            raise
+        finally:
+            with self._lock:
+                self._running.pop(key, None)
+            execution.done.set()
+
+
+def create_result_store(spec: str = STORE_SPEC) -> Optional[ResultStore]:
+    if spec == "off":
+        return None
+    if spec.startswith("sqlite:"):
+        return ResultStore(SQLiteBackend(spec[len("sqlite:"):]))
+    if spec == "memory":
+        return ResultStore(MemoryBackend())
+    raise ValueError(f"Unknown A2A_IDEMPOTENCY_STORE: {spec}")
+
+
+_store_lock = threading.Lock()
+_store: Optional[ResultStore] = None
+_store_created = False
+
+
+def get_result_store() -> Optional[ResultStore]:
+    """The process-wide result store, created on first use"""
+    global _store, _store_created
+    with _store_lock:
+        if not _store_created:
+            _store = create_result_store()
+            _store_created = True
+    return _store
+
+
+def _reset_after_fork() -> None:
+    # Running calls and locks belong to the parent of a pre-fork worker
+    global _store_lock, _store, _store_created
+    _store_lock = threading.Lock()
+    _store = None
+    _store_created = False
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
@@ -0,0 +1,29 @@
+"""
+Author: SURYA DEEP SINGH
+LinkedIn: https://www.linkedin.com/in/surya-deep-singh-b9b94813a/
+Medium: https://medium.com/@SuryaDeepSingh
+GitHub: https://github.com/SinghSuryaDeep
+"""
+# common/jsonrpc.py
+
+from typing import Any, Dict, Optional
+
+
+class JsonRpcError(Exception):
+    """A JSON-RPC 2.0 error raised by a skill handler"""
+
+    def __init__(self, code: int, message: str, data: Any = None, http_status: int = 400):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+        self.data = data
+        self.http_status = http_status
+
+    def to_dict(self) -> Dict[str, Any]:
+        error = {"code": self.code, "message": self.message}
+        if self.data is not None:
+            error["data"] = self.data
+        return error
+
+    def to_response(self, request_id: Optional[Any]) -> Dict[str, Any]:
+        return {"jsonrpc": "2.0", "error": self.to_dict(), "id": request_id}
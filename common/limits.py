@@ -0,0 +1,36 @@
+"""
+Author: SURYA DEEP SINGH
+LinkedIn: https://www.linkedin.com/in/surya-deep-singh-b9b94813a/
+Medium: https://medium.com/@SuryaDeepSingh
+GitHub: https://github.com/SinghSuryaDeep
+"""
+# common/limits.py
+#
+# Bounds on how much conversation state one request may build up:
+#   A2A_MAX_INPUT_TOKENS   – larger skill inputs are rejected up front
+#   A2A_MAX_MEMORY_TOKENS  – token cap for an agent's memory; older messages are dropped
+#   A2A_MAX_MESSAGES       – messages of a conversation kept in the model context
+#                            (diagnostics agent); older ones are not sent again
+#   A2A_MAX_ITERATIONS     – step cap for a ReAct agent run (admin agent)
+# Token counts here are estimates (about four characters per token), which is
+# enough to bound memory without loading a tokenizer.
+
+import json
+import os
+from typing import Any
+
+MAX_INPUT_TOKENS = int(os.getenv("A2A_MAX_INPUT_TOKENS", "2000"))
+MAX_MEMORY_TOKENS = int(os.getenv("A2A_MAX_MEMORY_TOKENS", "4000"))
+MAX_MESSAGES = int(os.getenv("A2A_MAX_MESSAGES", "10"))
+MAX_ITERATIONS = int(os.getenv("A2A_MAX_ITERATIONS", "10"))
+
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(value: Any) -> int:
+    text = value if isinstance(value, str) else json.dumps(value, separators=(",", ":"), default=str)
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def exceeds_input_budget(value: Any, max_tokens: int = MAX_INPUT_TOKENS) -> bool:
+    return estimate_tokens(value) > max_tokens
@@ -0,0 +1,211 @@
+"""
+Author: SURYA DEEP SINGH
+LinkedIn: https://www.linkedin.com/in/surya-deep-singh-b9b94813a/
+Medium: https://medium.com/@SuryaDeepSingh
+GitHub: https://github.com/SinghSuryaDeep
+"""
+# common/logs.py
+#
+# Logging shared by the agents and the client. Records are put on a bounded
+# in-memory queue by the calling thread and formatted and written by a
+# background listener thread, so a request thread never formats a message or
+# waits on stderr. Messages must use %-style arguments
+# (logger.info("Invoking %s", skill_id)): they are only formatted on the
+# listener thread, and not at all when the level is disabled.
+#
+#   A2A_LOG_FORMAT      json (default) or text
+#   A2A_LOG_LEVEL       root level, default INFO
+#   A2A_LOG_SAMPLE      per-logger sampling of records below WARNING,
+#                       e.g. "werkzeug=0.01,client_agent=0.1"
+#   A2A_LOG_QUEUE_SIZE  records buffered before new ones are dropped (10000)
+#
+# Every record carries the agent name, the conversation id (X-A2A-Conversation-Id)
+# and the JSON-RPC id of the request it was logged for, taken from context
+# variables, so they follow the request into asyncio tasks and worker threads.
+# The agent is set per request, so agents sharing one process (agent_host)
+# are told apart; records outside a request carry the process's own label.
+
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+CONVERSATION_HEADER = "X-A2A-Conversation-Id"
+
+conversation_id_var: contextvars.ContextVar = contextvars.ContextVar("conversation_id", default=None)
+jsonrpc_id_var: contextvars.ContextVar = contextvars.ContextVar("jsonrpc_id", default=None)
+agent_var: contextvars.ContextVar = contextvars.ContextVar("agent", default=None)
+
+# Attributes every LogRecord has; anything else came in through ``extra``
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "agent",
+                                                                             "conversation_id", "jsonrpc_id"}
+
+
+@contextmanager
+def log_context(conversation_id: Any = None, jsonrpc_id: Any = None, agent: Optional[str] = None):
+    """Attach ``conversation_id`` / ``jsonrpc_id`` / ``agent`` to every record logged inside the block"""
+    tokens = []
+    if agent is not None:
+        tokens.append((agent_var, agent_var.set(agent)))
+    if conversation_id is not None:
+        tokens.append((conversation_id_var, conversation_id_var.set(conversation_id)))
+    if jsonrpc_id is not None:
+        tokens.append((jsonrpc_id_var, jsonrpc_id_var.set(jsonrpc_id)))
+    try:
+        yield
+    finally:
+        for var, token in reversed(tokens):
+            var.reset(token)
+
+
+def parse_sample_rates(spec: str) -> Dict[str, float]:
+    rates = {}
+    for item in spec.split(","):
+        if "=" in item:
+            name, rate = item.split("=", 1)
+            rates[name.strip()] = float(rate)
+    return rates
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps a fraction of the records below WARNING for the configured loggers (and their children)"""
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.rates = rates
+
+    def _rate(self, name: str) -> Optional[float]:
+        while name:
+            if name in self.rates:
+                return self.rates[name]
+            name = name.rpartition(".")[0]
+        return None
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or not self.rates:
+            return True
+        rate = self._rate(record.name)
+        return rate is None or random.random() < rate
+
+
+class ContextQueueHandler(logging.handlers.QueueHandler):
+    """Enqueues records without formatting them; drops records when the queue is full"""
+
+    def __init__(self, log_queue: queue.Queue, agent: Optional[str]):
+        super().__init__(log_queue)
+        self.agent = agent
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Only capture what is not available later on the listener thread
+        record.agent = agent_var.get() or self.agent
+        record.conversation_id = conversation_id_var.get()
+        record.jsonrpc_id = jsonrpc_id_var.get()
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+            "pid": record.process
+        }
+        for key in ("agent", "conversation_id", "jsonrpc_id"):
+            value = getattr(record, key, None)
+            if value is not None:
+                entry[key] = value
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        ids = [f"{key}={getattr(record, key)}" for key in ("conversation_id", "jsonrpc_id")
+               if getattr(record, key, None) is not None]
+        return f"{line} [{' '.join(ids)}]" if ids else line
+
+
+_handler: Optional[ContextQueueHandler] = None
+_listener: Optional[logging.handlers.QueueListener] = None
+_output: Optional[logging.Handler] = None
+
+
+def _queue_size() -> int:
+    return int(os.getenv("A2A_LOG_QUEUE_SIZE", "10000"))
+
+
+def setup_logging(agent: Optional[str] = None, level: Optional[str] = None) -> None:
+    """Route all logging through the queue; safe to call more than once
+
+    The first call names the process (``agent``); agents loaded into the same
+    process later are labelled through ``agent_var`` while they serve a request.
+    """
+    global _handler, _listener, _output
+    level = level or os.getenv("A2A_LOG_LEVEL", "INFO")
+    root = logging.getLogger()
+    root.setLevel(level)
+    if _handler is not None:
+        _handler.agent = _handler.agent or agent
+        return
+
+    _output = logging.StreamHandler(sys.stderr)
+    _output.setFormatter(TextFormatter() if os.getenv("A2A_LOG_FORMAT", "json") == "text" else JsonFormatter())
+    _handler = ContextQueueHandler(queue.Queue(_queue_size()), agent)
+    _handler.addFilter(SamplingFilter(parse_sample_rates(os.getenv("A2A_LOG_SAMPLE", ""))))
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(_handler)
+    _listener = logging.handlers.QueueListener(_handler.queue, _output, respect_handler_level=True)
+    _listener.start()
+    atexit.register(flush_logging)
+
+
+def flush_logging() -> None:
+    """Write out everything still queued (at exit, or before a process replaces itself)"""
+    if _listener is not None and _listener._thread is not None:
+        _listener.stop()
+    if _handler is not None and _handler.dropped:
+        sys.stderr.write(f"{time.strftime('%Y-%m-%d %H:%M:%S')} - {_handler.dropped} log records dropped\n")
+
+
+def _restart_after_fork() -> None:
+    # The listener thread does not survive a fork, and the parent may have
+    # held the queue's lock at that moment: give the child a fresh queue
+    global _listener
+    if _handler is None:
+        return
+    _handler.queue = queue.Queue(_queue_size())
+    _handler.dropped = 0
+    _listener = logging.handlers.QueueListener(_handler.queue, _output, respect_handler_level=True)
+    _listener.start()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_restart_after_fork)
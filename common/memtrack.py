@@ -0,0 +1,172 @@
+"""
+Author: SURYA DEEP SINGH
+LinkedIn: https://www.linkedin.com/in/surya-deep-singh-b9b94813a/
+Medium: https://medium.com/@SuryaDeepSingh
+GitHub: https://github.com/SinghSuryaDeep
+"""
+# common/memtrack.py
+#
+# Allocation tracking per skill call, built on tracemalloc. Enable it with
+# A2A_MEMTRACK=1; tracing slows allocation-heavy code, so it is off by default.
+# For every /skills/* request it records
+#   - peak: highest traced memory above the starting point during the call
+#   - retained: traced memory still held after the response was built
+#   - top allocators (A2A_MEMTRACK_TOP > 0): source lines whose allocations
+#     grew the most between the start and end of the call
+# tracemalloc is process-wide, so figures for calls that overlapped with other
+# requests include their allocations too; such calls are flagged "overlapped".
+# Streamed responses are measured until their body has been sent and carry no
+# X-A2A-Memory-Peak header.
+#
+#   GET /debug/memory  – process totals, per-skill aggregates, recent calls
+
+import os
+import threading
+import time
+import tracemalloc
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+from flask import Flask, g, jsonify, request
+
+from common.debug import debug_endpoint
+from common.prefork import read_memory
+
+ENABLED = os.getenv("A2A_MEMTRACK", "0") == "1"
+TRACE_FRAMES = int(os.getenv("A2A_MEMTRACK_FRAMES", "1"))
+TOP_ALLOCATORS = int(os.getenv("A2A_MEMTRACK_TOP", "10"))
+# Upper bound for /debug/memory?top=N
+MAX_TOP_LIVE = 100
+RECENT_CALLS = int(os.getenv("A2A_MEMTRACK_RECENT", "100"))
+
+
+def _top_allocators(before: tracemalloc.Snapshot, after: tracemalloc.Snapshot, limit: int) -> List[Dict[str, Any]]:
+    diffs = [d for d in after.compare_to(before, "lineno") if d.size_diff > 0][:limit]
+    return [
+        {
+            "location": f"{d.traceback[0].filename}:{d.traceback[0].lineno}",
+            "size_diff": d.size_diff,
+            "count_diff": d.count_diff
+        }
+        for d in diffs
+    ]
+
+
+class MemoryTracker:
+    """Per-call allocation statistics for one agent process"""
+
+    def __init__(self, top_allocators: int = TOP_ALLOCATORS, recent: int = RECENT_CALLS):
+        self.top_allocators = top_allocators
+        self.recent = deque(maxlen=recent)
+        self.per_skill: Dict[str, Dict[str, Any]] = {}
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+    def begin(self) -> Dict[str, Any]:
+        with self._lock:
+            self._in_flight += 1
+            overlapped = self._in_flight > 1
+            if not overlapped:
+                tracemalloc.reset_peak()
+        current, _ = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot() if self.top_allocators else None
+        return {"start": current, "snapshot": snapshot, "overlapped": overlapped, "t0": time.perf_counter()}
+
+    def end(self, state: Dict[str, Any], skill: str, status: int) -> Dict[str, Any]:
+        current, peak = tracemalloc.get_traced_memory()
+        with self._lock:
+            overlapped = state["overlapped"] or self._in_flight > 1
+            self._in_flight -= 1
+        record = {
+            "skill": skill,
+            "status": status,
+            "at": time.time(),
+            "duration_s": round(time.perf_counter() - state["t0"], 4),
+            "peak_bytes": max(0, peak - state["start"]),
+            "retained_bytes": current - state["start"],
+            "overlapped": overlapped
+        }
+        if state["snapshot"] is not None:
+            record["top_allocators"] = _top_allocators(state["snapshot"], tracemalloc.take_snapshot(),
+                                                       self.top_allocators)
+        with self._lock:
+            self.recent.append(record)
+            agg = self.per_skill.setdefault(skill, {"calls": 0, "max_peak_bytes": 0, "total_retained_bytes": 0})
+            agg["calls"] += 1
+            agg["max_peak_bytes"] = max(agg["max_peak_bytes"], record["peak_bytes"])
+            agg["total_retained_bytes"] += record["retained_bytes"]
+        return record
+
+    def report(self, top: int = 0) -> Dict[str, Any]:
+        current, peak = tracemalloc.get_traced_memory()
+        with self._lock:
+            recent = list(self.recent)
+            per_skill = {k: dict(v) for k, v in self.per_skill.items()}
+        for agg in per_skill.values():
+            agg["avg_retained_bytes"] = agg["total_retained_bytes"] // agg["calls"] if agg["calls"] else 0
+        report = {
+            "pid": os.getpid(),
+            "process": read_memory(os.getpid()),
+            "traced_current_bytes": current,
+            "traced_peak_bytes": peak,
+            "per_skill": per_skill,
+            "recent": recent
+        }
+        if top:
+            stats = tracemalloc.take_snapshot().statistics("lineno")[:top]
+            report["top_live_allocations"] = [
+                {"location": f"{s.traceback[0].filename}:{s.traceback[0].lineno}", "size": s.size, "count": s.count}
+                for s in stats
+            ]
+        return report
+
+
+def init_memtrack(app: Flask, enabled: bool = ENABLED) -> Optional[MemoryTracker]:
+    """Track allocations of /skills/* requests and expose /debug/memory"""
+    if not enabled:
+        @app.route("/debug/memory", methods=["GET"])
+        @debug_endpoint
+        def memory_report_disabled():
+            return jsonify({"enabled": False, "pid": os.getpid(), "process": read_memory(os.getpid())})
+        return None
+
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(TRACE_FRAMES)
+    tracker = MemoryTracker()
+
+    @app.before_request
+    def begin_tracking():
+        if request.path.startswith("/skills/"):
+            g.memtrack = tracker.begin()
+
+    @app.after_request
+    def end_tracking(response):
+        state = g.pop("memtrack", None)
+        if state is None:
+            return response
+        skill = request.path.rsplit("/", 1)[-1]
+        if response.is_streamed:
+            # The body is generated after this hook; measure until it has been sent
+            response.call_on_close(lambda: tracker.end(state, skill, response.status_code))
+            return response
+        record = tracker.end(state, skill, response.status_code)
+        response.headers["X-A2A-Memory-Peak"] = str(record["peak_bytes"])
+        return response
+
+    @app.teardown_request
+    def discard_tracking(exc):
+        # after_request is skipped for unhandled errors; keep the in-flight count right
+        state = g.pop("memtrack", None)
+        if state is not None:
+            tracker.end(state, request.path.rsplit("/", 1)[-1], 500)
+
+    @app.route("/debug/memory", methods=["GET"])
+    @debug_endpoint
+    def memory_report():
+        # type=int falls back to the default for unparsable values; None marks those
+        top = request.args.get("top", default=None if "top" in request.args else 0, type=int)
+        if top is None or top < 0:
+            return jsonify({"error": "Invalid 'top' - expected a non-negative integer"}), 400
+        return jsonify({"enabled": True, **tracker.report(min(top, MAX_TOP_LIVE))})
+
+    return tracker
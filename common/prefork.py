@@ -0,0 +1,229 @@
+"""
+Author: SURYA DEEP SINGH
+LinkedIn: https://www.linkedin.com/in/surya-deep-singh-b9b94813a/
+Medium: https://medium.com/@SuryaDeepSingh
+GitHub: https://github.com/SinghSuryaDeep
+"""
+# common/prefork.py
+#
+# Pre-fork multi-worker launcher for the agent servers (POSIX only).
+#
+# The parent runs the agent's warm_up() once - importing the framework and
+# building the watsonx client - then opens the listening socket and forks the
+# workers. Imported modules are shared copy-on-write; per-process state such
+# as HTTP connection pools is rebuilt in each child by the logic modules'
+# os.register_at_fork(after_in_child=...) hooks, and each child re-runs
+# warm_up() before it accepts connections. The parent restarts workers that
+# die and periodically logs per-worker RSS/PSS/USS to help pick worker counts.
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import signal
+import socket
+import time
+from contextlib import nullcontext
+from typing import Callable, Dict, List, Optional
+
+from flask import Flask
+
+from common.logs import flush_logging
+from common.startup import StartupTracker
+
+logger = logging.getLogger(__name__)
+
+
+def read_memory(pid: int) -> Dict[str, Optional[int]]:
+    """RSS, PSS and USS (private) bytes of a process, None where unavailable"""
+    try:
+        values = {}
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 3 and parts[2] == "kB":
+                    values[parts[0].rstrip(":")] = int(parts[1]) * 1024
+        return {
+            "rss": values.get("Rss"),
+            "pss": values.get("Pss"),
+            "uss": values.get("Private_Clean", 0) + values.get("Private_Dirty", 0)
+        }
+    except OSError:
+        pass
+    try:
+        import psutil
+        info = psutil.Process(pid).memory_full_info()
+        return {"rss": info.rss, "pss": getattr(info, "pss", None), "uss": getattr(info, "uss", None)}
+    except Exception:
+        return {"rss": None, "pss": None, "uss": None}
+
+
+def memory_report(parent_pid: int, worker_pids: List[int]) -> Dict[str, object]:
+    """Per-process memory plus an estimate of what one more worker costs"""
+    workers = [{"pid": pid, **read_memory(pid)} for pid in worker_pids]
+    parent = {"pid": parent_pid, **read_memory(parent_pid)}
+    uss = [w["uss"] for w in workers if w["uss"] is not None]
+    pss = [w["pss"] for w in workers if w["pss"] is not None]
+    report = {
+        "parent": parent,
+        "workers": workers,
+        "total_pss": (parent["pss"] or 0) + sum(pss) if pss else None,
+        # Private memory is what each extra worker adds; shared pages are paid once
+        "marginal_worker_bytes": int(sum(uss) / len(uss)) if uss else None
+    }
+    return report
+
+
+def _mb(value: Optional[int]) -> str:
+    return "n/a" if value is None else f"{value / (1024 * 1024):.1f}MB"
+
+
+def log_memory_report(report: Dict[str, object]) -> None:
+    parent = report["parent"]
+    logger.info("prefork parent pid=%s rss=%s pss=%s", parent["pid"], _mb(parent["rss"]), _mb(parent["pss"]))
+    for worker in report["workers"]:
+        logger.info("prefork worker pid=%s rss=%s pss=%s uss=%s",
+                    worker["pid"], _mb(worker["rss"]), _mb(worker["pss"]), _mb(worker["uss"]))
+    logger.info("prefork total pss=%s, marginal cost per extra worker ~%s",
+                _mb(report["total_pss"]), _mb(report["marginal_worker_bytes"]))
+
+
+def _bind_socket(host: str, port: int, backlog: int) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _warm_worker(warm_up: Callable, startup: Optional[StartupTracker]) -> None:
+    """Rebuild the per-process clients of a fresh worker and make it ready
+
+    Imports are already loaded by the parent. A worker whose parent failed to
+    warm up keeps retrying in the background while it serves, so it becomes
+    ready on its own; if the parent was ready, a failure here is not fatal,
+    the clients are built lazily on first use.
+    """
+    if startup is None:
+        try:
+            warm_up(lambda name: nullcontext())
+        except Exception:
+            logger.exception("prefork worker %s warm-up failed", os.getpid())
+        return
+    if startup.run_warmup(warm_up, retries=0, name=f"worker {os.getpid()} warm-up") or startup.is_ready:
+        return
+    startup.start_warmup(warm_up)
+
+
+def _run_worker(app: Flask, host: str, port: int, sock: socket.socket,
+                warm_up: Optional[Callable], startup: Optional[StartupTracker]) -> None:
+    """Body of a forked worker; never returns"""
+    from werkzeug.serving import make_server
+
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    # Drop any event loop state inherited from the parent
+    asyncio.set_event_loop_policy(None)
+    asyncio.set_event_loop(asyncio.new_event_loop())
+    if warm_up is not None:
+        _warm_worker(warm_up, startup)
+    try:
+        server = make_server(host, port, app, threaded=True, fd=sock.fileno())
+        logger.info("prefork worker %s serving on http://%s:%s", os.getpid(), host, port)
+        server.serve_forever()
+    except Exception:
+        logger.exception("prefork worker %s crashed", os.getpid())
+        flush_logging()
+        os._exit(1)
+    flush_logging()
+    os._exit(0)
+
+
+def serve_prefork(
+    app: Flask,
+    host: str,
+    port: int,
+    workers: int,
+    warm_up: Optional[Callable] = None,
+    startup: Optional[StartupTracker] = None,
+    memory_report_interval: float = 60.0,
+    memory_report_path: Optional[str] = None,
+    backlog: int = 128
+) -> None:
+    """Preload in this process, fork ``workers`` children sharing one socket and supervise them"""
+    if not hasattr(os, "fork"):
+        raise RuntimeError("Pre-fork mode requires a POSIX platform")
+
+    if warm_up is not None:
+        if startup is not None:
+            # One attempt: the parent only preloads, it must not hold up forking the workers
+            startup.run_warmup(warm_up, retries=0)
+        else:
+            warm_up(lambda name: nullcontext())
+
+    sock = _bind_socket(host, port, backlog)
+    if startup is not None:
+        startup.mark_serving()
+
+    children: Dict[int, int] = {}  # pid -> worker slot
+    stopping = False
+
+    def spawn(slot: int) -> None:
+        pid = os.fork()
+        if pid == 0:
+            _run_worker(app, host, port, sock, warm_up, startup)
+        children[pid] = slot
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    for slot in range(workers):
+        spawn(slot)
+    logger.info("prefork parent %s started %s workers on http://%s:%s", os.getpid(), workers, host, port)
+
+    next_report = time.monotonic() + min(memory_report_interval, 10.0)
+    while children:
+        try:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            break
+        if pid:
+            slot = children.pop(pid, None)
+            if not stopping and slot is not None:
+                logger.warning("prefork worker %s exited with status %s, restarting", pid, status)
+                spawn(slot)
+            continue
+        if memory_report_interval and time.monotonic() >= next_report and not stopping:
+            report = memory_report(os.getpid(), list(children))
+            log_memory_report(report)
+            if memory_report_path:
+                with open(memory_report_path, "w") as f:
+                    json.dump(report, f, indent=2)
+            next_report = time.monotonic() + memory_report_interval
+        time.sleep(0.5)
+    sock.close()
+
+
+def parse_server_args(port: int, argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Command line shared by the agent servers"""
+    parser = argparse.ArgumentParser(description="A2A agent server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=port)
+    parser.add_argument("--workers", type=int, default=int(os.getenv("A2A_WORKERS", "1")),
+                        help="Pre-forked worker processes (1 = single-process development server)")
+    parser.add_argument("--memory-report-interval", type=float, default=60.0,
+                        help="Seconds between per-worker memory reports (0 disables)")
+    parser.add_argument("--memory-report", help="Also write the latest memory report to this JSON file")
+    return parser.parse_args(argv)
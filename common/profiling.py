@@ -0,0 +1,233 @@
+"""
+Author: SURYA DEEP SINGH
+LinkedIn: https://www.linkedin.com/in/surya-deep-singh-b9b94813a/
+Medium: https://medium.com/@SuryaDeepSingh
+GitHub: https://github.com/SinghSuryaDeep
+"""
+# common/profiling.py
+#
+# Opt-in per-request profiling for skill endpoints. A request is profiled when
+#   - it carries X-A2A-Profile: <A2A_DEBUG_SECRET>, or
+#   - it is picked by A2A_PROFILE_SAMPLE_RATE (0.0 - 1.0, default 0).
+# A sampling thread snapshots the request thread's stack every
+# A2A_PROFILE_INTERVAL seconds, so unprofiled requests pay nothing and
+# profiled ones only a small constant overhead. Profiles are stored in folded
+# stack format ("frame;frame;frame count"), which flamegraph.pl, speedscope
+# and inferno read directly, keyed by the JSON-RPC id of the request.
+#
+#   GET /debug/profiles        – recent profiles
+#   GET /debug/profiles/<key>  – download one profile (.folded)
+#
+# Set A2A_PROFILE_DIR to keep profiles on disk; with pre-forked workers this
+# lets any worker serve every worker's profiles.
+#
+# Streamed responses are generated after the view returns, so their profile
+# is finished when the body has been sent and carries no X-A2A-Profile-Key
+# header; it is listed under /debug/profiles like any other.
+
+import functools
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Any, Dict, List, Optional
+
+from flask import Flask, Response, abort, g, jsonify, request
+
+from common.debug import debug_endpoint, secret_matches
+from common.wire import MEDIA_NDJSON, decode
+
+PROFILE_HEADER = "X-A2A-Profile"
+SAMPLE_RATE = float(os.getenv("A2A_PROFILE_SAMPLE_RATE", "0"))
+SAMPLE_INTERVAL = float(os.getenv("A2A_PROFILE_INTERVAL", "0.005"))
+MAX_PROFILES = int(os.getenv("A2A_PROFILE_KEEP", "50"))
+PROFILE_DIR = os.getenv("A2A_PROFILE_DIR")
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    module = frame.f_globals.get("__name__", os.path.basename(code.co_filename))
+    return f"{module}:{code.co_name}:{frame.f_lineno}"
+
+
+class StackSampler:
+    """Samples one thread's stack on a background thread until stopped"""
+
+    def __init__(self, thread_id: int, interval: float = SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+        self.started_at = 0.0
+        self.duration = 0.0
+
+    def start(self) -> "StackSampler":
+        self.started_at = time.perf_counter()
+        self._thread.start()
+        return self
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            labels = []
+            while frame is not None:
+                labels.append(_frame_label(frame))
+                frame = frame.f_back
+            self.stacks[";".join(reversed(labels))] += 1
+            self.samples += 1
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.duration = time.perf_counter() - self.started_at
+
+    def folded(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class ProfileStore:
+    """Most recent profiles, in memory or in A2A_PROFILE_DIR"""
+
+    def __init__(self, max_profiles: int = MAX_PROFILES, directory: Optional[str] = PROFILE_DIR):
+        self.max_profiles = max_profiles
+        self.directory = directory
+        self._profiles: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def make_key(request_id: Any) -> str:
+        key = re.sub(r"[^A-Za-z0-9._-]", "_", str(request_id)) or "unknown"
+        return key[:128]
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.folded")
+
+    def add(self, request_id: Any, folded: str, meta: Dict[str, Any]) -> str:
+        key = self.make_key(request_id)
+        with self._lock:
+            # Retries reuse JSON-RPC ids; keep each run
+            base, n = key, 1
+            while key in self._profiles or (self.directory and os.path.exists(self._path(key))):
+                n += 1
+                key = f"{base}.{n}"
+            self._profiles[key] = {**meta, "key": key, "request_id": request_id,
+                                   "folded": None if self.directory else folded}
+            if self.directory:
+                with open(self._path(key), "w") as f:
+                    f.write(folded)
+            while len(self._profiles) > self.max_profiles:
+                old_key, _ = self._profiles.popitem(last=False)
+                if self.directory:
+                    try:
+                        os.remove(self._path(old_key))
+                    except FileNotFoundError:
+                        pass
+        return key
+
+    def list(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            entries = [{k: v for k, v in meta.items() if k != "folded"} for meta in self._profiles.values()]
+            known = set(self._profiles)
+        if self.directory:
+            # Profiles written by other worker processes
+            for name in sorted(os.listdir(self.directory)):
+                key = name[:-len(".folded")]
+                if name.endswith(".folded") and key not in known:
+                    stat = os.stat(os.path.join(self.directory, name))
+                    entries.append({"key": key, "created_at": stat.st_mtime, "size": stat.st_size})
+        return sorted(entries, key=lambda e: e.get("created_at", 0), reverse=True)
+
+    def get(self, key: str) -> Optional[str]:
+        key = self.make_key(key)
+        with self._lock:
+            meta = self._profiles.get(key)
+            if meta is not None and meta["folded"] is not None:
+                return meta["folded"]
+        if self.directory and os.path.exists(self._path(key)):
+            with open(self._path(key)) as f:
+                return f.read()
+        return None
+
+
+def should_profile() -> bool:
+    if secret_matches(request.headers.get(PROFILE_HEADER)):
+        return True
+    return SAMPLE_RATE > 0 and random.random() < SAMPLE_RATE
+
+
+def _request_id() -> Any:
+    if request.mimetype == MEDIA_NDJSON:
+        # Streamed bodies are read by the skill itself and cannot be read twice
+        return None
+    try:
+        payload = decode(request.get_data(cache=True), request.content_type)
+        return payload.get("id") if isinstance(payload, dict) else None
+    except Exception:
+        return None
+
+
+def init_profiling(app: Flask, store: Optional[ProfileStore] = None) -> ProfileStore:
+    """Profile selected /skills/* requests of ``app`` and expose /debug/profiles"""
+    store = store or ProfileStore()
+
+    @app.before_request
+    def start_profiler():
+        if request.path.startswith("/skills/") and should_profile():
+            g.profiler = StackSampler(threading.get_ident()).start()
+
+    def finish(sampler: StackSampler, request_id: Any, path: str, status: int) -> str:
+        sampler.stop()
+        return store.add(request_id if request_id is not None else f"anon-{time.time_ns()}", sampler.folded(), {
+            "path": path,
+            "pid": os.getpid(),
+            "created_at": time.time(),
+            "duration_s": round(sampler.duration, 4),
+            "samples": sampler.samples,
+            "interval_s": sampler.interval,
+            "status": status
+        })
+
+    @app.after_request
+    def stop_profiler(response):
+        sampler = g.pop("profiler", None)
+        if sampler is None:
+            return response
+        if response.is_streamed:
+            # The body has not been generated yet; keep sampling until it is sent
+            response.call_on_close(functools.partial(finish, sampler, _request_id(), request.path,
+                                                     response.status_code))
+            return response
+        response.headers["X-A2A-Profile-Key"] = finish(sampler, _request_id(), request.path, response.status_code)
+        return response
+
+    @app.teardown_request
+    def discard_profiler(exc):
+        # after_request is skipped for unhandled errors; never leave a sampler running
+        sampler = g.pop("profiler", None)
+        if sampler is not None:
+            sampler.stop()
+
+    @app.route("/debug/profiles", methods=["GET"])
+    @debug_endpoint
+    def list_profiles():
+        return jsonify({"profiles": store.list()})
+
+    @app.route("/debug/profiles/<key>", methods=["GET"])
+    @debug_endpoint
+    def download_profile(key: str):
+        folded = store.get(key)
+        if folded is None:
+            abort(404)
+        return Response(folded, mimetype="text/plain",
+                        headers={"Content-Disposition": f"attachment; filename={ProfileStore.make_key(key)}.folded"})
+
+    return store
@@ -0,0 +1,177 @@
+"""
+Author: SURYA DEEP SINGH
+LinkedIn: https://www.linkedin.com/in/surya-deep-singh-b9b94813a/
+Medium: https://medium.com/@SuryaDeepSingh
+GitHub: https://github.com/SinghSuryaDeep
+"""
+# common/prompts.py
+#
+# Prompts sent to watsonx and the tokens they cost. Values are rendered as
+# compact canonical JSON (sorted keys, no whitespace) instead of Python reprs,
+# and every prompt is counted before it is sent: a prompt over its skill's
+# input budget is refused, and the model is asked for at most max_new_tokens,
+# stopping at the end of the JSON block it was asked for.
+#
+#   A2A_PROMPT_BUDGETS  per-skill "input:output" token budgets,
+#                       e.g. "analyze-patient-data=2500:128,generate-report=2500:256"
+#
+# Token usage of every model call is logged with the skill and added to the
+# usage of the current request, which the skill endpoint returns in the
+# X-A2A-Token-Usage header. Counts come from the model's response when it
+# reports them and are estimated as in common/limits.py otherwise.
+
+import contextvars
+import json
+import logging
+import os
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Tuple
+
+from common.limits import MAX_INPUT_TOKENS, estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+USAGE_HEADER = "X-A2A-Token-Usage"
+
+# The prompts ask for a ```json block; everything after it is chatter. The stop
+# sequence starts with the object's closing brace so that it cannot match the
+# opening fence ("\n```json\n{"); the model's reply then ends without that brace.
+JSON_REPLY_STOP = ("}\n```",)
+# Room for the fixed text of a prompt on top of the largest accepted skill input
+PROMPT_OVERHEAD_TOKENS = 256
+
+
+@dataclass(frozen=True)
+class PromptBudget:
+    max_input_tokens: int
+    max_new_tokens: int
+    stop: Tuple[str, ...] = JSON_REPLY_STOP
+
+
+DEFAULT_BUDGETS = {
+    "analyze-patient-data": PromptBudget(MAX_INPUT_TOKENS + PROMPT_OVERHEAD_TOKENS, 128),
+    "generate-report": PromptBudget(MAX_INPUT_TOKENS + PROMPT_OVERHEAD_TOKENS, 256),
+}
+
+
+def parse_budgets(spec: str) -> Dict[str, PromptBudget]:
+    budgets = dict(DEFAULT_BUDGETS)
+    for item in spec.split(","):
+        if "=" in item:
+            skill, limits = item.split("=", 1)
+            max_input, max_new = limits.split(":", 1)
+            budgets[skill.strip()] = PromptBudget(int(max_input), int(max_new))
+    return budgets
+
+
+BUDGETS = parse_budgets(os.getenv("A2A_PROMPT_BUDGETS", ""))
+
+
+def budget_for(skill: str) -> PromptBudget:
+    return BUDGETS.get(skill) or PromptBudget(MAX_INPUT_TOKENS + PROMPT_OVERHEAD_TOKENS, 256)
+
+
+class PromptTooLarge(ValueError):
+    def __init__(self, skill: str, tokens: int, budget: int):
+        super().__init__(f"Prompt for '{skill}' needs about {tokens} tokens, over its budget of {budget}")
+        self.skill = skill
+        self.tokens = tokens
+        self.budget = budget
+
+
+def compact(value: Any) -> str:
+    """Canonical single-line JSON: the same data always renders to the same, shortest text"""
+    return json.dumps(value, separators=(",", ":"), sort_keys=True, ensure_ascii=False, default=str)
+
+
+@dataclass(frozen=True)
+class Prompt:
+    skill: str
+    text: str
+    input_tokens: int
+    budget: PromptBudget
+
+
+def render_prompt(skill: str, template: str, **values: Any) -> Prompt:
+    """Fill ``template`` (str.format syntax) and check the result against the skill's input budget
+
+    Strings are inserted as they are, anything else as compact JSON.
+    """
+    budget = budget_for(skill)
+    text = template.format(**{name: value if isinstance(value, str) else compact(value)
+                              for name, value in values.items()})
+    tokens = estimate_tokens(text)
+    if tokens > budget.max_input_tokens:
+        raise PromptTooLarge(skill, tokens, budget.max_input_tokens)
+    return Prompt(skill, text, tokens, budget)
+
+
+def parse_json_reply(text: str) -> Optional[Dict[str, Any]]:
+    """The JSON object in a model reply, with or without fences or a trailing stop-trimmed brace"""
+    start = text.find("{")
+    if start == -1:
+        return None
+    decoder = json.JSONDecoder()
+    body = text[start:].rstrip()
+    for candidate in (body, body + "}"):
+        try:
+            value, _ = decoder.raw_decode(candidate)
+        except json.JSONDecodeError:
+            continue
+        if isinstance(value, dict):
+            return value
+    return None
+
+
+@dataclass
+class TokenUsage:
+    """Tokens used by the model calls of one request"""
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    calls: int = 0
+    estimated: bool = False
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def add(self, prompt_tokens: int, completion_tokens: int, estimated: bool) -> None:
+        # Calls of one request may run on several threads (report batches)
+        with self._lock:
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+            self.calls += 1
+            self.estimated = self.estimated or estimated
+
+    def header(self) -> str:
+        value = f"prompt={self.prompt_tokens}, completion={self.completion_tokens}, calls={self.calls}"
+        return value + ", estimated" if self.estimated else value
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"prompt_tokens": self.prompt_tokens, "completion_tokens": self.completion_tokens,
+                "calls": self.calls, "estimated": self.estimated}
+
+
+usage_var: contextvars.ContextVar = contextvars.ContextVar("token_usage", default=None)
+
+
+def record_usage(prompt: Prompt, completion: str, prompt_tokens: Optional[int] = None,
+                 completion_tokens: Optional[int] = None) -> Dict[str, int]:
+    """Log one model call and add it to the usage of the current request
+
+    ``prompt_tokens`` / ``completion_tokens`` are the model's own counts when it
+    reported them; missing counts are estimated.
+    """
+    estimated = prompt_tokens is None or completion_tokens is None
+    if prompt_tokens is None:
+        prompt_tokens = prompt.input_tokens
+    if completion_tokens is None:
+        completion_tokens = estimate_tokens(completion or "")
+    logger.info("%s used %d prompt + %d completion tokens", prompt.skill, prompt_tokens, completion_tokens,
+                extra={"skill": prompt.skill, "prompt_tokens": prompt_tokens,
+                       "completion_tokens": completion_tokens, "estimated": estimated})
+    if completion_tokens >= prompt.budget.max_new_tokens:
+        logger.warning("%s reply reached max_new_tokens (%d) and may be cut off",
+                       prompt.skill, prompt.budget.max_new_tokens)
+    usage = usage_var.get()
+    if usage is not None:
+        usage.add(prompt_tokens, completion_tokens, estimated)
+    return {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens}
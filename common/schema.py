@@ -0,0 +1,163 @@
+"""
+Author: SURYA DEEP SINGH
+LinkedIn: https://www.linkedin.com/in/surya-deep-singh-b9b94813a/
+Medium: https://medium.com/@SuryaDeepSingh
+GitHub: https://github.com/SinghSuryaDeep
+"""
+# common/schema.py
+#
+# Compiles the JSON Schema subset used in the agent cards into plain Python
+# closures once at startup, so validating a request is a handful of
+# isinstance checks rather than a walk over the schema dict. Supported:
+#   type (name or list of names), properties, required, additionalProperties,
+#   items, minItems, maxItems, enum, minimum, maximum, minLength, maxLength
+# Annotation keywords (description, title, examples, default) are ignored.
+# Any other keyword fails compilation, so a card never silently carries a
+# constraint that is not enforced.
+
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+Validator = Callable[[Any, str], None]
+
+_TYPE_CHECKS: Dict[str, Callable[[Any], bool]] = {
+    "object": lambda v: isinstance(v, dict),
+    "array": lambda v: isinstance(v, list),
+    "string": lambda v: isinstance(v, str),
+    "integer": lambda v: isinstance(v, int) and not isinstance(v, bool),
+    "number": lambda v: isinstance(v, (int, float)) and not isinstance(v, bool),
+    "boolean": lambda v: isinstance(v, bool),
+    "null": lambda v: v is None
+}
+_ANNOTATIONS = {"description", "title", "examples", "default", "$comment"}
+_SUPPORTED = {"type", "properties", "required", "additionalProperties", "items", "minItems", "maxItems",
+              "enum", "minimum", "maximum", "minLength", "maxLength"} | _ANNOTATIONS
+
+
+class SchemaError(ValueError):
+    """A value that does not match its schema; ``path`` points at the offending part"""
+
+    def __init__(self, path: str, message: str):
+        super().__init__(f"{path}: {message}")
+        self.path = path
+        self.message = message
+
+
+def _compile_type(names: Any) -> Optional[Validator]:
+    names = [names] if isinstance(names, str) else list(names)
+    unknown = [n for n in names if n not in _TYPE_CHECKS]
+    if unknown:
+        raise ValueError(f"Unsupported schema type(s): {unknown}")
+    checks = tuple(_TYPE_CHECKS[n] for n in names)
+    expected = " or ".join(names)
+
+    def check_type(value: Any, path: str) -> None:
+        for check in checks:
+            if check(value):
+                return
+        raise SchemaError(path, f"expected {expected}, got {type(value).__name__}")
+    return check_type
+
+
+def compile_schema(schema: Dict[str, Any]) -> Validator:
+    """Compile ``schema`` into ``validate(value, path="$")`` which raises SchemaError"""
+    unsupported = set(schema) - _SUPPORTED
+    if unsupported:
+        raise ValueError(f"Unsupported schema keyword(s): {sorted(unsupported)}")
+    checks: List[Validator] = []
+
+    if "type" in schema:
+        checks.append(_compile_type(schema["type"]))
+
+    if "enum" in schema:
+        allowed = list(schema["enum"])
+
+        def check_enum(value: Any, path: str) -> None:
+            if value not in allowed:
+                raise SchemaError(path, f"must be one of {allowed}")
+        checks.append(check_enum)
+
+    required = tuple(schema.get("required", ()))
+    properties: Tuple[Tuple[str, Validator], ...] = tuple(
+        (name, compile_schema(sub)) for name, sub in schema.get("properties", {}).items()
+    )
+    additional = schema.get("additionalProperties", True)
+    additional_validator = compile_schema(additional) if isinstance(additional, dict) else None
+    known = {name for name, _ in properties}
+    if required or properties or additional is not True:
+        def check_object(value: Any, path: str) -> None:
+            if not isinstance(value, dict):
+                return
+            for name in required:
+                if name not in value:
+                    raise SchemaError(path, f"missing required property '{name}'")
+            for name, validate in properties:
+                if name in value:
+                    validate(value[name], f"{path}.{name}")
+            if additional is False:
+                extra = [k for k in value if k not in known]
+                if extra:
+                    raise SchemaError(path, f"unexpected properties {extra}")
+            elif additional_validator is not None:
+                for k, v in value.items():
+                    if k not in known:
+                        additional_validator(v, f"{path}.{k}")
+        checks.append(check_object)
+
+    items_validator = compile_schema(schema["items"]) if "items" in schema else None
+    min_items, max_items = schema.get("minItems"), schema.get("maxItems")
+    if items_validator is not None or min_items is not None or max_items is not None:
+        def check_array(value: Any, path: str) -> None:
+            if not isinstance(value, list):
+                return
+            if min_items is not None and len(value) < min_items:
+                raise SchemaError(path, f"expected at least {min_items} items")
+            if max_items is not None and len(value) > max_items:
+                raise SchemaError(path, f"expected at most {max_items} items")
+            if items_validator is not None:
+                for i, item in enumerate(value):
+                    items_validator(item, f"{path}[{i}]")
+        checks.append(check_array)
+
+    minimum, maximum = schema.get("minimum"), schema.get("maximum")
+    if minimum is not None or maximum is not None:
+        def check_range(value: Any, path: str) -> None:
+            if not isinstance(value, (int, float)) or isinstance(value, bool):
+                return
+            if minimum is not None and value < minimum:
+                raise SchemaError(path, f"must be >= {minimum}")
+            if maximum is not None and value > maximum:
+                raise SchemaError(path, f"must be <= {maximum}")
+        checks.append(check_range)
+
+    min_length, max_length = schema.get("minLength"), schema.get("maxLength")
+    if min_length is not None or max_length is not None:
+        def check_length(value: Any, path: str) -> None:
+            if not isinstance(value, str):
+                return
+            if min_length is not None and len(value) < min_length:
+                raise SchemaError(path, f"must be at least {min_length} characters")
+            if max_length is not None and len(value) > max_length:
+                raise SchemaError(path, f"must be at most {max_length} characters")
+        checks.append(check_length)
+
+    checks = tuple(checks)
+
+    def validate(value: Any, path: str = "$") -> None:
+        for check in checks:
+            check(value, path)
+    return validate
+
+
+def compile_card(agent_card: Dict[str, Any]) -> Dict[str, Tuple[Optional[Validator], Optional[Validator]]]:
+    """(input validator, output validator) per skill id of an agent card"""
+    validators = {}
+    for skill in agent_card.get("spec", {}).get("skills", []):
+        input_schema, output_schema = skill.get("inputSchema"), skill.get("outputSchema")
+        try:
+            validators[skill["id"]] = (
+                compile_schema(input_schema) if input_schema else None,
+                compile_schema(output_schema) if output_schema else None
+            )
+        except ValueError as e:
+            raise ValueError(f"Skill '{skill['id']}': {e}") from e
+    return validators
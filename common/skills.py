@@ -0,0 +1,189 @@
+"""
+Author: SURYA DEEP SINGH
+LinkedIn: https://www.linkedin.com/in/surya-deep-singh-b9b94813a/
+Medium: https://medium.com/@SuryaDeepSingh
+GitHub: https://github.com/SinghSuryaDeep
+"""
+# common/skills.py
+#
+# JSON-RPC 2.0 handling shared by the skill endpoints of every agent. The
+# request envelope is checked, params are validated against the skill's
+# inputSchema (compiled once from the agent card) before the handler runs,
+# and with A2A_VALIDATE_RESULTS=1 results are checked against outputSchema
+# too. Each response carries a Server-Timing header with the validation and
+# handler time, e.g. "validate;dur=0.041, skill;dur=2311.7" (milliseconds).
+# Non-streamed calls are idempotent (see common/idempotency.py): a retry with
+# the same Idempotency-Key, or the same JSON-RPC id and params, gets the
+# stored result instead of running the skill again. Skills that call the
+# model also report the tokens used, e.g.
+# "X-A2A-Token-Usage: prompt=412, completion=37, calls=1" (see common/prompts.py).
+
+import functools
+import logging
+import os
+import time
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from flask import Response, request
+
+from common.idempotency import IDEMPOTENCY_HEADER, REPLAYED_HEADER, fingerprint, get_result_store, idempotency_key
+from common.jsonrpc import JsonRpcError
+from common.logs import CONVERSATION_HEADER, agent_var, conversation_id_var, jsonrpc_id_var
+from common.prompts import USAGE_HEADER, TokenUsage, usage_var
+from common.schema import SchemaError, compile_card
+from common.wire import MEDIA_NDJSON, read_ndjson_request, read_request, respond
+
+logger = logging.getLogger(__name__)
+
+VALIDATE_RESULTS = os.getenv("A2A_VALIDATE_RESULTS", "0") == "1"
+
+SkillHandler = Callable[[Dict[str, Any]], Dict[str, Any]]
+# Streamed skills build their own response from the params and, for NDJSON
+# request bodies, the lazily read items that follow the request line
+StreamHandler = Callable[[Dict[str, Any], Optional[Iterator[Any]]], Response]
+# Renders a finished result as a non-JSON-RPC response, e.g. as NDJSON
+ResultRenderer = Callable[[Any], Response]
+
+
+def _server_timing(timings: Dict[str, float]) -> str:
+    return ", ".join(f"{name};dur={seconds * 1000:.3f}" for name, seconds in timings.items())
+
+
+class SkillDispatcher:
+    """Skill handlers of one agent plus the validators compiled from its card"""
+
+    def __init__(self, agent_card: Dict[str, Any], handlers: Dict[str, SkillHandler],
+                 validate_results: bool = VALIDATE_RESULTS):
+        self.agent_id = agent_card.get("metadata", {}).get("id")
+        self.handlers = handlers
+        self.validators = compile_card(agent_card)
+        self.validate_results = validate_results
+        missing = set(handlers) - set(self.validators)
+        if missing:
+            raise ValueError(f"Skill handlers without a card entry: {sorted(missing)}")
+
+    def validate_params(self, skill_id: str, params: Any) -> None:
+        validate = self.validators[skill_id][0]
+        if not isinstance(params, dict):
+            raise JsonRpcError(-32602, "Invalid params - params must be an object")
+        if validate is None:
+            return
+        try:
+            validate(params, "params")
+        except SchemaError as e:
+            raise JsonRpcError(-32602, f"Invalid params - {e}", data={"path": e.path}) from e
+
+    def validate_result(self, skill_id: str, result: Any) -> None:
+        validate = self.validators[skill_id][1]
+        if validate is None:
+            return
+        try:
+            validate(result, "result")
+        except SchemaError as e:
+            logger.error("Skill '%s' returned a result that does not match its outputSchema: %s", skill_id, e)
+            raise JsonRpcError(-32603, f"Internal error - {e}", data={"path": e.path}, http_status=500) from e
+
+    def invoke(self, skill_id: str, params: Dict[str, Any], timings: Optional[Dict[str, float]] = None) -> Any:
+        """Validate ``params``, run the handler and, if enabled, validate its result"""
+        timings = timings if timings is not None else {}
+        t0 = time.perf_counter()
+        try:
+            self.validate_params(skill_id, params)
+        finally:
+            timings["validate"] = time.perf_counter() - t0
+        t1 = time.perf_counter()
+        result = self.handlers[skill_id](params)
+        t2 = time.perf_counter()
+        if self.validate_results:
+            self.validate_result(skill_id, result)
+        timings["validate"] += time.perf_counter() - t2
+        timings["skill"] = t2 - t1
+        return result
+
+    def validated_handlers(self) -> Dict[str, SkillHandler]:
+        """Handlers for the in-process transport, with the same validation as HTTP"""
+        return {skill_id: functools.partial(self.invoke, skill_id) for skill_id in self.handlers}
+
+    def _invoke_once(self, skill_id: str, request_id: Any, params: Dict[str, Any],
+                     timings: Dict[str, float]) -> tuple:
+        """(result, replayed); retries of a stored or running call are not executed again"""
+        store = get_result_store()
+        if store is not None:
+            params_hash = fingerprint(skill_id, params)
+            key = idempotency_key(skill_id, request.headers.get(IDEMPOTENCY_HEADER), request_id, params_hash)
+            if key is not None:
+                return store.run(key, params_hash, lambda: self.invoke(skill_id, params, timings))
+        return self.invoke(skill_id, params, timings), False
+
+    def handle(self, skill_id: str, stream: Optional[StreamHandler] = None,
+               render: Optional[ResultRenderer] = None) -> Response:
+        """Serve one JSON-RPC skill request from the current Flask request"""
+        request_data = None
+        timings: Dict[str, float] = {}
+        replayed = False
+        # Log records of this request carry the agent, the caller's conversation id and the JSON-RPC id
+        context_tokens = [(agent_var, agent_var.set(self.agent_id)),
+                          (conversation_id_var, conversation_id_var.set(request.headers.get(CONVERSATION_HEADER)))]
+        # Model calls of this request add their token counts here
+        usage = TokenUsage()
+        context_tokens.append((usage_var, usage_var.set(usage)))
+        try:
+            entries = None
+            if stream is not None and request.mimetype == MEDIA_NDJSON:
+                request_data, entries = read_ndjson_request()
+            else:
+                request_data = read_request()
+            context_tokens.append((jsonrpc_id_var, jsonrpc_id_var.set(request_data.get("id"))))
+
+            if not all(key in request_data for key in ["jsonrpc", "method", "params", "id"]):
+                raise JsonRpcError(-32600, "Invalid Request - Missing required JSON-RPC fields")
+            if request_data["jsonrpc"] != "2.0":
+                raise JsonRpcError(-32600, "Invalid Request - jsonrpc must be '2.0'")
+            if request_data["method"] != "invoke":
+                raise JsonRpcError(-32601, f"Method not found: {request_data['method']}", http_status=404)
+
+            params = request_data["params"]
+            if stream is not None:
+                t0 = time.perf_counter()
+                try:
+                    self.validate_params(skill_id, params)
+                finally:
+                    timings["validate"] = time.perf_counter() - t0
+                t1 = time.perf_counter()
+                response = stream(params, entries)
+                # Only the work done before the body starts streaming
+                timings["skill"] = time.perf_counter() - t1
+            else:
+                result, replayed = self._invoke_once(skill_id, request_data["id"], params, timings)
+                if render is not None:
+                    response = render(result)
+                else:
+                    response = respond({"jsonrpc": "2.0", "result": result, "id": request_data["id"]})
+
+        except JsonRpcError as e:
+            response = respond(e.to_response(request_data.get("id") if request_data else None), e.http_status)
+        except Exception as e:
+            logger.exception("Error during skill invocation")
+            response = respond({
+                "jsonrpc": "2.0",
+                "error": {
+                    "code": -32603,
+                    "message": "Internal error",
+                    "data": str(e)
+                },
+                "id": request_data.get("id") if request_data else None
+            }, 500)
+        finally:
+            if usage.calls:
+                logger.info("Token usage of '%s': %d prompt + %d completion tokens in %d calls", skill_id,
+                            usage.prompt_tokens, usage.completion_tokens, usage.calls,
+                            extra={"skill": skill_id, **usage.as_dict()})
+            for var, token in reversed(context_tokens):
+                var.reset(token)
+        if replayed:
+            response.headers[REPLAYED_HEADER] = "true"
+        elif timings:
+            response.headers["Server-Timing"] = _server_timing(timings)
+        if usage.calls:
+            response.headers[USAGE_HEADER] = usage.header()
+        return response
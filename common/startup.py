@@ -0,0 +1,160 @@
+"""
+Author: SURYA DEEP SINGH
+LinkedIn: https://www.linkedin.com/in/surya-deep-singh-b9b94813a/
+Medium: https://medium.com/@SuryaDeepSingh
+GitHub: https://github.com/SinghSuryaDeep
+"""
+# common/startup.py
+#
+# Two-phase agent startup. The server starts answering the agent card and
+# /health immediately, while a background thread imports the agent framework
+# and builds the watsonx clients. /ready reports 503 until that warm-up has
+# finished and /startup returns a per-phase timing breakdown.
+#
+# A failed warm-up (a transient IAM or network error, say) is retried with
+# exponential backoff, so the agent becomes ready once the service is back:
+#   A2A_WARMUP_RETRIES      – retries after the first attempt, -1 = forever (default)
+#   A2A_WARMUP_BACKOFF      – first delay in seconds, doubled per retry (default 1)
+#   A2A_WARMUP_MAX_BACKOFF  – longest delay in seconds (default 60)
+
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
+
+from flask import Flask, jsonify
+
+logger = logging.getLogger(__name__)
+
+WARMUP_RETRIES = int(os.getenv("A2A_WARMUP_RETRIES", "-1"))
+WARMUP_BACKOFF = float(os.getenv("A2A_WARMUP_BACKOFF", "1"))
+WARMUP_MAX_BACKOFF = float(os.getenv("A2A_WARMUP_MAX_BACKOFF", "60"))
+
+
+class StartupTracker:
+    """Records startup phases and the readiness state of one agent process"""
+
+    def __init__(self, agent_id: str):
+        self.agent_id = agent_id
+        self.created_at = time.time()
+        self._t0 = time.perf_counter()
+        self.phases: List[Dict[str, Any]] = []
+        self.serving_after: Optional[float] = None
+        self.ready_after: Optional[float] = None
+        self.error: Optional[str] = None
+        self._ready = threading.Event()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def _elapsed(self) -> float:
+        return time.perf_counter() - self._t0
+
+    @contextmanager
+    def phase(self, name: str):
+        """Time a named block and append it to the breakdown"""
+        start = self._elapsed()
+        status = "ok"
+        try:
+            yield
+        except Exception:
+            status = "failed"
+            raise
+        finally:
+            end = self._elapsed()
+            with self._lock:
+                self.phases.append({
+                    "name": name,
+                    "start_s": round(start, 4),
+                    "duration_s": round(end - start, 4),
+                    "thread": threading.current_thread().name,
+                    "status": status
+                })
+
+    def mark_serving(self) -> None:
+        """Called right before the server starts accepting connections"""
+        self.serving_after = self._elapsed()
+
+    @property
+    def is_ready(self) -> bool:
+        return self._ready.is_set()
+
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        return self._ready.wait(timeout)
+
+    def run_warmup(self, warm_up: Callable[[Callable], None], retries: Optional[int] = None,
+                   name: str = "warm-up") -> bool:
+        """Run ``warm_up(phase)`` in the calling thread until it succeeds and flip readiness
+
+        Failed attempts are retried up to ``retries`` times (A2A_WARMUP_RETRIES
+        by default, negative for no limit) with exponential backoff; /ready
+        reports the last error meanwhile. Returns whether warm-up succeeded.
+        """
+        retries = WARMUP_RETRIES if retries is None else retries
+        attempt = 0
+        while True:
+            try:
+                with self.phase(name if attempt == 0 else f"{name} (retry {attempt})"):
+                    warm_up(self.phase)
+                break
+            except Exception as e:
+                self.error = str(e)
+                if 0 <= retries <= attempt:
+                    logger.exception("Warm-up failed for %s", self.agent_id)
+                    return False
+                delay = min(WARMUP_BACKOFF * 2 ** attempt, WARMUP_MAX_BACKOFF)
+                logger.warning("Warm-up of %s failed (%s); retrying in %.1fs", self.agent_id, e, delay)
+                time.sleep(delay)
+                attempt += 1
+        self.error = None
+        self.ready_after = self._elapsed()
+        self._ready.set()
+        logger.info("%s ready after %.2fs (%s)", self.agent_id, self.ready_after,
+                    ", ".join(f"{p['name']}={p['duration_s']:.2f}s" for p in self.phases))
+        return True
+
+    def start_warmup(self, warm_up: Callable[[Callable], None], debug: bool = False) -> Optional[threading.Thread]:
+        """Start warm-up in a daemon thread.
+
+        With the Werkzeug reloader (``debug=True``) the outer watcher process
+        never serves requests, so warm-up only runs in the reloaded child.
+        """
+        if debug and os.environ.get("WERKZEUG_RUN_MAIN") != "true":
+            return None
+        if self._thread is not None:
+            return self._thread
+        self._thread = threading.Thread(
+            target=self.run_warmup, args=(warm_up,), name=f"{self.agent_id}-warmup", daemon=True
+        )
+        self._thread.start()
+        return self._thread
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            phases = list(self.phases)
+        return {
+            "agent": self.agent_id,
+            "pid": os.getpid(),
+            "ready": self.is_ready,
+            "error": self.error,
+            "uptime_s": round(self._elapsed(), 3),
+            "serving_after_s": None if self.serving_after is None else round(self.serving_after, 4),
+            "ready_after_s": None if self.ready_after is None else round(self.ready_after, 4),
+            "phases": phases
+        }
+
+
+def init_startup(app: Flask, tracker: StartupTracker) -> None:
+    """Register the /ready and /startup endpoints on ``app``"""
+
+    @app.route("/ready", methods=["GET"])
+    def readiness_check():
+        if tracker.is_ready:
+            return jsonify({"status": "ready", "protocol": "A2A v0.2"})
+        status = "failed" if tracker.error else "pending"
+        return jsonify({"status": status, "protocol": "A2A v0.2", "error": tracker.error}), 503
+
+    @app.route("/startup", methods=["GET"])
+    def startup_report():
+        return jsonify(tracker.report())
@@ -0,0 +1,85 @@
+"""
+Author: SURYA DEEP SINGH
+LinkedIn: https://www.linkedin.com/in/surya-deep-singh-b9b94813a/
+Medium: https://medium.com/@SuryaDeepSingh
+GitHub: https://github.com/SinghSuryaDeep
+"""
+# common/transport.py
+#
+# In-process transport for co-located agents. An agent hosted in the same
+# process registers its card and skill handlers here; A2AClient looks the
+# base URL up during discovery and, when found, calls the handler directly
+# with the caller's Python objects instead of going through HTTP and JSON.
+
+import asyncio
+import logging
+import threading
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from common.jsonrpc import JsonRpcError
+from common.logs import log_context
+
+logger = logging.getLogger(__name__)
+
+SkillHandler = Callable[[Dict[str, Any]], Dict[str, Any]]
+
+
+class LocalAgent:
+    """An agent card plus the synchronous skill handlers behind it"""
+
+    def __init__(self, agent_card: Dict[str, Any], handlers: Dict[str, SkillHandler]):
+        self.agent_card = agent_card
+        self.handlers = handlers
+
+    @property
+    def agent_id(self) -> str:
+        return self.agent_card.get("metadata", {}).get("id", "unknown")
+
+    async def invoke(self, skill_id: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Run a skill handler off the event loop and return its result object.
+
+        Handlers are the same functions the HTTP endpoints call, so they keep
+        their blocking behaviour (and their own event loops) in a worker thread.
+        """
+        handler = self.handlers.get(skill_id)
+        if handler is None:
+            raise JsonRpcError(-32601, f"Method not found: {skill_id}", http_status=404)
+        try:
+            # The worker thread gets a copy of this context, so its records carry the agent
+            with log_context(agent=self.agent_id):
+                return await asyncio.to_thread(handler, params)
+        except JsonRpcError:
+            raise
+        except Exception as e:
+            # Same error shape the HTTP endpoints return for unexpected failures
+            logger.exception("Error during in-process skill invocation")
+            raise JsonRpcError(-32603, "Internal error", data=str(e), http_status=500) from e
+
+
+_registry: Dict[str, LocalAgent] = {}
+_registry_lock = threading.Lock()
+
+
+def _normalize(url: str) -> str:
+    return url.rstrip("/").lower()
+
+
+def register_local_agent(
+    agent_card: Dict[str, Any],
+    handlers: Dict[str, SkillHandler],
+    aliases: Iterable[str] = ()
+) -> LocalAgent:
+    """Make an agent reachable in-process under its card URL and any aliases"""
+    agent = LocalAgent(agent_card, handlers)
+    urls = [agent_card.get("spec", {}).get("url", "")] + list(aliases)
+    with _registry_lock:
+        for url in urls:
+            if url:
+                _registry[_normalize(url)] = agent
+    return agent
+
+
+def get_local_agent(base_url: str) -> Optional[LocalAgent]:
+    """Return the co-located agent serving ``base_url``, if any"""
+    with _registry_lock:
+        return _registry.get(_normalize(base_url))
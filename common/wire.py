@@ -0,0 +1,183 @@
+"""
+Author: SURYA DEEP SINGH
+LinkedIn: https://www.linkedin.com/in/surya-deep-singh-b9b94813a/
+Medium: https://medium.com/@SuryaDeepSingh
+GitHub: https://github.com/SinghSuryaDeep
+"""
+# common/wire.py
+#
+# Wire formats for JSON-RPC bodies. Requests are decoded according to their
+# Content-Type and responses encoded according to the Accept header:
+#   application/json     – orjson when installed, stdlib json otherwise
+#   application/msgpack  – when msgpack is installed
+# Clients that send plain JSON and no Accept header get JSON, as before.
+# Bulk skills stream their results as application/x-ndjson instead, and may
+# take their input the same way: a JSON-RPC request line, then one item per line.
+# A streamed body is produced after the view has returned, so it runs in a
+# copy of the request's context variables (log context, token usage) and with
+# the Flask request context still pushed.
+
+import contextvars
+import json
+from typing import Any, Iterable, Iterator, Optional, Tuple
+
+from flask import Response, request, stream_with_context
+
+from common.jsonrpc import JsonRpcError
+
+try:
+    import orjson
+except ImportError:  # optional fast JSON encoder
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # optional binary format
+    msgpack = None
+
+MEDIA_JSON = "application/json"
+MEDIA_MSGPACK = "application/msgpack"
+MEDIA_NDJSON = "application/x-ndjson"
+_MSGPACK_ALIASES = (MEDIA_MSGPACK, "application/x-msgpack", "application/vnd.msgpack")
+
+
+def dumps_json(obj: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def dumps_canonical(obj: Any) -> bytes:
+    """JSON with sorted keys: equal data always gives equal bytes, whatever the key order"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SORT_KEYS)
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False, sort_keys=True).encode("utf-8")
+
+
+def loads_json(data: bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _base_media_type(content_type: Optional[str]) -> str:
+    return (content_type or "").split(";", 1)[0].strip().lower()
+
+
+def encode(obj: Any, media_type: str) -> bytes:
+    if media_type == MEDIA_MSGPACK:
+        if msgpack is None:
+            raise ValueError("msgpack is not installed")
+        return msgpack.packb(obj, use_bin_type=True)
+    return dumps_json(obj)
+
+
+def decode(data: bytes, content_type: Optional[str]) -> Any:
+    if _base_media_type(content_type) in _MSGPACK_ALIASES:
+        if msgpack is None:
+            raise ValueError("msgpack is not installed")
+        return msgpack.unpackb(data, raw=False)
+    return loads_json(data)
+
+
+def negotiate(accept: Optional[str]) -> str:
+    """Pick the response media type for an Accept header (JSON unless msgpack is preferred)"""
+    if not accept:
+        return MEDIA_JSON
+    best, best_q = MEDIA_JSON, -1.0
+    for position, item in enumerate(accept.split(",")):
+        parts = [p.strip() for p in item.split(";")]
+        media = parts[0].lower()
+        q = 1.0
+        for param in parts[1:]:
+            if param.startswith("q="):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        if media in _MSGPACK_ALIASES and msgpack is not None:
+            candidate = MEDIA_MSGPACK
+        elif media in (MEDIA_JSON, "application/*", "*/*"):
+            candidate = MEDIA_JSON
+        else:
+            continue
+        # Earlier entries win ties, as listed by the client
+        if q > best_q:
+            best, best_q = candidate, q
+    return best if best_q > 0 else MEDIA_JSON
+
+
+def read_request() -> Any:
+    """Decode the current Flask request body as JSON or msgpack"""
+    data = request.get_data(cache=True)
+    try:
+        payload = decode(data, request.content_type)
+    except Exception as e:
+        raise JsonRpcError(-32700, "Parse error", data=str(e)) from e
+    if not isinstance(payload, dict):
+        raise JsonRpcError(-32600, "Invalid Request - Expected a JSON-RPC object")
+    return payload
+
+
+def read_ndjson_request() -> Tuple[dict, Iterator[Any]]:
+    """The JSON-RPC request on the first line of an NDJSON body, and a lazy iterator over the other lines
+
+    Lines that are not valid JSON come out of the iterator as JsonRpcError
+    instances so the caller can report them per item and carry on.
+    """
+    stream = request.stream
+    first = stream.readline()
+    try:
+        payload = loads_json(first)
+    except Exception as e:
+        raise JsonRpcError(-32700, "Parse error", data=str(e)) from e
+    if not isinstance(payload, dict):
+        raise JsonRpcError(-32600, "Invalid Request - Expected a JSON-RPC object")
+
+    def items() -> Iterator[Any]:
+        for line in stream:
+            if not line.strip():
+                continue
+            try:
+                yield loads_json(line)
+            except Exception as e:
+                yield JsonRpcError(-32700, f"Parse error: {e}")
+    return payload, items()
+
+
+def respond(payload: Any, status: int = 200) -> Response:
+    """Encode ``payload`` in the format negotiated from the request's Accept header"""
+    media_type = negotiate(request.headers.get("Accept"))
+    return Response(encode(payload, media_type), status=status, mimetype=media_type)
+
+
+def _run_in_context(context: contextvars.Context, chunks: Iterator[bytes]) -> Iterator[bytes]:
+    """Advance ``chunks`` inside ``context`` one step at a time"""
+    try:
+        while True:
+            try:
+                yield context.run(next, chunks)
+            except StopIteration:
+                return
+    finally:
+        close = getattr(chunks, "close", None)
+        if close is not None:
+            context.run(close)
+
+
+def stream_ndjson(records: Iterable[Any]) -> Response:
+    """Stream ``records`` as newline-delimited JSON, one line per record as it is produced
+
+    Call it from the view: the context variables set at that point stay in
+    effect while the body is generated.
+    """
+    def lines() -> Iterator[bytes]:
+        for record in records:
+            yield dumps_json(record) + b"\n"
+    body = _run_in_context(contextvars.copy_context(), lines())
+    return Response(stream_with_context(body), mimetype=MEDIA_NDJSON)
+
+
+def ndjson_response(records: Iterable[Any]) -> Response:
+    """Newline-delimited JSON for records that are already computed, sent as one ordinary body"""
+    return Response(b"".join(dumps_json(record) + b"\n" for record in records), mimetype=MEDIA_NDJSON)
@@ -6,96 +6,174 @@ GitHub: https://github.com/SinghSuryaDeep
 """
 # # # diagnostics_logic.py
 import asyncio
-import json
 import logging
-from autogen_agentchat.agents import AssistantAgent
-from autogen_agentchat.conditions import TextMentionTermination
-from autogen_agentchat.teams import RoundRobinGroupChat
-from autogen_agentchat.messages import TextMessage
-from autogen_agentchat.base._task import TaskResult
-from autogen_watsonx_client.config import WatsonxClientConfiguration
-from autogen_watsonx_client.client import WatsonXChatCompletionClient
+import threading
+from typing import TYPE_CHECKING, List, Optional
 import os
 from dotenv import load_dotenv
+from common.credentials import current_token
+from common.limits import MAX_MESSAGES
+from common.prompts import budget_for, parse_json_reply, record_usage, render_prompt
+from triage import TriageDecision, triage_batch
 load_dotenv()
 url=os.getenv("WATSONX_URL")
 project_id=os.getenv("WATSONX_PROJECT_ID")
 apikey=os.getenv("WATSONX_APIKEY")
 model_id=os.getenv("WATSONX_MODEL")
 
-wx_config = WatsonxClientConfiguration(
-    project_id=project_id,
-    url=url,
-    api_key=apikey,
-    model_id=model_id
+logger = logging.getLogger(__name__)
+# Escalated patients of one batch analysed by the LLM at the same time
+BATCH_CONCURRENCY = int(os.getenv("DIAGNOSTICS_BATCH_CONCURRENCY", "4"))
+
+SKILL_ID = "analyze-patient-data"
+DIAGNOSIS_PROMPT = (
+    "Patient symptoms: {symptoms}\n"
+    "Vitals: {vitals}\n"
+    "{triage}"
+    "Give a probable diagnosis and a risk level (Low, Medium or High). "
+    "Reply with only this JSON object in a ```json block and nothing else:\n"
+    '{{"condition":"<probable condition>","risk":"<Low|Medium|High>"}}'
 )
-watsonx_client = WatsonXChatCompletionClient(**wx_config)
 
-async def analyze_patient_data_async(patient_data: dict) -> TaskResult:
+if TYPE_CHECKING:
+    from autogen_agentchat.base._task import TaskResult
+
+# autogen and the watsonx client are imported and built lazily so the server
+# can answer discovery and health checks while warm_up() runs in the background
+_client_lock = threading.Lock()
+_watsonx_client = None
+_client_token = None
+
+def get_watsonx_client():
+    """The watsonx client, rebuilt whenever the shared IAM token has been refreshed"""
+    global _watsonx_client, _client_token
+    token = current_token()
+    with _client_lock:
+        if _watsonx_client is None or token != _client_token:
+            from autogen_watsonx_client.config import WatsonxClientConfiguration
+            from autogen_watsonx_client.client import WatsonXChatCompletionClient
+            # Authenticate with the broker's token; the API key only without a broker
+            auth = {"token": token} if token else {"api_key": apikey}
+            budget = budget_for(SKILL_ID)
+            wx_config = WatsonxClientConfiguration(
+                project_id=project_id,
+                url=url,
+                model_id=model_id,
+                max_tokens=budget.max_new_tokens,
+                stop=list(budget.stop),
+                **auth
+            )
+            _watsonx_client = WatsonXChatCompletionClient(**wx_config)
+            _client_token = token
+    return _watsonx_client
+
+def _reset_after_fork() -> None:
+    # Connection pools must not be shared with the parent of a pre-fork worker
+    global _client_lock, _watsonx_client, _client_token
+    _client_lock = threading.Lock()
+    _watsonx_client = None
+    _client_token = None
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
 
-    symptoms = ", ".join(patient_data.get("symptoms", []))
-    vitals = patient_data.get("vitals", {})
+def warm_up(phase) -> None:
+    """Import autogen and build the watsonx client; ``phase`` times each step"""
+    with phase("import autogen_agentchat"):
+        import autogen_agentchat.agents
+        import autogen_agentchat.conditions
+        import autogen_agentchat.teams
+    with phase("import autogen_watsonx_client"):
+        import autogen_watsonx_client.client
+    with phase("fetch IAM token"):
+        current_token()
+    with phase("build watsonx client"):
+        get_watsonx_client()
+
+async def analyze_patient_data_async(patient_data: dict, annotation: Optional[str] = None) -> "TaskResult":
+    from autogen_agentchat.agents import AssistantAgent
+    from autogen_agentchat.conditions import MaxMessageTermination
+    from autogen_agentchat.messages import TextMessage
+    from autogen_agentchat.teams import RoundRobinGroupChat
+    from autogen_core.model_context import BufferedChatCompletionContext
+
+    # Counted before the agent is built, so an oversized prompt costs nothing
+    prompt = render_prompt(
+        SKILL_ID, DIAGNOSIS_PROMPT,
+        symptoms=", ".join(patient_data.get("symptoms", [])) or "none",
+        vitals=patient_data.get("vitals", {}),
+        triage=f"Rule-based triage: {annotation}\n" if annotation else ""
+    )
 
     diagnostic_agent = AssistantAgent(
         name="Diagonstic_agent",
-        model_client=watsonx_client
+        model_client=get_watsonx_client(),
+        # Only the most recent messages are sent back to the model
+        model_context=BufferedChatCompletionContext(buffer_size=MAX_MESSAGES)
     )
-    termination = TextMentionTermination("TERMINATE")
+    # The task and one reply: the JSON is complete after the agent's first turn,
+    # and further turns would only resend the conversation to the model
+    termination = MaxMessageTermination(2)
 
     team = RoundRobinGroupChat(
         [diagnostic_agent],
         termination_condition=termination
     )
 
-    
-    # Define prompt
-    prompt = f"""
-    Analyze the following patient data:
-    Symptoms: {symptoms}
-    Vitals: {vitals}
-
-    Your task is to provide a probable diagnosis and an associated risk level (Low, Medium, or High).
-    Your response MUST BE ONLY the following JSON object. Do not include any other text, greetings, or explanations.
-
-    ```json
-    {{
-      "condition": "A probable condition based on the data",
-      "risk": "Low/Medium/High"
-    }}
-    ```
-    """
-
-    return await team.run(task=prompt)
+    task_result = await team.run(task=prompt.text)
+    for message in task_result.messages:
+        if isinstance(message, TextMessage) and message.source == "Diagonstic_agent":
+            usage = message.models_usage
+            record_usage(prompt, message.content,
+                         usage.prompt_tokens if usage else None, usage.completion_tokens if usage else None)
+    return task_result
 
 
 # JSON extractor from TaskResult
-def extract_json_from_message(task_result: TaskResult) -> dict:
+def extract_json_from_message(task_result: "TaskResult") -> dict:
+    from autogen_agentchat.messages import TextMessage
     if not task_result.messages:
         return {}
 
     for message in reversed(task_result.messages):
         if isinstance(message, TextMessage) and message.source == "Diagonstic_agent":
-            content = message.content
-            start_tag, end_tag = '```json', '```'
-
-            start_index = content.find(start_tag)
-            if start_index != -1:
-                json_start = start_index + len(start_tag)
-                json_end = content.find(end_tag, json_start)
-                if json_end != -1:
-                    json_str = content[json_start:json_end].strip()
-                    try:
-                        return json.loads(json_str)
-                    except json.JSONDecodeError:
-                        continue
+            # The stop sequence usually cuts the reply inside the ```json block
+            diagnosis = parse_json_reply(message.content)
+            if diagnosis is not None:
+                return diagnosis
     return {}
 
-# Sync wrapper for API use
-def analyze_patient_data(patient_data: dict) -> dict:
+async def _analyze_escalated(patient_data: dict, decision: TriageDecision) -> dict:
     try:
-        task_result = asyncio.run(analyze_patient_data_async(patient_data))
-        return extract_json_from_message(task_result)
+        task_result = await analyze_patient_data_async(patient_data, decision.prompt_annotation())
+        diagnosis = extract_json_from_message(task_result)
+        if diagnosis:
+            diagnosis["triage"] = decision.summary()
+        return diagnosis
     except Exception as e:
-        logging.exception("Error during analysis")
+        logger.exception("Error during analysis")
         return {"error": str(e), "status": "failed"}
 
+async def analyze_patient_batch_async(patients: List[dict]) -> List[dict]:
+    """Triage the whole batch in one vectorized pass; only escalated patients reach the LLM"""
+    decisions = triage_batch(patients)
+    results = [decision.diagnosis() for decision in decisions]
+    semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+    async def run(index: int) -> None:
+        async with semaphore:
+            results[index] = await _analyze_escalated(patients[index], decisions[index])
+
+    escalated = [i for i, result in enumerate(results) if result is None]
+    logger.info("Triage: %d of %d patients answered by rules", len(patients) - len(escalated), len(patients))
+    if escalated:
+        await asyncio.gather(*(run(i) for i in escalated))
+    return results
+
+# Sync wrappers for API use
+def analyze_patient_data(patient_data: dict) -> dict:
+    return analyze_patient_batch([patient_data])[0]
+
+def analyze_patient_batch(patients: List[dict]) -> List[dict]:
+    return asyncio.run(analyze_patient_batch_async(patients))
+
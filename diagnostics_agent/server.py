@@ -7,13 +7,32 @@ LinkedIn: https://www.linkedin.com/in/surya-deep-singh-b9b94813a/
 import asyncio
 import logging
 import json
-from flask import Flask, jsonify, request
-from diagnostics_logic import analyze_patient_data
+from flask import Flask, jsonify
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from diagnostics_logic import analyze_patient_batch, analyze_patient_data, warm_up
+from common.jsonrpc import JsonRpcError
+from common.limits import MAX_INPUT_TOKENS, exceeds_input_budget
+from common.logs import setup_logging
+from common.memtrack import init_memtrack
+from common.skills import SkillDispatcher
+from common.compression import PrecompressedDocument, init_compression
+from common.profiling import init_profiling
+from common.prefork import parse_server_args, serve_prefork
+from common.startup import StartupTracker, init_startup
 
-logging.basicConfig(level=logging.INFO)
+setup_logging("diagnostics-agent")
 logger = logging.getLogger(__name__)
 
+MAX_BATCH_SIZE = int(os.getenv("DIAGNOSTICS_MAX_BATCH", "100"))
+
 app = Flask(__name__)
+startup = StartupTracker("diagnostics-agent")
+init_startup(app, startup)
+init_compression(app)
+init_profiling(app)
+init_memtrack(app)
 
 # A2A Compliant Agent Card
 agent_card = {
@@ -99,93 +118,103 @@ agent_card = {
                     "endpoint": "/skills/analyze-patient-data",
                     "contentType": "application/json"
                 }
+            },
+            {
+                "id": "analyze-patient-batch",
+                "name": "Analyze Patient Batch",
+                "description": "Triage a batch of patients by vital signs; only unclear cases are analysed by the LLM",
+                "tags": ["diagnosis", "healthcare", "triage", "batch"],
+                "inputSchema": {
+                    "type": "object",
+                    "properties": {
+                        "patients": {
+                            "type": "array",
+                            "items": {
+                                "type": "object",
+                                "properties": {
+                                    "symptoms": {"type": "array", "items": {"type": "string"}},
+                                    "vitals": {"type": "object"}
+                                },
+                                "required": ["symptoms"]
+                            },
+                            "maxItems": MAX_BATCH_SIZE
+                        }
+                    },
+                    "required": ["patients"]
+                },
+                "outputSchema": {
+                    "type": "object",
+                    "properties": {
+                        "diagnoses": {
+                            "type": "array",
+                            "items": {"type": "object"}
+                        }
+                    },
+                    "required": ["diagnoses"]
+                },
+                "invocation": {
+                    "method": "POST",
+                    "endpoint": "/skills/analyze-patient-batch",
+                    "contentType": "application/json"
+                }
             }
         ]
     }
 }
 
+# Serialized and compressed once – the card never changes at runtime
+agent_card_document = PrecompressedDocument(agent_card)
+
+# Skill handlers
+
+def run_analyze_patient_data(params: dict) -> dict:
+    patient_data = params.get("patient_data")
+    
+    if not patient_data:
+        raise JsonRpcError(-32602, "Invalid params - Missing 'patient_data'")
+    if exceeds_input_budget(patient_data):
+        raise JsonRpcError(-32602, f"Invalid params - 'patient_data' exceeds {MAX_INPUT_TOKENS} tokens")
+    
+    return {"diagnosis": analyze_patient_data(patient_data)}
+
+def run_analyze_patient_batch(params: dict) -> dict:
+    patients = params.get("patients")
+
+    if not isinstance(patients, list) or not patients:
+        raise JsonRpcError(-32602, "Invalid params - 'patients' must be a non-empty list")
+    if len(patients) > MAX_BATCH_SIZE:
+        raise JsonRpcError(-32602, f"Invalid params - at most {MAX_BATCH_SIZE} patients per batch")
+    for i, patient_data in enumerate(patients):
+        if not isinstance(patient_data, dict):
+            raise JsonRpcError(-32602, f"Invalid params - patients[{i}] must be an object")
+        if exceeds_input_budget(patient_data):
+            raise JsonRpcError(-32602, f"Invalid params - patients[{i}] exceeds {MAX_INPUT_TOKENS} tokens")
+
+    return {"diagnoses": analyze_patient_batch(patients)}
+
+skills = SkillDispatcher(agent_card, {
+    "analyze-patient-data": run_analyze_patient_data,
+    "analyze-patient-batch": run_analyze_patient_batch
+})
+# Validated against the card schemas – shared by the HTTP endpoints and the in-process transport
+skill_handlers = skills.validated_handlers()
+
 # A2A Protocol Endpoints
 
 @app.route("/.well-known/agent.json", methods=["GET"])
 def agent_manifest():
     """A2A Agent Discovery Endpoint"""
-    return jsonify(agent_card)
+    return agent_card_document.response()
 
 @app.route("/skills/analyze-patient-data", methods=["POST"])
 def analyze_skill():
     """A2A Compliant Skill Invocation"""
-    try:
-        # A2A uses JSON-RPC 2.0 format for requests
-        request_data = request.json
-        
-        # Validate JSON-RPC 2.0 structure
-        if not all(key in request_data for key in ["jsonrpc", "method", "params", "id"]):
-            return jsonify({
-                "jsonrpc": "2.0",
-                "error": {
-                    "code": -32600,
-                    "message": "Invalid Request - Missing required JSON-RPC fields"
-                },
-                "id": request_data.get("id")
-            }), 400
-        
-        if request_data["jsonrpc"] != "2.0":
-            return jsonify({
-                "jsonrpc": "2.0", 
-                "error": {
-                    "code": -32600,
-                    "message": "Invalid Request - jsonrpc must be '2.0'"
-                },
-                "id": request_data.get("id")
-            }), 400
-            
-        if request_data["method"] != "invoke":
-            return jsonify({
-                "jsonrpc": "2.0",
-                "error": {
-                    "code": -32601,
-                    "message": f"Method not found: {request_data['method']}"
-                },
-                "id": request_data["id"]
-            }), 404
-        
-        # Extract parameters
-        params = request_data.get("params", {})
-        patient_data = params.get("patient_data")
-        
-        if not patient_data:
-            return jsonify({
-                "jsonrpc": "2.0",
-                "error": {
-                    "code": -32602,
-                    "message": "Invalid params - Missing 'patient_data'"
-                },
-                "id": request_data["id"]
-            }), 400
-        
-        # Perform analysis
-        result = analyze_patient_data(patient_data)
-        
-        # A2A JSON-RPC 2.0 Response
-        return jsonify({
-            "jsonrpc": "2.0",
-            "result": {
-                "diagnosis": result
-            },
-            "id": request_data["id"]
-        })
-        
-    except Exception as e:
-        logger.exception("Error during skill invocation")
-        return jsonify({
-            "jsonrpc": "2.0",
-            "error": {
-                "code": -32603,
-                "message": "Internal error",
-                "data": str(e)
-            },
-            "id": request_data.get("id") if request_data else None
-        }), 500
+    return skills.handle("analyze-patient-data")
+
+@app.route("/skills/analyze-patient-batch", methods=["POST"])
+def analyze_batch_skill():
+    """A2A Compliant Skill Invocation"""
+    return skills.handle("analyze-patient-batch")
 
 # Health check endpoint
 @app.route("/health", methods=["GET"])
@@ -193,4 +222,12 @@ def health_check():
     return jsonify({"status": "healthy", "protocol": "A2A v0.2"})
 
 if __name__ == "__main__":
-    app.run(host="127.0.0.1", port=8001, debug=True)
\ No newline at end of file
+    args = parse_server_args(port=8001)
+    if args.workers > 1:
+        serve_prefork(app, args.host, args.port, args.workers, warm_up=warm_up, startup=startup,
+                      memory_report_interval=args.memory_report_interval,
+                      memory_report_path=args.memory_report)
+    else:
+        startup.start_warmup(warm_up, debug=True)
+        startup.mark_serving()
+        app.run(host=args.host, port=args.port, debug=True)
\ No newline at end of file
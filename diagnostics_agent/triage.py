@@ -0,0 +1,179 @@
+"""
+Author: SURYA DEEP SINGH
+LinkedIn: https://www.linkedin.com/in/surya-deep-singh-b9b94813a/
+Medium: https://medium.com/@SuryaDeepSingh
+GitHub: https://github.com/SinghSuryaDeep
+"""
+# triage.py
+#
+# Rule-based triage in front of the LLM. Vitals are scored with a NEWS2-style
+# early-warning score, vectorized with NumPy so a whole batch is scored in one
+# pass. Depending on configurable thresholds a patient is
+#   - "low":      clearly low risk, answered without an LLM call
+#   - "critical": clearly critical, answered without an LLM call, or passed to
+#                 the LLM with the score attached (TRIAGE_CRITICAL_ACTION=annotate)
+#   - "escalate": sent to analyze_patient_data_async with the score attached
+# A low-risk fast path needs enough measured vitals and no red-flag symptom,
+# so missing data always goes to the LLM.
+
+import os
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from vitals import VitalsBatch, vitals_to_arrays
+
+DEFAULT_RED_FLAGS = (
+    "chest pain", "shortness of breath", "difficulty breathing", "syncope", "fainting",
+    "seizure", "confusion", "slurred speech", "weakness on one side", "severe headache",
+    "coughing blood", "vomiting blood", "suicidal"
+)
+
+
+def _env_list(name: str, default: tuple) -> tuple:
+    value = os.getenv(name)
+    if not value:
+        return default
+    return tuple(item.strip().lower() for item in value.split(",") if item.strip())
+
+
+@dataclass
+class TriageConfig:
+    enabled: bool = os.getenv("TRIAGE_ENABLED", "1") == "1"
+    # Highest total score still answered as low risk (no single parameter may score 3)
+    low_max_score: int = int(os.getenv("TRIAGE_LOW_MAX_SCORE", "0"))
+    # Measured parameters required before a patient can be called low risk (of 7)
+    low_min_measured: int = int(os.getenv("TRIAGE_LOW_MIN_MEASURED", "5"))
+    # Total score from which a patient is treated as critical
+    critical_min_score: int = int(os.getenv("TRIAGE_CRITICAL_MIN_SCORE", "7"))
+    # "answer" returns High risk directly, "annotate" still asks the LLM
+    critical_action: str = os.getenv("TRIAGE_CRITICAL_ACTION", "answer")
+    red_flags: tuple = field(default_factory=lambda: _env_list("TRIAGE_RED_FLAGS", DEFAULT_RED_FLAGS))
+
+
+# (upper bounds, points); a value v scores points[i] for the first bound with v <= bound
+_BANDS = {
+    "respiratory_rate": ([8, 11, 20, 24, np.inf], [3, 1, 0, 2, 3]),
+    "spo2": ([91, 93, 95, np.inf], [3, 2, 1, 0]),
+    "temperature_c": ([35.0, 36.0, 38.0, 39.0, np.inf], [3, 1, 0, 1, 2]),
+    "systolic": ([90, 100, 110, 219, np.inf], [3, 2, 1, 0, 3]),
+    "pulse": ([40, 50, 90, 110, 130, np.inf], [3, 1, 0, 1, 2, 3]),
+}
+SCORED_FIELDS = tuple(_BANDS) + ("consciousness", "supplemental_o2")
+
+
+@dataclass
+class TriageScores:
+    """Per-parameter and total scores for a batch (all arrays have one entry per patient)"""
+    components: Dict[str, np.ndarray]
+    total: np.ndarray
+    max_single: np.ndarray
+    measured: np.ndarray
+
+
+def score_batch(batch: VitalsBatch) -> TriageScores:
+    """Vectorized NEWS2-style scoring; missing values score 0 and are not counted as measured"""
+    components = {}
+    measured = np.zeros(len(batch), dtype=np.int64)
+    for name, (bounds, points) in _BANDS.items():
+        values = batch[name]
+        present = ~np.isnan(values)
+        # searchsorted(side="left") gives the first bound >= value
+        index = np.searchsorted(np.asarray(bounds, dtype=np.float64), np.where(present, values, 0.0), side="left")
+        components[name] = np.where(present, np.asarray(points)[index], 0)
+        measured += present
+    consciousness = batch["consciousness"]
+    components["consciousness"] = np.where(consciousness == 1.0, 3, 0)
+    measured += ~np.isnan(consciousness)
+    oxygen = batch["supplemental_o2"]
+    components["supplemental_o2"] = np.where(oxygen == 1.0, 2, 0)
+    measured += ~np.isnan(oxygen)
+
+    stacked = np.vstack([components[name] for name in SCORED_FIELDS])
+    return TriageScores(components, stacked.sum(axis=0), stacked.max(axis=0), measured)
+
+
+def _red_flags(symptoms: Any, red_flags: tuple) -> List[str]:
+    text = " ".join(symptoms).lower() if isinstance(symptoms, (list, tuple)) else str(symptoms or "").lower()
+    return [flag for flag in red_flags if flag in text]
+
+
+@dataclass
+class TriageDecision:
+    action: str  # "low", "critical" or "escalate"
+    score: int
+    max_single: int
+    measured: int
+    components: Dict[str, int]
+    red_flags: List[str]
+    vitals: Dict[str, Optional[float]]
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "source": "rules",
+            "early_warning_score": self.score,
+            "action": self.action,
+            "measured_parameters": self.measured,
+            "components": self.components,
+            "red_flags": self.red_flags
+        }
+
+    def prompt_annotation(self) -> str:
+        """One-line score summary handed to the LLM for escalated patients"""
+        parts = [f"{name}={points}" for name, points in self.components.items() if points]
+        flags = f"; red flags: {', '.join(self.red_flags)}" if self.red_flags else ""
+        return (f"Early warning score {self.score} ({', '.join(parts) or 'no abnormal parameters'}; "
+                f"{self.measured} parameters measured{flags})")
+
+    def diagnosis(self) -> Optional[Dict[str, Any]]:
+        """Rule-based answer for decided patients, None when the LLM is needed"""
+        if self.action == "low":
+            return {
+                "condition": "No acute abnormality in vital signs",
+                "risk": "Low",
+                "triage": self.summary()
+            }
+        if self.action == "critical":
+            return {
+                "condition": "Critical physiological derangement - urgent clinical review",
+                "risk": "High",
+                "triage": self.summary()
+            }
+        return None
+
+
+def triage_batch(patients: List[Dict[str, Any]], config: Optional[TriageConfig] = None) -> List[TriageDecision]:
+    """Score and classify a batch of patient_data dicts in one vectorized pass"""
+    config = config or TriageConfig()
+    batch = vitals_to_arrays([p.get("vitals") for p in patients])
+    scores = score_batch(batch)
+
+    critical = scores.total >= config.critical_min_score
+    low = (
+        (scores.total <= config.low_max_score)
+        & (scores.max_single < 3)
+        & (scores.measured >= config.low_min_measured)
+    )
+    decisions = []
+    for i, patient in enumerate(patients):
+        flags = _red_flags(patient.get("symptoms", []), config.red_flags)
+        if not config.enabled:
+            action = "escalate"
+        elif critical[i]:
+            action = "critical" if config.critical_action == "answer" else "escalate"
+        elif low[i] and not flags:
+            action = "low"
+        else:
+            action = "escalate"
+        row = batch.row(i)
+        decisions.append(TriageDecision(
+            action=action,
+            score=int(scores.total[i]),
+            max_single=int(scores.max_single[i]),
+            measured=int(scores.measured[i]),
+            components={name: int(scores.components[name][i]) for name in SCORED_FIELDS},
+            red_flags=flags,
+            vitals={k: (None if np.isnan(v) else v) for k, v in row.items()}
+        ))
+    return decisions
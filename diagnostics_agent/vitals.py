@@ -0,0 +1,163 @@
+"""
+Author: SURYA DEEP SINGH
+LinkedIn: https://www.linkedin.com/in/surya-deep-singh-b9b94813a/
+Medium: https://medium.com/@SuryaDeepSingh
+GitHub: https://github.com/SinghSuryaDeep
+"""
+# vitals.py
+#
+# Normalizes free-form vitals ({"bp": "150/95", "temperature": "99.2 F",
+# "spo2": "94%", "pulse": "110 bpm"}) into typed numbers, and a batch of them
+# into column arrays (NaN where a value is missing or unreadable) for the
+# vectorized scorer in triage.py.
+
+import math
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+# Canonical field -> accepted keys (compared case-insensitively)
+FIELD_ALIASES = {
+    "respiratory_rate": ("respiratory_rate", "rr", "resp_rate", "respiration", "breathing_rate"),
+    "spo2": ("spo2", "sp02", "oxygen_saturation", "o2_sat", "o2sat", "saturation"),
+    "temperature_c": ("temperature", "temp", "temperature_c", "temperature_f"),
+    "systolic": ("systolic", "sbp"),
+    "diastolic": ("diastolic", "dbp"),
+    "pulse": ("pulse", "heart_rate", "hr", "heartrate"),
+    "consciousness": ("consciousness", "avpu", "acvpu", "mental_status", "gcs"),
+    "supplemental_o2": ("supplemental_o2", "on_oxygen", "oxygen", "o2")
+}
+BLOOD_PRESSURE_KEYS = ("bp", "blood_pressure", "bloodpressure")
+
+NUMERIC_FIELDS = ("respiratory_rate", "spo2", "temperature_c", "systolic", "diastolic", "pulse")
+# Consciousness is encoded as 0 for alert, 1 for new confusion / voice / pain / unresponsive
+ALL_FIELDS = NUMERIC_FIELDS + ("consciousness", "supplemental_o2")
+
+_NUMBER = re.compile(r"[-+]?\d+(?:\.\d+)?")
+_WORD = re.compile(r"[a-z]+")
+# Single AVPU letters only count as the whole value ("a bit drowsy" is not "A")
+_ALERT_LETTERS = ("a",)
+_NOT_ALERT_LETTERS = ("c", "v", "p", "u")
+_ALERT_WORDS = ("alert", "awake", "normal", "oriented")
+_NOT_ALERT_WORDS = ("confused", "confusion", "voice", "pain", "unresponsive", "drowsy")
+_NEGATIONS = ("no", "not")
+
+
+def _first_number(value: Any) -> float:
+    if value is None or isinstance(value, bool):
+        return math.nan
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = _NUMBER.search(str(value))
+    return float(match.group(0)) if match else math.nan
+
+
+def parse_temperature_c(value: Any, key: str = "temperature") -> float:
+    """Celsius from '99.2 F', '37.4C', '38,1 °C' or a bare number (>45 is taken as Fahrenheit)"""
+    if isinstance(value, str):
+        value = value.replace(",", ".")
+    number = _first_number(value)
+    if math.isnan(number):
+        return number
+    text = str(value).strip().lower()
+    fahrenheit = text.endswith("f") or "°f" in text or key.endswith("_f")
+    celsius = text.endswith("c") or "°c" in text or key.endswith("_c")
+    if fahrenheit or (not celsius and number > 45):
+        return round((number - 32.0) * 5.0 / 9.0, 2)
+    return number
+
+
+def parse_blood_pressure(value: Any) -> tuple:
+    """(systolic, diastolic) from '150/95', '150 / 95 mmHg' or {'systolic': .., 'diastolic': ..}"""
+    if isinstance(value, dict):
+        return _first_number(value.get("systolic")), _first_number(value.get("diastolic"))
+    numbers = _NUMBER.findall(str(value)) if value is not None else []
+    systolic = float(numbers[0]) if numbers else math.nan
+    diastolic = float(numbers[1]) if len(numbers) > 1 else math.nan
+    return systolic, diastolic
+
+
+def parse_consciousness(value: Any) -> float:
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        # A numeric value is read as a Glasgow Coma Scale score
+        return 0.0 if value >= 15 else 1.0
+    words = _WORD.findall(str(value).lower()) if value is not None else []
+    if len(words) == 1 and words[0] in _ALERT_LETTERS:
+        return 0.0
+    if len(words) == 1 and words[0] in _NOT_ALERT_LETTERS:
+        return 1.0
+    # Whole words, first one wins: "alert, no pain" is alert, "responds to pain" is not
+    for i, word in enumerate(words):
+        negated = i > 0 and words[i - 1] in _NEGATIONS
+        if word in _ALERT_WORDS:
+            return 1.0 if negated else 0.0
+        if word in _NOT_ALERT_WORDS and not negated:
+            return 1.0
+    return math.nan
+
+
+def parse_flag(value: Any) -> float:
+    if isinstance(value, bool):
+        return 1.0 if value else 0.0
+    if isinstance(value, (int, float)):
+        return 1.0 if value else 0.0
+    text = str(value).strip().lower() if value is not None else ""
+    if text in ("yes", "true", "y", "1", "on", "o2", "oxygen"):
+        return 1.0
+    if text in ("no", "false", "n", "0", "off", "air", "room air"):
+        return 0.0
+    # "2 L/min nasal cannula" and similar mean oxygen is being given
+    return 1.0 if re.search(r"\d+\s*l", text) else math.nan
+
+
+def normalize_vitals(vitals: Optional[Dict[str, Any]]) -> Dict[str, float]:
+    """Typed vitals for one patient; every field of ALL_FIELDS is present, NaN if unknown"""
+    normalized = {field: math.nan for field in ALL_FIELDS}
+    if not vitals:
+        return normalized
+    lowered = {str(k).strip().lower().replace(" ", "_").replace("-", "_"): v for k, v in vitals.items()}
+    for key in BLOOD_PRESSURE_KEYS:
+        if key in lowered:
+            normalized["systolic"], normalized["diastolic"] = parse_blood_pressure(lowered[key])
+            break
+    for field, aliases in FIELD_ALIASES.items():
+        for key in aliases:
+            if key not in lowered:
+                continue
+            value = lowered[key]
+            if field == "temperature_c":
+                normalized[field] = parse_temperature_c(value, key)
+            elif field == "consciousness":
+                normalized[field] = parse_consciousness(value)
+            elif field == "supplemental_o2":
+                normalized[field] = parse_flag(value)
+            else:
+                normalized[field] = _first_number(value)
+            break
+    return normalized
+
+
+@dataclass
+class VitalsBatch:
+    """Column arrays (float64, NaN = missing) for a batch of patients"""
+    columns: Dict[str, np.ndarray]
+
+    def __len__(self) -> int:
+        return len(next(iter(self.columns.values()))) if self.columns else 0
+
+    def __getitem__(self, field: str) -> np.ndarray:
+        return self.columns[field]
+
+    def row(self, index: int) -> Dict[str, float]:
+        return {field: float(values[index]) for field, values in self.columns.items()}
+
+
+def vitals_to_arrays(vitals_list: List[Optional[Dict[str, Any]]]) -> VitalsBatch:
+    """Normalize a batch of free-form vitals dicts into column arrays"""
+    columns = {field: np.full(len(vitals_list), np.nan, dtype=np.float64) for field in ALL_FIELDS}
+    for i, vitals in enumerate(vitals_list):
+        for field, value in normalize_vitals(vitals).items():
+            columns[field][i] = value
+    return VitalsBatch(columns)
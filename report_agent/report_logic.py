@@ -7,44 +7,93 @@ GitHub: https://github.com/SinghSuryaDeep
 
 ## report_logic.py
 from typing_extensions import TypedDict
-from pydantic import BaseModel
-from langchain_core.tools import tool
-from langgraph.graph import StateGraph, START, END
-from langchain_ibm import WatsonxToolkit
-from langchain_ibm.chat_models import ChatWatsonx
+from typing import Any, Iterable, Iterator, Optional, Tuple
+import itertools
 import json
+import threading
+import time
 import os
 from dotenv import load_dotenv
+from common.credentials import current_token
+from common.prompts import budget_for, record_usage, render_prompt
 load_dotenv()
 url=os.getenv("WATSONX_URL")
 project_id=os.getenv("WATSONX_PROJECT_ID")
 apikey=os.getenv("WATSONX_APIKEY")
 model_id=os.getenv("WATSONX_MODEL")
+# Reports of one bulk request generated at the same time, and how many
+# diagnoses are handed to the graph per batch
+BATCH_CONCURRENCY = int(os.getenv("REPORT_BATCH_CONCURRENCY", "4"))
+BATCH_CHUNK_SIZE = int(os.getenv("REPORT_BATCH_CHUNK_SIZE", "0")) or BATCH_CONCURRENCY * 4
 
-class ReportState(TypedDict):
+SKILL_ID = "generate-report"
+REPORT_PROMPT = "Format this diagnosis as structured JSON in a ```json block:\n{diagnosis}"
+
+class ReportState(TypedDict, total=False):
     diagnosis: dict
     formatted: str
+    # "string" (default) renders ``formatted``; "object" fills ``report`` instead
+    report_format: str
+    report: dict
+    # Tokens used by the agent node, summed into the summary of bulk requests
+    usage: dict
 
-class FormatInput(BaseModel):
-    diagnosis: dict
+# langgraph/langchain_ibm are imported and the watsonx client, tool and graph
+# built lazily so the server can answer discovery and health checks while
+# warm_up() runs in the background
+_lock = threading.RLock()
+_chat = None
+_chat_token = None
+_format_report_tool = None
+_report_graph = None
 
-watsonx = WatsonxToolkit(
-    url=url,
-    project_id=project_id,
-    apikey=apikey
-)
-chat = ChatWatsonx(
-    watsonx_client=watsonx.watsonx_client,
-    model_id=model_id,
-    temperature=0.0,
-)
-
-@tool("format_report", args_schema=FormatInput,
-      description="Generate JSON report from a diagnosis dict")
-def format_report(diagnosis: dict) -> str:
+def get_chat():
+    """The watsonx chat model, rebuilt whenever the shared IAM token has been refreshed"""
+    global _chat, _chat_token
+    token = current_token()
+    with _lock:
+        if _chat is None or token != _chat_token:
+            from langchain_ibm.chat_models import ChatWatsonx
+            if token:
+                # Authenticate with the broker's token instead of exchanging the API key again
+                from ibm_watsonx_ai import APIClient, Credentials
+                watsonx_client = APIClient(Credentials(url=url, token=token), project_id=project_id)
+            else:
+                from langchain_ibm import WatsonxToolkit
+                watsonx_client = WatsonxToolkit(
+                    url=url,
+                    project_id=project_id,
+                    apikey=apikey
+                ).watsonx_client
+            _chat = ChatWatsonx(
+                watsonx_client=watsonx_client,
+                model_id=model_id,
+                temperature=0.0,
+                max_tokens=budget_for(SKILL_ID).max_new_tokens,
+            )
+            _chat_token = token
+    return _chat
+
+def get_format_report_tool():
+    global _format_report_tool
+    with _lock:
+        if _format_report_tool is None:
+            from pydantic import BaseModel
+            from langchain_core.tools import tool
+
+            class FormatInput(BaseModel):
+                diagnosis: dict
+
+            _format_report_tool = tool(
+                "format_report", args_schema=FormatInput,
+                description="Generate JSON report from a diagnosis dict"
+            )(format_report)
+    return _format_report_tool
+
+def build_report(diagnosis: dict) -> dict:
     cond = diagnosis.get("condition", "Unknown")
     risk = diagnosis.get("risk", "Unknown")
-    report = {
+    return {
         "Condition": cond,
         "RiskLevel": risk,
         "Recommendations": [
@@ -52,18 +101,26 @@ def format_report(diagnosis: dict) -> str:
             "Monitor vitals daily"
         ]
     }
-    return json.dumps(report, indent=2)
+
+def format_report(diagnosis: dict) -> str:
+    return json.dumps(build_report(diagnosis), indent=2)
 
 def create_report_graph():
+    from langgraph.graph import StateGraph
+
     graph = StateGraph(ReportState)
 
     def agent_node(state: ReportState) -> dict:
-        prompt = f"Format this diagnosis as structured JSON:\n{state['diagnosis']}"
-        res = chat.invoke([{"role": "user", "content": prompt}])
-        return {"formatted": res.content}
+        prompt = render_prompt(SKILL_ID, REPORT_PROMPT, diagnosis=state["diagnosis"])
+        res = get_chat().invoke([{"role": "user", "content": prompt.text}], stop=list(prompt.budget.stop))
+        usage = res.usage_metadata or {}
+        return {"formatted": res.content,
+                "usage": record_usage(prompt, res.content, usage.get("input_tokens"), usage.get("output_tokens"))}
 
     def format_node(state: ReportState) -> dict:
-        s = format_report.invoke({"diagnosis": state["diagnosis"]})
+        if state.get("report_format") == "object":
+            return {"report": build_report(state["diagnosis"])}
+        s = get_format_report_tool().invoke({"diagnosis": state["diagnosis"]})
         return {"formatted": s}
 
     graph.add_node("agent", agent_node)
@@ -72,3 +129,91 @@ def create_report_graph():
     graph.add_edge("agent", "format")
     graph.set_finish_point("format")
     return graph.compile()
+
+def get_report_graph():
+    """The compiled report graph, built once per process"""
+    global _report_graph
+    with _lock:
+        if _report_graph is None:
+            _report_graph = create_report_graph()
+    return _report_graph
+
+def _reset_after_fork() -> None:
+    # Connection pools must not be shared with the parent of a pre-fork worker;
+    # the tool and compiled graph hold no connections and stay shared
+    global _lock, _chat, _chat_token
+    _lock = threading.RLock()
+    _chat = None
+    _chat_token = None
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+def warm_up(phase) -> None:
+    """Import langgraph/langchain_ibm and build the client and graph; ``phase`` times each step"""
+    with phase("import langgraph"):
+        import langgraph.graph
+        import langchain_core.tools
+    with phase("import langchain_ibm"):
+        import langchain_ibm
+    with phase("fetch IAM token"):
+        current_token()
+    with phase("build watsonx client"):
+        get_chat()
+    with phase("compile report graph"):
+        get_format_report_tool()
+        get_report_graph()
+
+def final_report(final_state: dict, report_format: str = "string"):
+    return final_state.get("report" if report_format == "object" else "formatted")
+
+def generate_reports(items: Iterable[Tuple[Any, Any]], report_format: str = "string",
+                     max_concurrency: int = BATCH_CONCURRENCY,
+                     chunk_size: Optional[int] = None) -> Iterator[dict]:
+    """Run the report graph over (id, diagnosis) pairs and yield each record as soon as it completes
+
+    ``items`` is consumed lazily, ``chunk_size`` at a time, so only one chunk of
+    diagnoses and reports is held in memory. An Exception in place of a
+    diagnosis is reported as an error record for that item.
+    """
+    # Build the graph now so a broken setup fails the request before streaming starts
+    graph = get_report_graph()
+    return _generate_reports(graph, iter(items), report_format, max_concurrency, chunk_size or BATCH_CHUNK_SIZE)
+
+def _generate_reports(graph, items: Iterator[Tuple[Any, Any]], report_format: str,
+                      max_concurrency: int, chunk_size: int) -> Iterator[dict]:
+    config = {"max_concurrency": max_concurrency}
+    offset = 0
+    total = failed = 0
+    prompt_tokens = completion_tokens = 0
+    started = time.perf_counter()
+    while True:
+        chunk = list(itertools.islice(items, chunk_size))
+        if not chunk:
+            break
+        pending = []
+        for i, (item_id, diagnosis) in enumerate(chunk):
+            if isinstance(diagnosis, Exception):
+                failed += 1
+                yield {"type": "error", "index": offset + i, "id": item_id, "error": str(diagnosis)}
+            else:
+                pending.append(i)
+        inputs = [{"diagnosis": chunk[i][1], "report_format": report_format} for i in pending]
+        if inputs:
+            for n, output in graph.batch_as_completed(inputs, config=config, return_exceptions=True):
+                i = pending[n]
+                if isinstance(output, dict) and output.get("usage"):
+                    prompt_tokens += output["usage"]["prompt_tokens"]
+                    completion_tokens += output["usage"]["completion_tokens"]
+                report = None if isinstance(output, Exception) else final_report(output, report_format)
+                if report is None:
+                    failed += 1
+                    error = str(output) if isinstance(output, Exception) else "Report generation failed"
+                    yield {"type": "error", "index": offset + i, "id": chunk[i][0], "error": error}
+                else:
+                    yield {"type": "report", "index": offset + i, "id": chunk[i][0], "report": report}
+        offset += len(chunk)
+        total += len(chunk)
+    yield {"type": "summary", "total": total, "succeeded": total - failed, "failed": failed,
+           "prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+           "duration_s": round(time.perf_counter() - started, 3)}
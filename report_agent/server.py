@@ -7,11 +7,43 @@ GitHub: https://github.com/SinghSuryaDeep
 # report_agent/server.py
 
 import logging
-from flask import Flask, request, jsonify
-from report_logic import create_report_graph
-logging.basicConfig(level=logging.INFO)
+from flask import Flask, Response, jsonify
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from report_logic import final_report, generate_reports, get_report_graph, warm_up
+from common.jsonrpc import JsonRpcError
+from common.limits import MAX_INPUT_TOKENS, exceeds_input_budget
+from common.logs import setup_logging
+from common.memtrack import init_memtrack
+from common.schema import SchemaError, compile_schema
+from common.skills import SkillDispatcher
+from common.wire import MEDIA_NDJSON, stream_ndjson
+from common.compression import PrecompressedDocument, init_compression
+from common.profiling import init_profiling
+from common.prefork import parse_server_args, serve_prefork
+from common.startup import StartupTracker, init_startup
+setup_logging("report-agent")
 logger = logging.getLogger(__name__)
+MAX_BATCH_SIZE = int(os.getenv("REPORT_MAX_BATCH", "10000"))
+
+# One diagnosis, as generate-report takes it and as every generate-report-batch item must be
+DIAGNOSIS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "condition": {"type": "string"},
+        "risk": {"type": "string", "enum": ["Low", "Medium", "High"]}
+    },
+    "required": ["condition", "risk"]
+}
+validate_diagnosis = compile_schema(DIAGNOSIS_SCHEMA)
+
 app = Flask(__name__)
+startup = StartupTracker("report-agent")
+init_startup(app, startup)
+init_compression(app)
+init_profiling(app)
+init_memtrack(app)
 agent_card = {
     "apiVersion": "a2a/v0.2",
     "kind": "AgentCard",
@@ -25,7 +57,7 @@ agent_card = {
     "spec": {
         "url": "http://127.0.0.1:8002",
         "capabilities": {
-            "streaming": False,
+            "streaming": True,
             "pushNotifications": False,
             "interactionModes": ["synchronous"]
         },
@@ -55,13 +87,11 @@ agent_card = {
                 "inputSchema": {
                     "type": "object",
                     "properties": {
-                        "diagnosis": {
-                            "type": "object",
-                            "properties": {
-                                "condition": {"type": "string"},
-                                "risk": {"type": "string", "enum": ["Low", "Medium", "High"]}
-                            },
-                            "required": ["condition", "risk"]
+                        "diagnosis": DIAGNOSIS_SCHEMA,
+                        "report_format": {
+                            "type": "string",
+                            "enum": ["string", "object"],
+                            "description": "'string' (default) returns the report as a JSON string, 'object' as a structured object"
                         }
                     },
                     "required": ["diagnosis"]
@@ -69,7 +99,7 @@ agent_card = {
                 "outputSchema": {
                     "type": "object",
                     "properties": {
-                        "report": {"type": "string"}
+                        "report": {"type": ["string", "object"]}
                     },
                     "required": ["report"]
                 },
@@ -78,97 +108,165 @@ agent_card = {
                     "endpoint": "/skills/generate-report",
                     "contentType": "application/json"
                 }
+            },
+            {
+                "id": "generate-report-batch",
+                "name": "Generate Patient Reports in Bulk",
+                "description": "Generate reports for many diagnoses with bounded concurrency; each report is "
+                               "streamed as an NDJSON line as soon as it is ready, followed by a summary line. "
+                               "Diagnoses can be sent as an array, or as NDJSON after a JSON-RPC request line.",
+                "tags": ["reporting", "healthcare", "batch"],
+                "inputSchema": {
+                    "type": "object",
+                    "properties": {
+                        "diagnoses": {
+                            "type": "array",
+                            "items": {
+                                "type": "object",
+                                "description": "A diagnosis, or {\"id\": ..., \"diagnosis\": {...}}"
+                            },
+                            "maxItems": MAX_BATCH_SIZE
+                        },
+                        "report_format": {"type": "string", "enum": ["string", "object"]},
+                        "max_concurrency": {"type": "integer", "minimum": 1}
+                    }
+                },
+                "outputSchema": {
+                    "type": "object",
+                    "properties": {
+                        "reports": {"type": "array", "items": {"type": "object"}},
+                        "summary": {"type": "object"}
+                    },
+                    "required": ["reports", "summary"]
+                },
+                "invocation": {
+                    "method": "POST",
+                    "endpoint": "/skills/generate-report-batch",
+                    "contentType": "application/json",
+                    # The diagnoses may also follow the request line as NDJSON
+                    "streamingContentType": MEDIA_NDJSON,
+                    "responseContentType": MEDIA_NDJSON
+                }
             }
         ]
     }
 }
 
+# Serialized and compressed once – the card never changes at runtime
+agent_card_document = PrecompressedDocument(agent_card)
+
+# Skill handlers
+
+def run_generate_report(params: dict) -> dict:
+    diagnosis = params.get("diagnosis")
+    
+    if not diagnosis:
+        raise JsonRpcError(-32602, "Invalid params - Missing 'diagnosis'")
+    if exceeds_input_budget(diagnosis):
+        raise JsonRpcError(-32602, f"Invalid params - 'diagnosis' exceeds {MAX_INPUT_TOKENS} tokens")
+    report_format = params.get("report_format", "string")
+    if report_format not in ("string", "object"):
+        raise JsonRpcError(-32602, "Invalid params - 'report_format' must be 'string' or 'object'")
+    graph = get_report_graph()
+    final_state = graph.invoke({"diagnosis": diagnosis, "report_format": report_format})
+    report = final_report(final_state, report_format)
+    
+    if report is None:
+        raise JsonRpcError(-32603, "Internal error - Report generation failed", http_status=500)
+    return {"report": report}
+
+def _batch_options(params: dict) -> dict:
+    report_format = params.get("report_format", "string")
+    if report_format not in ("string", "object"):
+        raise JsonRpcError(-32602, "Invalid params - 'report_format' must be 'string' or 'object'")
+    max_concurrency = params.get("max_concurrency")
+    if max_concurrency is not None and (not isinstance(max_concurrency, int) or max_concurrency < 1):
+        raise JsonRpcError(-32602, "Invalid params - 'max_concurrency' must be a positive integer")
+    options = {"report_format": report_format}
+    if max_concurrency is not None:
+        options["max_concurrency"] = max_concurrency
+    return options
+
+def _report_items(entries):
+    """(id, diagnosis) pairs; malformed entries carry a JsonRpcError instead of a diagnosis"""
+    for i, entry in enumerate(entries):
+        if i >= MAX_BATCH_SIZE:
+            yield i, JsonRpcError(-32602, f"At most {MAX_BATCH_SIZE} diagnoses per batch")
+            return
+        if isinstance(entry, Exception):
+            yield i, entry
+            continue
+        item_id, diagnosis = i, entry
+        if isinstance(entry, dict) and isinstance(entry.get("diagnosis"), dict):
+            item_id, diagnosis = entry.get("id", i), entry["diagnosis"]
+        if not isinstance(diagnosis, dict) or not diagnosis:
+            yield item_id, JsonRpcError(-32602, "Diagnosis must be a non-empty object")
+            continue
+        if exceeds_input_budget(diagnosis):
+            yield item_id, JsonRpcError(-32602, f"Diagnosis exceeds {MAX_INPUT_TOKENS} tokens")
+            continue
+        # Array and NDJSON items get the same checks as a generate-report diagnosis
+        try:
+            validate_diagnosis(diagnosis, f"diagnoses[{i}]")
+        except SchemaError as e:
+            yield item_id, JsonRpcError(-32602, f"Invalid diagnosis - {e}", data={"path": e.path})
+            continue
+        yield item_id, diagnosis
+
+def _diagnoses_param(params: dict) -> list:
+    diagnoses = params.get("diagnoses")
+    if not isinstance(diagnoses, list) or not diagnoses:
+        raise JsonRpcError(-32602, "Invalid params - 'diagnoses' must be a non-empty list")
+    if len(diagnoses) > MAX_BATCH_SIZE:
+        raise JsonRpcError(-32602, f"Invalid params - at most {MAX_BATCH_SIZE} diagnoses per batch")
+    return diagnoses
+
+def run_generate_report_batch(params: dict) -> dict:
+    # In-process callers get the whole result at once; HTTP callers get it streamed
+    records = list(generate_reports(_report_items(_diagnoses_param(params)), **_batch_options(params)))
+    summary = records.pop()
+    return {"reports": sorted(records, key=lambda r: r["index"]), "summary": summary}
+
+def stream_report_batch(params: dict, entries) -> Response:
+    options = _batch_options(params)
+    if entries is None:
+        entries = _diagnoses_param(params)
+    # NDJSON diagnoses are read as the reports are generated
+    return stream_ndjson(generate_reports(_report_items(entries), **options))
+
+skills = SkillDispatcher(agent_card, {
+    "generate-report": run_generate_report,
+    "generate-report-batch": run_generate_report_batch
+})
+# Validated against the card schemas – shared by the HTTP endpoints and the in-process transport
+skill_handlers = skills.validated_handlers()
+
 @app.route("/.well-known/agent.json", methods=["GET"])
 def agent_manifest():
     """A2A Agent Discovery Endpoint"""
-    return jsonify(agent_card)
+    return agent_card_document.response()
 
 @app.route("/skills/generate-report", methods=["POST"])
 def generate_report_skill():
     """A2A Compliant Skill Invocation"""
-    try:
-        request_data = request.json
-        if not all(key in request_data for key in ["jsonrpc", "method", "params", "id"]):
-            return jsonify({
-                "jsonrpc": "2.0",
-                "error": {
-                    "code": -32600,
-                    "message": "Invalid Request - Missing required JSON-RPC fields"
-                },
-                "id": request_data.get("id")
-            }), 400
-        
-        if request_data["jsonrpc"] != "2.0":
-            return jsonify({
-                "jsonrpc": "2.0", 
-                "error": {
-                    "code": -32600,
-                    "message": "Invalid Request - jsonrpc must be '2.0'"
-                },
-                "id": request_data.get("id")
-            }), 400
-            
-        if request_data["method"] != "invoke":
-            return jsonify({
-                "jsonrpc": "2.0",
-                "error": {
-                    "code": -32601,
-                    "message": f"Method not found: {request_data['method']}"
-                },
-                "id": request_data["id"]
-            }), 404
-        params = request_data.get("params", {})
-        diagnosis = params.get("diagnosis")
-        
-        if not diagnosis:
-            return jsonify({
-                "jsonrpc": "2.0",
-                "error": {
-                    "code": -32602,
-                    "message": "Invalid params - Missing 'diagnosis'"
-                },
-                "id": request_data["id"]
-            }), 400
-        graph = create_report_graph()
-        final_state = graph.invoke({"diagnosis": diagnosis})
-        report = final_state.get("formatted", None)
-        
-        if report is None:
-            return jsonify({
-                "jsonrpc": "2.0",
-                "error": {
-                    "code": -32603,
-                    "message": "Internal error - Report generation failed"
-                },
-                "id": request_data["id"]
-            }), 500
-        return jsonify({
-            "jsonrpc": "2.0",
-            "result": {
-                "report": report
-            },
-            "id": request_data["id"]
-        })
-        
-    except Exception as e:
-        logger.exception("Error during skill invocation")
-        return jsonify({
-            "jsonrpc": "2.0",
-            "error": {
-                "code": -32603,
-                "message": "Internal error",
-                "data": str(e)
-            },
-            "id": request_data.get("id") if request_data else None
-        }), 500
+    return skills.handle("generate-report")
+
+@app.route("/skills/generate-report-batch", methods=["POST"])
+def generate_report_batch_skill():
+    """A2A Compliant Skill Invocation"""
+    return skills.handle("generate-report-batch", stream=stream_report_batch)
+
 @app.route("/health", methods=["GET"])
 def health_check():
     return jsonify({"status": "healthy", "protocol": "A2A v0.2"})
 
 if __name__ == "__main__":
-    app.run(host="127.0.0.1", port=8002, debug=True)
\ No newline at end of file
+    args = parse_server_args(port=8002)
+    if args.workers > 1:
+        serve_prefork(app, args.host, args.port, args.workers, warm_up=warm_up, startup=startup,
+                      memory_report_interval=args.memory_report_interval,
+                      memory_report_path=args.memory_report)
+    else:
+        startup.start_warmup(warm_up, debug=True)
+        startup.mark_serving()
+        app.run(host=args.host, port=args.port, debug=True)
\ No newline at end of file
@@ -0,0 +1,10 @@
+import os
+import sys
+
+# The agents import ``common`` from the repository root and their logic
+# modules as top-level modules from their own directories
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (ROOT, os.path.join(ROOT, "admin_agent"), os.path.join(ROOT, "diagnostics_agent"),
+             os.path.join(ROOT, "report_agent"), os.path.join(ROOT, "client_agent")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
@@ -0,0 +1,32 @@
+import pytest
+from flask import Flask
+
+from common import debug
+
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+
+    @app.route("/debug/thing")
+    @debug.debug_endpoint
+    def thing():
+        return "ok"
+
+    return app.test_client()
+
+
+def test_closed_without_a_secret(client, monkeypatch):
+    monkeypatch.setattr(debug, "DEBUG_SECRET", None)
+    monkeypatch.setattr(debug, "DEBUG_OPEN", False)
+    assert client.get("/debug/thing").status_code == 403
+    monkeypatch.setattr(debug, "DEBUG_OPEN", True)
+    assert client.get("/debug/thing").status_code == 200
+
+
+def test_secret_required_when_set(client, monkeypatch):
+    monkeypatch.setattr(debug, "DEBUG_SECRET", "s3cret")
+    monkeypatch.setattr(debug, "DEBUG_OPEN", True)
+    assert client.get("/debug/thing").status_code == 403
+    assert client.get("/debug/thing", headers={debug.DEBUG_HEADER: "wrong"}).status_code == 403
+    assert client.get("/debug/thing", headers={debug.DEBUG_HEADER: "s3cret"}).status_code == 200
@@ -0,0 +1,96 @@
+import threading
+import time
+
+import pytest
+
+from common import wire
+from common.idempotency import MemoryBackend, ResultStore, SQLiteBackend, fingerprint, reports_failure
+from common.jsonrpc import JsonRpcError
+
+
+def _concurrent_runs(stores, key="skill:id:1", workers=8):
+    calls = []
+    start = threading.Barrier(workers)
+    outcomes = []
+
+    def call():
+        calls.append(1)
+        time.sleep(0.1)
+        return {"value": 42}
+
+    def worker(store):
+        start.wait()
+        outcomes.append(store.run(key, "hash", call))
+
+    threads = [threading.Thread(target=worker, args=(stores[i % len(stores)],)) for i in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return calls, outcomes
+
+
+def test_concurrent_calls_run_once_in_memory():
+    calls, outcomes = _concurrent_runs([ResultStore(MemoryBackend())])
+    assert len(calls) == 1
+    assert all(result == {"value": 42} for result, _ in outcomes)
+    assert sorted(replayed for _, replayed in outcomes) == [False] + [True] * 7
+
+
+def test_concurrent_calls_run_once_across_sqlite_stores(tmp_path):
+    # Two stores on one file stand in for two pre-fork workers
+    path = str(tmp_path / "results.db")
+    calls, outcomes = _concurrent_runs([ResultStore(SQLiteBackend(path)), ResultStore(SQLiteBackend(path))])
+    assert len(calls) == 1
+    assert [replayed for _, replayed in outcomes].count(False) == 1
+
+
+def test_memory_claim_refuses_running_and_stored_keys():
+    backend = MemoryBackend()
+    assert backend.claim("k", "h")
+    assert not backend.claim("k", "h")
+    backend.put("k", "h", {"ok": True})
+    assert not backend.claim("k", "h")
+    backend.release("other")
+    assert backend.claim("other", "h")
+
+
+def test_stored_result_is_replayed_and_key_reuse_is_rejected():
+    store = ResultStore(MemoryBackend())
+    assert store.run("k", "h", lambda: {"n": 1}) == ({"n": 1}, False)
+    assert store.run("k", "h", lambda: {"n": 2}) == ({"n": 1}, True)
+    with pytest.raises(JsonRpcError) as error:
+        store.run("k", "other-hash", lambda: {"n": 3})
+    assert error.value.http_status == 422
+
+
+@pytest.mark.parametrize("failed", [
+    {"error": "model unavailable", "status": "failed"},
+    {"diagnosis": {"error": "model unavailable", "status": "failed"}},
+    {"diagnoses": [{"condition": "c", "risk": "Low"}, {"error": "x", "status": "failed"}]},
+])
+def test_results_reporting_failure_are_not_stored(failed):
+    assert reports_failure(failed)
+    store = ResultStore(MemoryBackend())
+    assert store.run("k", "h", lambda: failed) == (failed, False)
+    assert store.run("k", "h", lambda: {"ok": True}) == ({"ok": True}, False)
+
+
+def test_raised_errors_are_not_stored():
+    store = ResultStore(MemoryBackend())
+
+    def fail():
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        store.run("k", "h", fail)
+    assert store.run("k", "h", lambda: {"ok": True}) == ({"ok": True}, False)
+
+
+@pytest.mark.parametrize("orjson", [wire.orjson, None])
+def test_fingerprint_ignores_key_order(monkeypatch, orjson):
+    monkeypatch.setattr(wire, "orjson", orjson)
+    first = fingerprint("s", {"a": 1, "b": {"x": [1, 2], "y": None}})
+    assert first == fingerprint("s", {"b": {"y": None, "x": [1, 2]}, "a": 1})
+    assert first != fingerprint("s", {"a": 1, "b": {"x": [2, 1], "y": None}})
+    assert first != fingerprint("t", {"a": 1, "b": {"x": [1, 2], "y": None}})
@@ -0,0 +1,79 @@
+import asyncio
+
+import httpx
+
+from load_generator import StepResult, build_operation, find_saturation, run_step, size_replicas
+
+
+def _step(rate, completed, duration=10.0, latency_ms=100.0, errors=0):
+    step = StepResult(offered_rate=rate, duration=duration, sent=completed + errors,
+                      completed=completed, errors=errors)
+    for _ in range(completed):
+        step.corrected.record(latency_ms / 1000.0)
+    return step
+
+
+def test_latency_alone_is_not_lost_throughput():
+    # Fixed latency and unlimited capacity: the drain after the last send must not count
+    async def slow_but_unlimited():
+        await asyncio.sleep(0.5)
+
+    step = asyncio.run(run_step(slow_but_unlimited, rate=20, duration=1.0, arrival="constant"))
+    assert step.completed == step.sent
+    assert step.wall_time > 1.3
+    assert step.achieved_rate >= 0.9 * 20
+    assert find_saturation([step], max_error_rate=0.01, slo_p99_ms=None)["saturated_at_rate"] is None
+
+
+def test_queueing_is_detected_by_latency_growth():
+    # One request at a time, 50 ms each: about 20 req/s of capacity
+    async def scenario():
+        lock = asyncio.Semaphore(1)
+
+        async def single_server():
+            async with lock:
+                await asyncio.sleep(0.05)
+
+        light = await run_step(single_server, rate=5, duration=1.0, arrival="constant")
+        heavy = await run_step(single_server, rate=60, duration=1.0, arrival="constant")
+        return light, heavy
+
+    light, heavy = asyncio.run(scenario())
+    saturation = find_saturation([light, heavy], max_error_rate=0.01, slo_p99_ms=None)
+    assert saturation["saturated_at_rate"] == 60
+    assert "latency_growth" in saturation["reasons"]
+    assert saturation["max_sustainable_rate"] == 5
+
+
+def test_saturation_reasons_and_sizing():
+    steps = [_step(1, 10), _step(2, 20), _step(4, 30, errors=10)]
+    saturation = find_saturation(steps, max_error_rate=0.01, slo_p99_ms=None)
+    assert saturation == {"saturated_at_rate": 4, "reasons": ["throughput", "errors"], "max_sustainable_rate": 2}
+    assert size_replicas(saturation, target_rate=7, headroom=0.3)["replicas"] == 5
+
+    slow = [_step(1, 10, latency_ms=100), _step(2, 20, latency_ms=900)]
+    assert find_saturation(slow, 0.01, slo_p99_ms=500)["reasons"] == ["latency", "latency_growth"]
+    assert find_saturation(slow, 0.01, slo_p99_ms=None, latency_growth=0)["saturated_at_rate"] is None
+
+
+def test_failed_requests_are_sent_once_and_counted_once():
+    card = {"metadata": {"name": "Diagnostics"}, "spec": {"url": "http://diag", "skills": [{
+        "id": "analyze-patient-data", "invocation": {"endpoint": "/skills/analyze-patient-data"},
+        "examples": [{"input": {"patient_data": {"symptoms": ["cough"]}}}]}]}}
+    posts = []
+
+    def handler(request):
+        if request.method == "GET":
+            return httpx.Response(200, json=card)
+        posts.append(request)
+        return httpx.Response(503)
+
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            operation = await build_operation(client, "skill:diagnostics-agent:analyze-patient-data",
+                                              {"diagnostics-agent": "http://diag"}, None)
+            return await run_step(operation, rate=10, duration=0.5, arrival="constant")
+
+    step = asyncio.run(scenario())
+    assert step.sent == len(posts) == step.errors
+    assert step.error_types == {"HTTPStatusError": step.errors}
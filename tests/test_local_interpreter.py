@@ -0,0 +1,75 @@
+import hashlib
+import json
+import os
+import threading
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+from local_interpreter import WORKSPACE, execute, make_handler
+
+
+def _store_file(store, content):
+    os.makedirs(store, exist_ok=True)
+    file_hash = hashlib.sha256(content).hexdigest()
+    with open(os.path.join(store, file_hash), "wb") as f:
+        f.write(content)
+    return file_hash
+
+
+def test_code_runs_in_a_workspace_filled_from_the_store(tmp_path):
+    store = str(tmp_path / "store")
+    source = _store_file(store, b"hello")
+    code = "print(open('in.txt').read()); open('out.txt', 'w').write('world')"
+    result = execute(code, {f"{WORKSPACE}/in.txt": source}, {}, store, timeout=30)
+    assert (result["exit_code"], result["stdout"]) == (0, "hello\n")
+    out_hash = result["files"][f"{WORKSPACE}/out.txt"]
+    assert f"{WORKSPACE}/in.txt" not in result["files"]
+    with open(os.path.join(store, out_hash), "rb") as f:
+        assert f.read() == b"world"
+
+
+def test_server_credentials_are_not_passed_to_the_code(tmp_path, monkeypatch):
+    monkeypatch.setenv("WATSONX_APIKEY", "secret-key")
+    monkeypatch.setenv("IAM_TOKEN", "secret-token")
+    code = "import os, json; print(json.dumps(dict(os.environ)))"
+    result = execute(code, {}, {"GREETING": "hi"}, str(tmp_path / "store"), timeout=30)
+    env = json.loads(result["stdout"])
+    assert "WATSONX_APIKEY" not in env and "IAM_TOKEN" not in env
+    assert env["GREETING"] == "hi"
+    assert "secret" not in result["stdout"]
+
+
+def test_runaway_code_times_out(tmp_path):
+    result = execute("import time\nprint('started', flush=True)\ntime.sleep(30)", {}, {},
+                     str(tmp_path / "store"), timeout=0.5)
+    assert result["exit_code"] == -1
+    assert "timed out after 0.5s" in result["stderr"]
+
+
+def test_files_outside_the_workspace_are_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        execute("pass", {"/etc/passwd": "0" * 64}, {}, str(tmp_path / "store"), timeout=5)
+
+
+def test_execute_endpoint(tmp_path):
+    handler = make_handler(str(tmp_path / "store"), 30, threading.BoundedSemaphore(1))
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/v1/execute"
+    try:
+        def post(payload):
+            request = urllib.request.Request(url, json.dumps(payload).encode(),
+                                             {"Content-Type": "application/json"})
+            with urllib.request.urlopen(request, timeout=30) as response:
+                return json.loads(response.read())
+
+        assert post({"source_code": "print(6 * 7)"})["stdout"] == "42\n"
+        with pytest.raises(urllib.error.HTTPError) as e:
+            post({"source_code": "pass", "files": {"/etc/passwd": "0" * 64}})
+        assert e.value.code == 400
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,29 @@
+import asyncio
+import json
+import logging
+import queue
+
+from common.logs import ContextQueueHandler, JsonFormatter, agent_var, log_context
+from common.transport import LocalAgent
+
+
+def _prepared(handler, message="hello"):
+    record = logging.LogRecord("diagnostics_logic", logging.INFO, __file__, 1, message, (), None)
+    return handler.prepare(record)
+
+
+def test_records_carry_the_agent_of_the_request_not_the_last_set_up():
+    handler = ContextQueueHandler(queue.Queue(), "agent-host")
+    assert _prepared(handler).agent == "agent-host"
+    with log_context(conversation_id="c1", jsonrpc_id=7, agent="diagnostics-agent"):
+        record = _prepared(handler)
+    entry = json.loads(JsonFormatter().format(record))
+    assert (entry["agent"], entry["conversation_id"], entry["jsonrpc_id"]) == ("diagnostics-agent", "c1", 7)
+    assert _prepared(handler).agent == "agent-host"
+
+
+def test_in_process_calls_are_labelled_with_the_called_agent():
+    card = {"metadata": {"id": "report-agent"}}
+    agent = LocalAgent(card, {"echo": lambda params: {"agent": agent_var.get()}})
+    assert asyncio.run(agent.invoke("echo", {})) == {"agent": "report-agent"}
+    assert agent_var.get() is None
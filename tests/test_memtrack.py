@@ -0,0 +1,32 @@
+import pytest
+from flask import Flask
+
+from common import debug, memtrack
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(debug, "DEBUG_SECRET", None)
+    monkeypatch.setattr(debug, "DEBUG_OPEN", True)
+    app = Flask(__name__)
+    memtrack.init_memtrack(app, enabled=True)
+    return app.test_client()
+
+
+@pytest.mark.parametrize("top", ["abc", "-1", "1.5", ""])
+def test_bad_top_is_rejected(client, top):
+    response = client.get("/debug/memory", query_string={"top": top})
+    assert response.status_code == 400
+    assert "top" in response.get_json()["error"]
+
+
+def test_top_is_clamped(client):
+    response = client.get("/debug/memory", query_string={"top": "100000"})
+    assert response.status_code == 200
+    assert len(response.get_json()["top_live_allocations"]) <= memtrack.MAX_TOP_LIVE
+
+
+def test_top_is_optional(client):
+    response = client.get("/debug/memory")
+    assert response.status_code == 200
+    assert "top_live_allocations" not in response.get_json()
@@ -0,0 +1,40 @@
+from common import prefork, startup as startup_module
+from common.startup import StartupTracker
+
+
+def _failing(phase):
+    raise ConnectionError("IAM unavailable")
+
+
+def _parent_failed():
+    tracker = StartupTracker("test-agent")
+    assert not tracker.run_warmup(_failing, retries=0)
+    return tracker
+
+
+def test_worker_becomes_ready_although_the_parent_warm_up_failed():
+    tracker = _parent_failed()
+    prefork._warm_worker(lambda phase: None, tracker)
+    assert tracker.is_ready and tracker.error is None
+
+
+def test_worker_keeps_retrying_in_the_background(monkeypatch):
+    monkeypatch.setattr(startup_module, "WARMUP_BACKOFF", 0)
+    tracker = _parent_failed()
+    calls = []
+
+    def flaky(phase):
+        calls.append(1)
+        if len(calls) <= 2:
+            raise ConnectionError("IAM unavailable")
+
+    prefork._warm_worker(flaky, tracker)
+    assert tracker.wait_ready(timeout=5)
+    assert len(calls) == 3
+
+
+def test_worker_of_a_ready_parent_stays_ready_when_its_rebuild_fails():
+    tracker = StartupTracker("test-agent")
+    assert tracker.run_warmup(lambda phase: None)
+    prefork._warm_worker(_failing, tracker)
+    assert tracker.is_ready
@@ -0,0 +1,38 @@
+import pytest
+
+from common.prompts import JSON_REPLY_STOP, PromptTooLarge, compact, parse_json_reply, render_prompt
+
+
+def _stopped(reply):
+    """What the model returns when generation ends at the first stop sequence"""
+    cut = min((reply.find(stop) for stop in JSON_REPLY_STOP if stop in reply), default=len(reply))
+    return reply[:cut]
+
+
+@pytest.mark.parametrize("reply", [
+    '```json\n{\n  "condition": "Hypertension",\n  "risk": "High"\n}\n```',
+    '\n```json\n{\n  "condition": "Hypertension",\n  "risk": "High"\n}\n```\nThis is based on the vitals.',
+    'Here is the diagnosis:\n```json\n{"condition": "Hypertension", "risk": "High"}\n```',
+    '{"condition": "Hypertension", "risk": "High"}\n\nThe blood pressure is elevated.',
+])
+def test_stop_sequence_keeps_the_json_object(reply):
+    assert parse_json_reply(_stopped(reply)) == {"condition": "Hypertension", "risk": "High"}
+
+
+def test_stop_sequence_does_not_match_the_opening_fence():
+    reply = '\n```json\n{"condition": "c", "risk": "Low"}\n```'
+    assert "condition" in _stopped(reply)
+
+
+def test_unusable_replies():
+    assert parse_json_reply("") is None
+    assert parse_json_reply("I cannot help with that.") is None
+    assert parse_json_reply('```json\n{"condition": ') is None
+
+
+def test_prompts_are_compact_and_budgeted():
+    assert compact({"b": 1, "a": [1, 2]}) == '{"a":[1,2],"b":1}'
+    prompt = render_prompt("generate-report", "Diagnosis: {diagnosis}", diagnosis={"risk": "High"})
+    assert prompt.text == 'Diagnosis: {"risk":"High"}'
+    with pytest.raises(PromptTooLarge):
+        render_prompt("generate-report", "{text}", text="x" * 4 * (prompt.budget.max_input_tokens + 1))
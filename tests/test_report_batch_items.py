@@ -0,0 +1,37 @@
+import importlib.util
+import os
+
+import pytest
+
+from common.jsonrpc import JsonRpcError
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(scope="module")
+def report_server():
+    # Loaded by path, as agent_host does: every agent's module is called server.py
+    spec = importlib.util.spec_from_file_location("report_agent_server", os.path.join(ROOT, "report_agent", "server.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_streamed_and_array_items_are_validated_alike(report_server):
+    entries = [
+        {"condition": "c", "risk": "High"},
+        {"id": "p2", "diagnosis": {"condition": "c"}},
+        {"condition": "c", "risk": "Severe"},
+        JsonRpcError(-32700, "Parse error"),
+    ]
+    items = list(report_server._report_items(entries))
+    assert items[0] == (0, {"condition": "c", "risk": "High"})
+    assert items[1][0] == "p2" and isinstance(items[1][1], JsonRpcError)
+    assert items[1][1].data == {"path": "diagnoses[1]"}
+    assert isinstance(items[2][1], JsonRpcError) and "risk" in items[2][1].data["path"]
+    assert isinstance(items[3][1], JsonRpcError)
+
+
+def test_card_keeps_content_type_a_string(report_server):
+    for skill in report_server.agent_card["spec"]["skills"]:
+        assert isinstance(skill["invocation"]["contentType"], str)
@@ -0,0 +1,79 @@
+import asyncio
+import hashlib
+import os
+import subprocess
+import sys
+import threading
+import time
+
+from sandbox_pool import SandboxPool, acquire_permit
+
+
+def _write(path, content, age=0.0):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(content)
+    if age:
+        old = time.time() - age
+        os.utime(path, (old, old))
+    return hashlib.sha256(content).hexdigest()
+
+
+def _dead_pid():
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+
+def test_reaper_spares_siblings_and_store_files_in_use(tmp_path):
+    source, store = str(tmp_path / "source"), str(tmp_path / "store")
+    pool = SandboxPool(size=2, source_dir=source, target_dir=store, file_ttl=60, reap_interval=0)
+    session = pool.acquire()
+
+    leased_hash = _write(os.path.join(session.local_working_dir, "data.csv"), b"leased", age=3600)
+    sibling_dir = os.path.join(source, f"session-{os.getppid()}-0")
+    sibling_hash = _write(os.path.join(sibling_dir, "input.csv"), b"sibling", age=3600)
+    dead_dir = os.path.join(source, f"session-{_dead_pid()}-0")
+    _write(os.path.join(dead_dir, "left-over.csv"), b"dead")
+    foreign_dir = os.path.join(source, "not-a-session")
+    os.makedirs(foreign_dir)
+    for name in (leased_hash, sibling_hash):
+        _write(os.path.join(store, name), b"x", age=3600)
+    _write(os.path.join(store, "unused"), b"unused", age=3600)
+
+    pool.reap()
+
+    assert os.path.exists(os.path.join(session.local_working_dir, "data.csv"))
+    assert os.path.exists(os.path.join(sibling_dir, "input.csv"))
+    assert not os.path.exists(dead_dir)
+    assert os.path.isdir(foreign_dir)
+    assert sorted(os.listdir(store)) == sorted([leased_hash, sibling_hash])
+
+    # Once released, the session's files are gone and its store file can be reclaimed
+    pool.release(session)
+    pool.reap()
+    assert leased_hash not in os.listdir(store)
+
+
+def test_cancelled_waits_do_not_keep_execution_permits():
+    semaphore = threading.BoundedSemaphore(1)
+
+    async def cancel_waiters():
+        semaphore.acquire()
+        waiters = [asyncio.ensure_future(acquire_permit(semaphore)) for _ in range(5)]
+        await asyncio.sleep(0.05)
+        for waiter in waiters:
+            waiter.cancel()
+        semaphore.release()
+        await asyncio.gather(*waiters, return_exceptions=True)
+
+    for _ in range(3):
+        asyncio.run(cancel_waiters())
+    # Abandoned waits that got the permit after all hand it back
+    deadline = time.monotonic() + 2
+    while not semaphore.acquire(blocking=False):
+        assert time.monotonic() < deadline, "permit leaked by a cancelled wait"
+        time.sleep(0.01)
+    semaphore.release()
+    asyncio.run(acquire_permit(semaphore))
+    assert not semaphore.acquire(blocking=False)
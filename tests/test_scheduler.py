@@ -0,0 +1,84 @@
+from datetime import date, datetime, time, timedelta
+
+import pytest
+
+import scheduler
+from scheduler import MemoryCalendar, SlotIndex, SQLiteCalendar, assign_followups, summarize
+
+# A Monday, so the first workdays are right after it
+NOW = datetime(2026, 10, 19, 8, 0)
+
+
+def _fresh_calendar(monkeypatch, capacity):
+    monkeypatch.setattr(scheduler, "_calendar", MemoryCalendar(capacity=capacity))
+
+
+def test_high_risk_overflow_is_unscheduled_not_booked_late(monkeypatch):
+    _fresh_calendar(monkeypatch, capacity=1)
+    followups = [{"id": f"p{i}", "report": {"Condition": "c", "RiskLevel": "High"}} for i in range(200)]
+    records = assign_followups(followups, now=NOW)
+
+    appointments = [r for r in records if r["type"] == "appointment"]
+    unscheduled = [r for r in records if r["type"] == "unscheduled"]
+    assert appointments and unscheduled
+    assert len(appointments) + len(unscheduled) == 200
+    for record in appointments:
+        start = datetime.fromisoformat(record["appointment"].rstrip("Z"))
+        assert start.date() <= date.fromisoformat(record["deadline"])
+    # Deadline is 7 days out: days 1-7 hold five workdays of 14 half-hour slots
+    assert len(appointments) == 5 * 14
+
+
+def test_deadline_stops_the_free_slot_search():
+    index = SlotIndex(NOW.date(), horizon_days=14, capacity=1)
+    deadline = datetime.combine(NOW.date() + timedelta(days=1), time.max)
+    earliest = datetime.combine(NOW.date() + timedelta(days=1), time.min)
+    booked = [index.book_first_free(earliest, deadline) for _ in range(20)]
+    assert booked.count(None) == 20 - 14
+    assert index.book_first_free(earliest) is not None
+
+
+def test_bad_reports_become_error_records(monkeypatch):
+    _fresh_calendar(monkeypatch, capacity=4)
+    followups = [
+        {"id": "list", "report": "[1, 2]"},
+        {"id": "broken", "report": "{not json"},
+        {"id": "ok", "report": {"Condition": "Hypertension", "RiskLevel": "Medium"}},
+    ]
+    records = assign_followups(followups, now=NOW)
+    assert [r["type"] for r in records] == ["error", "error", "appointment"]
+    assert "expected an object" in records[0]["error"]
+    summary = summarize(records)
+    assert (summary["scheduled"], summary["errors"], summary["unscheduled"]) == (1, 2, 0)
+
+
+def test_sqlite_bookings_are_shared_by_workers_and_kept_across_restarts(monkeypatch, tmp_path):
+    path = str(tmp_path / "scheduler.sqlite")
+    followups = [{"id": f"p{i}", "report": {"Condition": "c", "RiskLevel": "High"}} for i in range(50)]
+    # Two workers of the same host, each with its own connection to the calendar
+    for worker in (SQLiteCalendar(path, capacity=1), SQLiteCalendar(path, capacity=1)):
+        monkeypatch.setattr(scheduler, "_calendar", worker)
+        assign_followups(followups, now=NOW)
+    restarted = SQLiteCalendar(path, capacity=1)
+    with restarted.index(NOW.date()) as index:
+        bookings = index.bookings()
+    # 5 workdays of 14 slots fit the 7-day deadline, one appointment each: never more
+    assert len(bookings) == 5 * 14 and set(bookings.values()) == {1}
+
+
+def test_failed_batch_books_nothing(tmp_path):
+    calendar = SQLiteCalendar(str(tmp_path / "scheduler.sqlite"))
+    with pytest.raises(RuntimeError):
+        with calendar.index(NOW.date()) as index:
+            index.book_first_free(NOW)
+            raise RuntimeError("batch failed")
+    with calendar.index(NOW.date()) as index:
+        assert index.bookings() == {}
+
+
+def test_memory_calendar_is_refused_in_forked_workers(monkeypatch):
+    monkeypatch.setattr(scheduler, "STORE_SPEC", "memory")
+    monkeypatch.setattr(scheduler, "_calendar", None)
+    monkeypatch.setattr(scheduler, "_forked", True)
+    with pytest.raises(RuntimeError, match="pre-forked"):
+        scheduler.get_calendar()
@@ -0,0 +1,81 @@
+import pytest
+
+from common.schema import SchemaError, compile_card, compile_schema
+
+
+def path_of(validate, value):
+    with pytest.raises(SchemaError) as e:
+        validate(value)
+    return e.value.path
+
+
+def test_type_names_and_lists():
+    validate = compile_schema({"type": ["string", "null"]})
+    validate("x")
+    validate(None)
+    assert path_of(validate, 1) == "$"
+    integer = compile_schema({"type": "integer"})
+    integer(3)
+    path_of(integer, True)
+    path_of(integer, 1.5)
+    compile_schema({"type": "number"})(1.5)
+
+
+def test_properties_required_and_additional():
+    validate = compile_schema({
+        "type": "object",
+        "properties": {"name": {"type": "string"}, "age": {"type": "integer", "minimum": 0}},
+        "required": ["name"],
+        "additionalProperties": False
+    })
+    validate({"name": "a", "age": 3})
+    assert path_of(validate, {}) == "$"
+    assert path_of(validate, {"name": 1}) == "$.name"
+    assert path_of(validate, {"name": "a", "age": -1}) == "$.age"
+    assert path_of(validate, {"name": "a", "extra": 1}) == "$"
+    typed_extra = compile_schema({"properties": {"a": {}}, "additionalProperties": {"type": "integer"}})
+    typed_extra({"a": "anything", "b": 2})
+    assert path_of(typed_extra, {"b": "x"}) == "$.b"
+
+
+def test_items_and_array_bounds():
+    validate = compile_schema({"type": "array", "items": {"type": "string"}, "minItems": 1, "maxItems": 2})
+    validate(["a"])
+    path_of(validate, [])
+    path_of(validate, ["a", "b", "c"])
+    assert path_of(validate, ["a", 2]) == "$[1]"
+
+
+def test_enum_range_and_length():
+    assert path_of(compile_schema({"enum": ["Low", "High"]}), "Medium") == "$"
+    bounded = compile_schema({"minimum": 1, "maximum": 5})
+    bounded(5)
+    path_of(bounded, 0)
+    path_of(bounded, 6)
+    bounded("not a number")  # range only applies to numbers
+    text = compile_schema({"type": "string", "minLength": 2, "maxLength": 3})
+    text("ab")
+    path_of(text, "a")
+    path_of(text, "abcd")
+
+
+def test_annotations_are_ignored_and_unknown_keywords_rejected():
+    compile_schema({"type": "string", "description": "d", "title": "t", "examples": ["x"], "default": "x"})
+    with pytest.raises(ValueError, match="pattern"):
+        compile_schema({"type": "string", "pattern": "^a"})
+    with pytest.raises(ValueError, match="Unsupported schema type"):
+        compile_schema({"type": "date"})
+    with pytest.raises(ValueError, match="oneOf"):
+        compile_schema({"properties": {"a": {"oneOf": []}}})
+    with pytest.raises(ValueError, match="Skill 'bad'"):
+        compile_card({"spec": {"skills": [{"id": "bad", "inputSchema": {"oneOf": []}}]}})
+
+
+def test_compile_card_per_skill():
+    validators = compile_card({"spec": {"skills": [
+        {"id": "s", "inputSchema": {"type": "object", "required": ["x"]}},
+        {"id": "t"}
+    ]}})
+    validate_input, validate_output = validators["s"]
+    assert validate_output is None and validators["t"] == (None, None)
+    assert path_of(validate_input, {}) == "$"
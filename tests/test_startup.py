@@ -0,0 +1,44 @@
+import pytest
+from flask import Flask
+
+from common import startup as startup_module
+from common.startup import StartupTracker, init_startup
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(startup_module, "WARMUP_BACKOFF", 0)
+
+
+def _flaky(failures):
+    calls = []
+
+    def warm_up(phase):
+        calls.append(1)
+        if len(calls) <= failures:
+            raise ConnectionError("IAM unavailable")
+    return warm_up, calls
+
+
+def test_transient_warmup_failure_is_retried_until_ready():
+    tracker = StartupTracker("test-agent")
+    app = Flask(__name__)
+    init_startup(app, tracker)
+    warm_up, calls = _flaky(failures=2)
+    assert tracker.run_warmup(warm_up, retries=-1)
+    assert len(calls) == 3
+    assert tracker.is_ready and tracker.error is None
+    assert app.test_client().get("/ready").status_code == 200
+    assert [p["status"] for p in tracker.report()["phases"]] == ["failed", "failed", "ok"]
+
+
+def test_retries_are_bounded():
+    tracker = StartupTracker("test-agent")
+    app = Flask(__name__)
+    init_startup(app, tracker)
+    warm_up, calls = _flaky(failures=5)
+    assert not tracker.run_warmup(warm_up, retries=1)
+    assert len(calls) == 2
+    response = app.test_client().get("/ready")
+    assert response.status_code == 503
+    assert response.get_json() == {"status": "failed", "protocol": "A2A v0.2", "error": "IAM unavailable"}
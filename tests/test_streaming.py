@@ -0,0 +1,93 @@
+import gzip
+import json
+import time
+import zlib
+
+import pytest
+from flask import Flask
+
+from common import debug, profiling
+from common.compression import init_compression
+from common.logs import CONVERSATION_HEADER, agent_var, conversation_id_var, jsonrpc_id_var
+from common.memtrack import init_memtrack
+from common.skills import SkillDispatcher
+from common.wire import ndjson_response, stream_ndjson
+
+CARD = {
+    "metadata": {"id": "stream-agent"},
+    "spec": {"skills": [{"id": "batch", "inputSchema": {"type": "object"}}]}
+}
+
+
+@pytest.fixture
+def app(monkeypatch):
+    monkeypatch.setattr(debug, "DEBUG_SECRET", "s3cret")
+    app = Flask(__name__)
+    init_compression(app)
+    app.profiles = profiling.init_profiling(app, profiling.ProfileStore(directory=None))
+    app.memtrack = init_memtrack(app, enabled=True)
+    skills = SkillDispatcher(CARD, {"batch": lambda params: {}})
+
+    def stream(params, entries):
+        def records():
+            for i in range(params.get("n", 50)):
+                time.sleep(0.002)
+                yield {"i": i, "agent": agent_var.get(), "conversation_id": conversation_id_var.get(),
+                       "jsonrpc_id": jsonrpc_id_var.get(), "pad": "x" * 40}
+        return stream_ndjson(records())
+
+    @app.route("/skills/batch", methods=["POST"])
+    def batch():
+        return skills.handle("batch", stream=stream)
+
+    return app
+
+
+def _post(client, **headers):
+    return client.post("/skills/batch", json={"jsonrpc": "2.0", "method": "invoke", "params": {}, "id": 9},
+                       headers={CONVERSATION_HEADER: "conv-1", **headers})
+
+
+def test_streamed_records_keep_the_request_log_context(app):
+    response = _post(app.test_client())
+    lines = [json.loads(line) for line in response.get_data().splitlines()]
+    assert len(lines) == 50
+    assert {(r["agent"], r["conversation_id"], r["jsonrpc_id"]) for r in lines} == {("stream-agent", "conv-1", 9)}
+
+
+def test_streamed_body_is_compressed_and_flushed_per_line(app):
+    response = _post(app.test_client(), **{"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    chunks = list(response.response)
+    decompressor = zlib.decompressobj(31)
+    # Every chunk but the trailer decodes to whole lines on its own
+    first = decompressor.decompress(chunks[0])
+    assert first.endswith(b"\n") and json.loads(first)["i"] == 0
+    response.close()
+    body = gzip.decompress(b"".join(chunks))
+    assert len(body.splitlines()) == 50
+    assert len(b"".join(chunks)) < len(body)
+
+
+def test_profile_and_memory_cover_the_streamed_body(app):
+    client = app.test_client()
+    response = _post(client, **{profiling.PROFILE_HEADER: "s3cret"})
+    response.get_data()
+    response.close()
+    [profile] = app.profiles.list()
+    assert profile["samples"] > 0 and profile["duration_s"] >= 0.1
+    [record] = app.memtrack.recent
+    assert record["duration_s"] >= 0.1
+
+
+def test_precomputed_ndjson_is_an_ordinary_compressed_body():
+    app = Flask(__name__)
+    init_compression(app)
+
+    @app.route("/batch")
+    def batch():
+        return ndjson_response([{"i": i, "pad": "x" * 40} for i in range(200)])
+
+    response = app.test_client().get("/batch", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert len(gzip.decompress(response.get_data()).splitlines()) == 200
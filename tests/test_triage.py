@@ -0,0 +1,99 @@
+import asyncio
+import logging
+
+import pytest
+
+import diagnostics_logic
+from triage import TriageConfig, score_batch, triage_batch
+from vitals import vitals_to_arrays
+
+NORMAL_VITALS = {"respiratory_rate": 16, "spo2": "98%", "temperature": "36.8 C", "bp": "125/80",
+                 "pulse": "72 bpm", "avpu": "alert", "oxygen": "room air"}
+
+
+def test_a_batch_answered_entirely_by_rules_is_logged(caplog):
+    patients = [{"symptoms": ["mild sore throat"], "vitals": NORMAL_VITALS}]
+    with caplog.at_level(logging.INFO, logger=diagnostics_logic.logger.name):
+        results = asyncio.run(diagnostics_logic.analyze_patient_batch_async(patients))
+    assert results[0]["risk"] == "Low"
+    assert "Triage: 1 of 1 patients answered by rules" in caplog.messages
+
+
+# Every NEWS2 band edge: (field, value, points)
+BAND_EDGES = [
+    ("respiratory_rate", 8, 3), ("respiratory_rate", 9, 1), ("respiratory_rate", 11, 1),
+    ("respiratory_rate", 12, 0), ("respiratory_rate", 20, 0), ("respiratory_rate", 21, 2),
+    ("respiratory_rate", 24, 2), ("respiratory_rate", 25, 3),
+    ("spo2", 91, 3), ("spo2", 92, 2), ("spo2", 93, 2), ("spo2", 94, 1), ("spo2", 95, 1), ("spo2", 96, 0),
+    ("temperature_c", 35.0, 3), ("temperature_c", 35.1, 1), ("temperature_c", 36.0, 1),
+    ("temperature_c", 36.1, 0), ("temperature_c", 38.0, 0), ("temperature_c", 38.1, 1),
+    ("temperature_c", 39.0, 1), ("temperature_c", 39.1, 2),
+    ("systolic", 90, 3), ("systolic", 91, 2), ("systolic", 100, 2), ("systolic", 101, 1),
+    ("systolic", 110, 1), ("systolic", 111, 0), ("systolic", 219, 0), ("systolic", 220, 3),
+    ("pulse", 40, 3), ("pulse", 41, 1), ("pulse", 50, 1), ("pulse", 51, 0), ("pulse", 90, 0),
+    ("pulse", 91, 1), ("pulse", 110, 1), ("pulse", 111, 2), ("pulse", 130, 2), ("pulse", 131, 3),
+    ("consciousness", "A", 0), ("consciousness", "V", 3),
+    ("supplemental_o2", "room air", 0), ("supplemental_o2", "yes", 2),
+]
+VITALS_KEY = {"temperature_c": "temperature_c", "consciousness": "avpu", "supplemental_o2": "oxygen"}
+
+
+@pytest.mark.parametrize("field, value, points", BAND_EDGES)
+def test_news2_band_edges(field, value, points):
+    scores = score_batch(vitals_to_arrays([{VITALS_KEY.get(field, field): value}]))
+    assert scores.components[field][0] == points
+    assert scores.total[0] == points and scores.measured[0] == 1
+
+
+def test_missing_vitals_score_nothing_and_are_not_measured():
+    scores = score_batch(vitals_to_arrays([None, {"pulse": "n/a"}]))
+    assert list(scores.total) == [0, 0] and list(scores.measured) == [0, 0]
+
+
+CRITICAL_VITALS = {**NORMAL_VITALS, "respiratory_rate": 26, "spo2": "90%", "bp": "88/60", "pulse": 135}
+
+
+@pytest.mark.parametrize("patient, action", [
+    ({"symptoms": ["sore throat"], "vitals": NORMAL_VITALS}, "low"),
+    # A single parameter scoring 3 is never low risk
+    ({"symptoms": ["sore throat"], "vitals": {**NORMAL_VITALS, "avpu": "V"}}, "escalate"),
+    # Slightly abnormal but not critical: the LLM decides
+    ({"symptoms": ["sore throat"], "vitals": {**NORMAL_VITALS, "pulse": 95}}, "escalate"),
+    # Red-flag symptoms always go to the LLM, whatever the vitals
+    ({"symptoms": ["Chest pain"], "vitals": NORMAL_VITALS}, "escalate"),
+    # Too few measured vitals to call it low risk
+    ({"symptoms": ["sore throat"], "vitals": {"pulse": 72, "spo2": 98}}, "escalate"),
+    ({"symptoms": ["sore throat"]}, "escalate"),
+    ({"symptoms": ["sore throat"], "vitals": CRITICAL_VITALS}, "critical"),
+])
+def test_rules_versus_llm_split(patient, action):
+    [decision] = triage_batch([patient], TriageConfig(enabled=True, critical_action="answer"))
+    assert decision.action == action
+    assert (decision.diagnosis() is None) == (action == "escalate")
+
+
+def test_critical_patients_can_still_be_annotated_for_the_llm():
+    patient = {"symptoms": [], "vitals": CRITICAL_VITALS}
+    [decision] = triage_batch([patient], TriageConfig(enabled=True, critical_action="annotate"))
+    assert decision.action == "escalate" and decision.score >= 7
+    assert "Early warning score" in decision.prompt_annotation()
+    [decision] = triage_batch([{"symptoms": [], "vitals": NORMAL_VITALS}], TriageConfig(enabled=False))
+    assert decision.action == "escalate"
+
+
+def test_only_escalated_patients_reach_the_llm(monkeypatch):
+    sent = []
+
+    async def fake_llm(patient_data, decision):
+        sent.append(patient_data)
+        return {"condition": "Viral infection", "risk": "Medium"}
+
+    monkeypatch.setattr(diagnostics_logic, "_analyze_escalated", fake_llm)
+    patients = [
+        {"symptoms": ["sore throat"], "vitals": NORMAL_VITALS},
+        {"symptoms": ["chest pain"], "vitals": NORMAL_VITALS},
+        {"symptoms": ["sore throat"], "vitals": CRITICAL_VITALS},
+    ]
+    results = asyncio.run(diagnostics_logic.analyze_patient_batch_async(patients))
+    assert sent == [patients[1]]
+    assert [r["risk"] for r in results] == ["Low", "Medium", "High"]
@@ -0,0 +1,63 @@
+import math
+
+import pytest
+
+from vitals import (normalize_vitals, parse_blood_pressure, parse_consciousness, parse_flag, parse_temperature_c,
+                    vitals_to_arrays)
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("A", 0.0), ("alert", 0.0), ("Alert, no pain", 0.0), ("awake and oriented", 0.0),
+    ("no confusion, alert", 0.0), (15, 0.0),
+    ("C", 1.0), ("V", 1.0), ("P", 1.0), ("U", 1.0), ("new confusion", 1.0), ("responds to voice", 1.0),
+    ("responds to pain", 1.0), ("unresponsive", 1.0), ("a bit drowsy", 1.0), ("not alert", 1.0), (12, 1.0),
+])
+def test_consciousness_matches_whole_avpu_words(value, expected):
+    assert parse_consciousness(value) == expected
+
+
+@pytest.mark.parametrize("value", [None, "", "painful", "unclear", "GCS"])
+def test_unknown_consciousness_is_missing(value):
+    assert math.isnan(parse_consciousness(value))
+
+
+@pytest.mark.parametrize("value, key, expected", [
+    ("99.2 F", "temperature", 37.33), ("37.4C", "temperature", 37.4), ("38,1 °C", "temperature", 38.1),
+    (37, "temperature", 37.0), (101.5, "temperature", 38.61), ("98.6", "temperature_f", 37.0),
+    ("40", "temperature_f", 4.44),
+])
+def test_temperature_is_read_in_celsius(value, key, expected):
+    assert parse_temperature_c(value, key) == pytest.approx(expected, abs=0.01)
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("150/95", (150.0, 95.0)), ("150 / 95 mmHg", (150.0, 95.0)),
+    ({"systolic": "120", "diastolic": 80}, (120.0, 80.0)), ("140", (140.0, math.nan)),
+    (None, (math.nan, math.nan)),
+])
+def test_blood_pressure(value, expected):
+    assert parse_blood_pressure(value) == pytest.approx(expected, nan_ok=True)
+
+
+@pytest.mark.parametrize("value, expected", [
+    (True, 1.0), (False, 0.0), (2, 1.0), (0, 0.0), ("yes", 1.0), ("room air", 0.0), ("Air", 0.0),
+    ("2 L/min nasal cannula", 1.0), ("unknown", math.nan),
+])
+def test_supplemental_oxygen_flag(value, expected):
+    assert parse_flag(value) == pytest.approx(expected, nan_ok=True)
+
+
+def test_aliases_and_units_are_normalized():
+    normalized = normalize_vitals({"Heart Rate": "110 bpm", "SpO2": "94%", "RR": 22, "Blood-Pressure": "150/95",
+                                   "Temp": "99.2 F", "AVPU": "V", "O2": "2L"})
+    assert normalized == pytest.approx({"respiratory_rate": 22.0, "spo2": 94.0, "temperature_c": 37.33,
+                                        "systolic": 150.0, "diastolic": 95.0, "pulse": 110.0,
+                                        "consciousness": 1.0, "supplemental_o2": 1.0}, abs=0.01)
+    assert all(math.isnan(v) for v in normalize_vitals(None).values())
+    assert math.isnan(normalize_vitals({"pulse": "unreadable"})["pulse"])
+
+
+def test_batches_become_columns_with_nan_for_missing():
+    batch = vitals_to_arrays([{"pulse": 80}, None, {"pulse": "95"}])
+    assert len(batch) == 3
+    assert batch["pulse"] == pytest.approx([80.0, math.nan, 95.0], nan_ok=True)